@@ -0,0 +1,7 @@
+# Benchmarks package initialization
+
+import os
+
+# Benchmarks render offscreen (EGL) unless PYOPENGL_PLATFORM says otherwise;
+# set here because PyOpenGL binds its platform when first imported
+os.environ.setdefault('PYOPENGL_PLATFORM', 'egl')
@@ -0,0 +1,69 @@
+"""
+Benchmark: immediate-mode buildings vs the baked CityMesh
+Usage: python -m benchmarks.bench_buildings [counts...]
+"""
+import random
+import sys
+import time
+
+from OpenGL.GL import *
+
+from benchmarks.common import create_gl_context, time_frames
+from engine.mesh import CityMesh
+from objects.building import Building
+
+
+def make_buildings(count, spacing=8.0):
+    """
+    Lay out buildings on a square grid so any count fits
+    Args:
+        count: Number of buildings
+        spacing: Distance between building centers
+    Returns:
+        list: List of Building objects
+    """
+    side = int(count ** 0.5) + 1
+    offset = side * spacing / 2
+    return [
+        Building((i % side) * spacing - offset, (i // side) * spacing - offset)
+        for i in range(count)
+    ]
+
+
+def run(counts=(60, 1000, 10000, 100000)):
+    """Print frame times for both building paths at each count"""
+    renderer, camera, lighting = create_gl_context()
+    random.seed(0)
+
+    print(f"{'buildings':>10} {'bake ms':>10} {'immediate ms':>14} {'mesh ms':>10}")
+    for count in counts:
+        buildings = make_buildings(count)
+
+        def draw_frame(draw_buildings):
+            renderer.clear_screen()
+            camera.apply_view()
+            lighting.update_position()
+            draw_buildings()
+
+        def draw_immediate():
+            for building in buildings:
+                building.draw()
+
+        # Immediate mode gets very slow at large counts, so time fewer frames
+        immediate_frames = max(1, min(20, 20000 // count))
+        immediate = time_frames(lambda: draw_frame(draw_immediate), frames=immediate_frames, warmup=1)
+
+        mesh = CityMesh()
+        start = time.perf_counter()
+        mesh.build(buildings)
+        bake_ms = (time.perf_counter() - start) * 1000.0
+        baked = time_frames(lambda: draw_frame(mesh.draw))
+        mesh.release()
+
+        print(f"{count:>10} {bake_ms:>10.2f} {sum(immediate) / len(immediate):>14.2f} "
+              f"{sum(baked) / len(baked):>10.2f}")
+
+
+if __name__ == "__main__":
+    counts = [int(arg) for arg in sys.argv[1:]] or (60, 1000, 10000, 100000)
+    run(counts)
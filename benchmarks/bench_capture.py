@@ -0,0 +1,89 @@
+"""
+Benchmark: frame capture cost on the render thread
+Renders the simulation headless with no capture, a synchronous
+glReadPixels + write per frame, and the pixel buffer ring handing frames to
+the writer pool, reporting total frame times and the render-thread time
+spent in capture() (after a glFinish, so it excludes the rendering itself)
+Usage: python -m benchmarks.bench_capture [width height]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+from OpenGL.GL import *
+
+from benchmarks.common import time_frames
+from engine.capture import FrameCapture, FrameWriter, encode_png
+from main import CitySimulation
+from utils.timing import summarize_times
+
+
+class SynchronousCapture:
+    def __init__(self, writer):
+        """Read each frame back and write it before returning (the naive way)"""
+        self.writer = writer
+        self.frame = 0
+        self.times = []
+
+    def capture(self):
+        start = time.perf_counter()
+        width, height = self.writer.width, self.writer.height
+        pixels = glReadPixels(0, 0, width, height, GL_RGBA, GL_UNSIGNED_BYTE)
+        frame = np.frombuffer(pixels, dtype=np.uint8).reshape(height, width, 4)
+        if self.writer.format == 'png':
+            with open(os.path.join(self.writer.path, f"frame_{self.frame:06d}.png"), 'wb') as f:
+                f.write(encode_png(frame))
+        else:
+            self.writer.stream.write(frame.data)
+        self.frame += 1
+        self.times.append((time.perf_counter() - start) * 1000.0)
+
+    def close(self):
+        self.writer.executor.shutdown(wait=True)
+        if self.writer.stream is not None:
+            self.writer.stream.close()
+
+
+class Flushed:
+    def __init__(self, capture):
+        """Finish rendering before capturing, so the capture time excludes it
+        (software GL renders lazily, at the first readback)"""
+        self.inner = capture
+
+    def capture(self):
+        glFinish()
+        self.inner.capture()
+
+
+def run(width=800, height=600, frames=60):
+    """Print frame times for each capture mode and format"""
+    simulation = CitySimulation(num_buildings=2000, num_trees=2000, num_cars=500, grid_size=8,
+                                seed=0, headless=True, width=width, height=height)
+    directory = tempfile.mkdtemp(prefix='bench-capture-')
+    print(f"{width}x{height}, {frames} frames")
+    print(f"{'mode':>12} {'format':>7} {'frame ms':>9} {'p99 ms':>8} {'capture ms':>11}")
+    try:
+        base = summarize_times(time_frames(simulation.render, frames=frames))
+        print(f"{'none':>12} {'-':>7} {base['mean']:>9.2f} {base['p99']:>8.2f} {'-':>11}")
+        for fmt in ('raw', 'png'):
+            for mode in ('synchronous', 'ring'):
+                path = os.path.join(directory, f"{mode}-{fmt}")
+                writer = FrameWriter(path, width, height, fmt=fmt)
+                capture = FrameCapture(writer) if mode == 'ring' else SynchronousCapture(writer)
+                simulation.renderer.capture = Flushed(capture)
+                times = summarize_times(time_frames(simulation.render, frames=frames))
+                simulation.renderer.capture = None
+                capture.close()
+                cost = summarize_times(capture.times)
+                print(f"{mode:>12} {fmt:>7} {times['mean']:>9.2f} {times['p99']:>8.2f} {cost['mean']:>11.2f}")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+        simulation.scene.release()
+
+
+if __name__ == "__main__":
+    size = [int(arg) for arg in sys.argv[1:3]] or (800, 600)
+    run(*size)
@@ -0,0 +1,44 @@
+"""
+Benchmark: per-object Car.update loop vs the vectorized CarFleet step
+Usage: python -m benchmarks.bench_fleet [counts...]
+"""
+import sys
+import time
+
+from utils.helpers import create_cars
+
+
+def time_step(step, repeats=20):
+    """
+    Time a simulation step callback
+    Args:
+        step: Callable advancing the simulation once
+        repeats: Number of timed steps
+    Returns:
+        float: Median step time in milliseconds
+    """
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        step()
+        times.append((time.perf_counter() - start) * 1000.0)
+    return sorted(times)[len(times) // 2]
+
+
+def run(counts=(1000, 10000, 100000, 1000000)):
+    """Print step times for both car update paths at each count"""
+    print(f"{'cars':>10} {'Car.update ms':>15} {'CarFleet ms':>12}")
+    for count in counts:
+        fleet = create_cars(count, as_fleet=True)
+        fleet_ms = time_step(lambda: fleet.update(1.0))
+
+        # The per-object loop is far too slow to repeat at large counts
+        cars = list(fleet)
+        loop_ms = time_step(lambda: [car.update(1.0) for car in cars], repeats=max(1, 100000 // count))
+
+        print(f"{count:>10} {loop_ms:>15.2f} {fleet_ms:>12.3f}")
+
+
+if __name__ == "__main__":
+    counts = [int(arg) for arg in sys.argv[1:]] or (1000, 10000, 100000, 1000000)
+    run(counts)
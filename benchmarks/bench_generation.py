@@ -0,0 +1,82 @@
+"""
+Benchmark: building placement with the spatial hash vs a linear scan, and
+per-block generation on 1, 2, 4, ... worker processes
+Usage: python -m benchmarks.bench_generation [counts...]
+"""
+import math
+import os
+import random
+import sys
+import time
+
+from objects.road import Road
+from utils.helpers import compute_city_blocks, generate_building_array, place_buildings
+
+
+def city_blocks_for(count, buildings_per_block=20):
+    """
+    Lay out a road grid big enough to hold a number of buildings
+    Args:
+        count: Number of buildings to place
+        buildings_per_block: Target density (a block fits roughly twice this)
+    Returns:
+        list: City blocks for place_buildings
+    """
+    roads = math.ceil(math.sqrt(count / buildings_per_block)) + 1
+    road = Road(num_horizontal=roads, num_vertical=roads)
+    return compute_city_blocks(road.vertical_positions, road.horizontal_positions,
+                               road.road_width, road.road_length)
+
+
+def time_placement(blocks, count, use_index):
+    """
+    Time placing buildings
+    Returns:
+        tuple: (seconds, buildings placed)
+    """
+    random.seed(0)
+    start = time.perf_counter()
+    buildings = place_buildings(blocks, count, use_index=use_index)
+    return time.perf_counter() - start, len(buildings)
+
+
+def time_parallel(blocks, count, workers):
+    """
+    Time per-block generation on a number of worker processes
+    Returns:
+        tuple: (seconds, buildings placed)
+    """
+    start = time.perf_counter()
+    records = generate_building_array(blocks, count, seed=0, workers=workers)
+    return time.perf_counter() - start, len(records)
+
+
+def worker_counts():
+    """Worker counts to time: powers of two up to the CPU count"""
+    counts = [1]
+    while counts[-1] * 2 <= (os.cpu_count() or 1):
+        counts.append(counts[-1] * 2)
+    return counts
+
+
+def run(counts=(1000, 10000, 100000), max_linear=10000):
+    """Print generation times at each building count"""
+    workers = worker_counts()
+    print(f"{'buildings':>10} {'placed':>8} {'grid s':>10} {'linear s':>10}" +
+          "".join(f"{f'{w} proc s':>10}" for w in workers))
+    for count in counts:
+        blocks = city_blocks_for(count)
+        grid_s, placed = time_placement(blocks, count, use_index=True)
+
+        # The O(n^2) scan is only timed at sizes that finish in reasonable time
+        linear = "-"
+        if count <= max_linear:
+            linear = f"{time_placement(blocks, count, use_index=False)[0]:.3f}"
+
+        parallel = "".join(f"{time_parallel(blocks, count, w)[0]:>10.3f}" for w in workers)
+        print(f"{count:>10} {placed:>8} {grid_s:>10.3f} {linear:>10}{parallel}")
+
+
+if __name__ == "__main__":
+    counts = [int(arg) for arg in sys.argv[1:]] or (1000, 10000, 100000)
+    run(counts)
@@ -0,0 +1,36 @@
+"""
+Benchmark: frame governor
+Renders a large city at full resolution with no budget and then with frame
+time budgets, reporting mean and 90th percentile frame times and the quality
+level the governor settled on
+Usage: python -m benchmarks.bench_governor [budget ms...]
+"""
+import sys
+
+import numpy as np
+
+from main import CitySimulation
+
+
+def run(budgets=(20.0, 12.0)):
+    """Print frame times without a budget and with each budget"""
+    simulation = CitySimulation(width=1280, height=960, num_buildings=16000, num_trees=4000,
+                                num_cars=400, grid_size=24, seed=0, headless=True)
+    print(f"{'budget ms':>10} {'mean ms':>8} {'p90 ms':>7} {'level':>6} {'resolution':>11} {'changes':>8}")
+    for budget in (0.0,) + tuple(budgets):
+        simulation.set_frame_budget(budget)
+
+        # Let the governor find its level, then time the settled frames
+        simulation.run_benchmark(frames=200, warmup=0)
+        changes = len(simulation.governor.log)
+        times = simulation.run_benchmark(frames=200, warmup=0)
+        changes = len(simulation.governor.log) - changes
+
+        summary = simulation.governor.summary()
+        label = f"{budget:.1f}" if budget else 'off'
+        print(f"{label:>10} {np.mean(times):>8.2f} {np.percentile(times, 90):>7.2f} "
+              f"{summary['level']:>6} {summary['render_scale']:>11.0%} {changes:>8}")
+
+
+if __name__ == "__main__":
+    run(tuple(float(arg) for arg in sys.argv[1:]) or (20.0, 12.0))
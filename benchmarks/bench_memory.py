@@ -0,0 +1,85 @@
+"""
+Benchmark: memory per scene object
+Measures with tracemalloc how many bytes each building, tree and car costs
+as Python objects and as the record arrays the simulation keeps them in
+Usage: python -m benchmarks.bench_memory [counts...]
+"""
+import gc
+import sys
+import tracemalloc
+
+import numpy as np
+
+from objects.car import CAR_COLORS, Car, CarFleet
+from objects.palette import quantize_channel
+from utils.helpers import (
+    BUILDING_DTYPE, TREE_DTYPE, RecordList, buildings_from_array, tree_from_columns,
+)
+
+
+def traced(build):
+    """
+    Memory held by the result of a callable
+    Returns:
+        tuple: (bytes still allocated when it returns, result)
+    """
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return held, result
+
+
+def building_records(count, rng):
+    """Buildings with generated-looking values (no placement needed to measure them)"""
+    records = np.zeros(count, dtype=BUILDING_DTYPE)
+    records['x'] = rng.uniform(-1000, 1000, count)
+    records['z'] = rng.uniform(-1000, 1000, count)
+    records['width'] = rng.uniform(2, 5, count)
+    records['height'] = rng.uniform(5, 20, count)
+    records['depth'] = rng.uniform(2, 5, count)
+    records['color'] = quantize_channel(rng.uniform(0.5, 0.8, count))[:, None]
+    return records
+
+
+def tree_records(count, rng):
+    """Road-side trees on a 4 unit lattice"""
+    records = np.zeros(count, dtype=TREE_DTYPE)
+    records['x'] = rng.integers(-250, 250, count) * 4.0
+    records['z'] = rng.integers(-250, 250, count) * 4.0
+    records['species'] = rng.integers(0, 2, count)
+    return records
+
+
+def car_fleet(count, rng):
+    """Fleet with a palette color per car"""
+    fleet = CarFleet(count)
+    fleet.color[:] = np.array(CAR_COLORS)[rng.integers(0, len(CAR_COLORS), count)]
+    return fleet
+
+
+def run(counts=(10_000, 100_000, 1_000_000)):
+    """Print bytes per object for each kind and count"""
+    print(f"{'count':>10} {'kind':>10} {'records B':>10} {'objects B':>10}")
+    for count in counts:
+        rng = np.random.default_rng(0)
+        records, buildings = traced(lambda: building_records(count, rng))
+        objects, buildings = traced(lambda: buildings_from_array(buildings))
+        print(f"{count:>10} {'buildings':>10} {records / count:>10.1f} {objects / count:>10.1f}")
+        del buildings
+
+        records, trees = traced(lambda: tree_records(count, rng))
+        objects, tree_list = traced(lambda: list(RecordList(trees, tree_from_columns)))
+        print(f"{count:>10} {'trees':>10} {records / count:>10.1f} {objects / count:>10.1f}")
+        del trees, tree_list
+
+        records, fleet = traced(lambda: car_fleet(count, rng))
+        objects, cars = traced(lambda: [Car(fleet=fleet, index=i) for i in range(count)])
+        print(f"{count:>10} {'cars':>10} {records / count:>10.1f} {objects / count:>10.1f}")
+        del fleet, cars
+
+
+if __name__ == "__main__":
+    counts = [int(arg) for arg in sys.argv[1:]] or (10_000, 100_000, 1_000_000)
+    run(counts)
@@ -0,0 +1,72 @@
+"""
+Benchmark: software occlusion culling at street level
+Renders the simulation from street-level cameras with and without the
+occlusion culler, reporting frame times, occluded counts and how many pixels
+differ between the two images (0 = no popping)
+Usage: python -m benchmarks.bench_occlusion [buildings...]
+"""
+import sys
+
+import numpy as np
+from OpenGL.GL import *
+
+from benchmarks.common import time_frames
+from main import CitySimulation
+
+# Street-level views (pitch, zoom, target x) plus the preset views, which
+# look up from below the ground
+VIEWS = (
+    ('street +5', 5.0, 25.0, 0.0),
+    ('street +5 shifted', 5.0, 25.0, 37.5),
+    ('street +2 close', 2.0, 12.0, 20.0),
+    ('street preset', -5.0, 25.0, 0.0),
+    ('45 above', 30.0, 100.0, 0.0),
+)
+
+
+def read_pixels(simulation):
+    """Framebuffer of the last rendered frame as an (H, W, 3) array"""
+    width, height = simulation.renderer.width, simulation.renderer.height
+    pixels = glReadPixels(0, 0, width, height, GL_RGB, GL_UNSIGNED_BYTE)
+    return np.frombuffer(pixels, dtype=np.uint8).reshape(height, width, 3).astype(np.int16)
+
+
+def run(counts=(2000, 8000)):
+    """Print frame times and occlusion results for each view and city size"""
+    print(f"{'buildings':>10} {'view':>18} {'off ms':>8} {'on ms':>8} {'occluded b/t/c':>16} "
+          f"{'diff px':>8}")
+    for count in counts:
+        grid = max(3, int((count / 30) ** 0.5))
+        simulation = CitySimulation(num_buildings=count, num_trees=count, num_cars=count // 4,
+                                    grid_size=grid, seed=0, headless=True)
+        simulation.animation_running = False
+        camera = simulation.camera
+        for name, pitch, zoom, target_x in VIEWS:
+            camera.yaw, camera.pitch, camera.zoom = 0.0, pitch, zoom
+            camera.target[:] = (target_x, 0.0, 0.0)
+
+            times = {}
+            for enabled in (False, True):
+                simulation.occlusion_enabled = enabled
+                times[enabled] = float(np.mean(time_frames(simulation.render, frames=10)))
+
+            # Same frame with and without occlusion culling (the culled
+            # objects must not have contributed any pixel)
+            simulation.render()
+            stats = simulation.culling_stats.as_dict().get('occluded', {})
+            culled = read_pixels(simulation)
+            simulation.occlusion_enabled = False
+            simulation.render()
+            reference = read_pixels(simulation)
+            diff = int((np.abs(culled - reference).sum(axis=2) > 0).sum())
+
+            occluded = '/'.join(str(stats.get(category, {}).get('occluded', 0))
+                                for category in ('buildings', 'trees', 'cars'))
+            print(f"{count:>10} {name:>18} {times[False]:>8.2f} {times[True]:>8.2f} "
+                  f"{occluded:>16} {diff:>8}")
+        simulation.scene.release()
+
+
+if __name__ == "__main__":
+    counts = [int(arg) for arg in sys.argv[1:]] or (2000, 8000)
+    run(counts)
@@ -0,0 +1,94 @@
+"""
+Benchmark: fixed-function rendering vs the GLSL 3.30 shader pipeline
+Draws roads, buildings, trees and cars of a whole city (no culling) with both
+paths and reports frame times and GL draw calls per frame
+Usage: python -m benchmarks.bench_pipeline [buildings...]
+"""
+import random
+import sys
+
+import numpy as np
+from OpenGL.GL import *
+
+from benchmarks.common import create_gl_context, time_frames
+from engine.mesh import InstanceBuffer, StaticMesh
+from engine.pipeline import create_pipeline
+from engine.profiler import draw_counters
+from engine.tree_renderer import TreeRenderer
+from engine.scene import bake_scene
+from objects.car import car_model_vertices
+from objects.road import Road
+from utils.helpers import create_car_fleet, generate_random_city
+
+
+def draw_calls(draw):
+    """Count the GL draw calls of one frame"""
+    before = draw_counters.calls
+    draw()
+    return draw_counters.calls - before
+
+
+def run(counts=(500, 2000, 8000)):
+    """Print frame times and draw calls for both paths at each city size"""
+    renderer, camera, lighting = create_gl_context()
+    pipeline = create_pipeline()
+    if pipeline is None:
+        return
+    print(f"GL: {glGetString(GL_RENDERER).decode()}, GLSL {glGetString(GL_SHADING_LANGUAGE_VERSION).decode()}")
+
+    print(f"{'buildings':>10} {'trees':>7} {'cars':>6} {'fixed ms':>10} {'calls':>7} "
+          f"{'shader ms':>10} {'calls':>7}")
+    for count in counts:
+        random.seed(0)
+        grid = max(3, int((count / 20) ** 0.5))
+        road = Road(num_horizontal=grid, num_vertical=grid)
+        buildings, trees = generate_random_city(num_buildings=count, num_trees=count // 2,
+                                                road=road, lazy=True)
+        cars = create_car_fleet(count // 4, road)
+        tree_renderer = TreeRenderer()
+        scene = bake_scene(buildings, trees, cars, tree_renderer)
+        tree_renderer.use_instances(scene.tree_instances)
+
+        # Camera above the city, far enough for every detail level to appear
+        camera.pitch, camera.yaw, camera.zoom = 60.0, 30.0, road.road_length * 0.6
+        car_mesh = StaticMesh()
+        car_mesh.usage = GL_STREAM_DRAW
+        car_instances = InstanceBuffer()
+
+        def draw_fixed():
+            renderer.clear_screen()
+            camera.apply_view()
+            lighting.update_position()
+            road.draw()
+            scene.building_mesh.draw(camera=camera)
+            tree_renderer.draw(camera=camera)
+            vertices = cars.build_vertices()
+            car_mesh.set_data(vertices, [(GL_QUADS, 0, len(vertices))])
+            car_mesh.draw()
+
+        def draw_shader():
+            renderer.clear_screen()
+            pipeline.begin(camera.view_matrix(), renderer.projection_matrix(), lighting)
+            road.draw(pipeline)
+            scene.building_mesh.draw(camera=camera, pipeline=pipeline)
+            tree_renderer.draw(camera=camera, pipeline=pipeline)
+            car_instances.update(cars.instances(), compare=False)
+            pipeline.draw_instanced(pipeline.model('car', car_model_vertices()),
+                                    car_instances.buffer, len(cars))
+            pipeline.end()
+
+        results = []
+        for draw in (draw_fixed, draw_shader):
+            times = time_frames(draw, frames=10)
+            results.append((float(np.mean(times)), draw_calls(draw)))
+
+        print(f"{count:>10} {len(trees):>7} {len(cars):>6} {results[0][0]:>10.2f} {results[0][1]:>7} "
+              f"{results[1][0]:>10.2f} {results[1][1]:>7}")
+        scene.release()
+        car_mesh.release()
+        car_instances.release()
+
+
+if __name__ == "__main__":
+    counts = [int(arg) for arg in sys.argv[1:]] or (500, 2000, 8000)
+    run(counts)
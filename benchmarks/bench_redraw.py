@@ -0,0 +1,59 @@
+"""
+Benchmark: render on demand with an idle view
+Runs the interactive main loop on the offscreen backend (events from SDL's
+dummy video driver) with paused cars and a still camera, then a short burst
+of camera moves and animation, and reports the CPU time used with every
+frame drawn and with render on demand
+Usage: python -m benchmarks.bench_redraw [seconds idle]
+"""
+import os
+import sys
+import threading
+import time
+
+# Events from SDL's dummy video driver (the offscreen GL backend is set by
+# the benchmarks package)
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame
+
+from main import CitySimulation
+
+
+def session(simulation, idle):
+    """Post GUI commands like a dashboard user: wait, nudge the view, play
+    the animation briefly, wait again, quit (runs on its own thread)"""
+    commands = simulation.commands
+    time.sleep(idle)
+    commands.post(simulation.camera.rotate, 10.0, 0.0)
+    commands.post(setattr, simulation, 'animation_running', True)
+    time.sleep(0.5)
+    commands.post(setattr, simulation, 'animation_running', False)
+    time.sleep(idle)
+    pygame.event.post(pygame.event.Event(pygame.QUIT))
+
+
+def run(idle=2.0):
+    """Print CPU time and frames drawn for continuous and on-demand rendering"""
+    print(f"{'mode':>12} {'wall s':>7} {'cpu s':>6} {'drawn':>6} {'skipped':>8} {'est. saved s':>13}")
+    for continuous in (True, False):
+        simulation = CitySimulation(num_buildings=2000, num_trees=2000, num_cars=200, grid_size=8,
+                                    seed=0, headless=True)
+        pygame.display.init()
+        pygame.display.set_mode((1, 1))
+        simulation.animation_running = False
+        simulation.redraw.enabled = not continuous
+
+        threading.Thread(target=session, args=(simulation, idle), daemon=True).start()
+        cpu, wall = time.process_time(), time.perf_counter()
+        simulation.run()
+        cpu, wall = time.process_time() - cpu, time.perf_counter() - wall
+
+        summary = simulation.redraw.summary(simulation.fps)
+        mode = 'continuous' if continuous else 'on demand'
+        print(f"{mode:>12} {wall:>7.2f} {cpu:>6.2f} {summary['rendered']:>6} {summary['skipped']:>8} "
+              f"{summary['cpu_saved_s']:>13.2f}")
+
+
+if __name__ == "__main__":
+    run(float(sys.argv[1]) if len(sys.argv) > 1 else 2.0)
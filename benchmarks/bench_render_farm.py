@@ -0,0 +1,50 @@
+"""
+Benchmark: multi-process render farm
+Renders one camera path with increasing worker counts, reporting throughput
+and checking that every run writes the same bytes
+Usage: python -m benchmarks.bench_render_farm [max workers]
+"""
+import hashlib
+import os
+import sys
+import tempfile
+from functools import partial
+
+from engine.render_farm import CameraPath, render_path
+from main import CitySimulation
+
+# Orbit from above down to street level and across the city
+KEYFRAMES = [
+    {'frame': 0, 'yaw': 0.0, 'pitch': 40.0, 'zoom': 150.0, 'target': [0.0, 0.0, 0.0]},
+    {'frame': 60, 'yaw': 120.0, 'pitch': 15.0, 'zoom': 70.0, 'target': [40.0, 0.0, -20.0]},
+    {'frame': 119, 'yaw': 240.0, 'pitch': 5.0, 'zoom': 25.0, 'target': [-40.0, 0.0, 40.0]},
+]
+
+
+def run(max_workers=None):
+    """Print frames per second for 1..max_workers worker processes"""
+    max_workers = max_workers or os.cpu_count()
+    path = CameraPath(KEYFRAMES)
+    factory = partial(CitySimulation, num_buildings=4000, num_trees=4000, num_cars=1000,
+                      grid_size=12, seed=0, headless=True, workers=1)
+    print(f"{path.frame_count} frames at 800x600")
+    print(f"{'workers':>8} {'seconds':>8} {'frames/s':>9} {'speedup':>8}  output")
+    reference = None
+    with tempfile.TemporaryDirectory() as directory:
+        workers = 1
+        while workers <= max_workers:
+            output = os.path.join(directory, f"farm-{workers}.rgba")
+            result = render_path(factory, path, output, 800, 600, workers=workers)
+            with open(output, 'rb') as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+            if reference is None:
+                reference = (result['fps'], digest)
+            identical = 'identical' if digest == reference[1] else 'DIFFERENT'
+            print(f"{workers:>8} {result['seconds']:>8.2f} {result['fps']:>9.1f} "
+                  f"{result['fps'] / reference[0]:>8.2f}  {identical}")
+            os.remove(output)
+            workers *= 2
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else None)
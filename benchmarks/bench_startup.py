@@ -0,0 +1,57 @@
+"""
+Benchmark: launch latency
+Starts a fresh interpreter per run (so imports are timed too) and reports
+when the first frame and the first frame showing the city were rendered,
+for a blocking start and a progressive one (city built in the background)
+Usage: python -m benchmarks.bench_startup [buildings...]
+"""
+import json
+import subprocess
+import sys
+
+# Run in the child process: render at the interactive frame rate cap until
+# the city is on screen
+CHILD = """
+import json, sys
+from main import CitySimulation, launch_timer
+count, progressive = int(sys.argv[1]), sys.argv[2] == 'progressive'
+simulation = CitySimulation(num_buildings=count, num_trees=count, num_cars=count // 40,
+                            grid_size=max(3, int((count / 30) ** 0.5)), seed=0, headless=True,
+                            workers=1, progressive=progressive, startup=launch_timer())
+while not simulation.startup.finished:
+    simulation.run_benchmark(frames=1, warmup=0)
+    simulation.clock.tick(simulation.fps)
+print(json.dumps(simulation.startup.report()))
+"""
+
+
+def launch(count, mode):
+    """
+    Time one launch in a new interpreter
+    Args:
+        count: Buildings (and trees) in the city
+        mode: 'blocking' or 'progressive'
+    Returns:
+        dict: StartupTimer.report() of the launch
+    """
+    result = subprocess.run([sys.executable, '-c', CHILD, str(count), mode],
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def run(counts=(500, 4000, 16000)):
+    """Print launch phases and milestones for each city size and start mode"""
+    print(f"{'buildings':>10} {'mode':>12} {'imports':>8} {'context':>8} {'generate':>9} "
+          f"{'upload':>7} {'first ms':>9} {'city ms':>8}")
+    for count in counts:
+        for mode in ('blocking', 'progressive'):
+            report = launch(count, mode)
+            phases, marks = report['phases'], report['marks']
+            print(f"{count:>10} {mode:>12} {phases['imports']:>8.1f} {phases['context']:>8.1f} "
+                  f"{phases['generation']:>9.1f} {phases['mesh upload']:>7.1f} "
+                  f"{marks['first frame']:>9.1f} {marks['city on screen']:>8.1f}")
+
+
+if __name__ == "__main__":
+    counts = [int(arg) for arg in sys.argv[1:]] or (500, 4000, 16000)
+    run(counts)
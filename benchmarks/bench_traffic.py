@@ -0,0 +1,82 @@
+"""
+Benchmark: routed traffic on the road graph
+Times fleet steps with route lookups (with and without car following),
+building the routes to every destination per grid size (all-pairs on small
+grids, one Dijkstra per destination on larger ones) and incremental route
+invalidation after closing roads
+Usage: python -m benchmarks.bench_traffic [counts...]
+"""
+import random
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.bench_fleet import time_step
+from objects.road import Road
+from objects.traffic import IntelligentDriverModel, RoadGraph, RouteCache
+from utils.helpers import create_car_fleet
+
+
+def grid_road(size):
+    """Road grid with size roads in each direction"""
+    return Road(num_horizontal=size, num_vertical=size)
+
+
+def run_fleet(counts, grid=10, speed_multiplier=20.0):
+    """Print step times of routed fleets (fast cars turn often)"""
+    print(f"Routed fleet on a {grid}x{grid} grid (speed x{speed_multiplier:g}):")
+    print(f"{'cars':>10} {'step ms':>10} {'turns/step':>12} {'route refreshes':>16} "
+          f"{'following ms':>13}")
+    for count in counts:
+        random.seed(0)
+        fleet = create_car_fleet(count, grid_road(grid), routed=True)
+        routes = fleet.router.routes
+
+        # Warm up so turns are spread over the steps
+        for _ in range(50):
+            fleet.update(speed_multiplier)
+        turns = []
+        def step():
+            edges = fleet.edge.copy()
+            fleet.update(speed_multiplier)
+            turns.append(int((fleet.edge != edges).sum()))
+        step_ms = time_step(step)
+        refreshed = routes.refreshed
+
+        # Same fleet with car following (lane sort, stop lines, entry checks)
+        fleet.driver_model = IntelligentDriverModel()
+        fleet.update(speed_multiplier)
+        following_ms = time_step(lambda: fleet.update(speed_multiplier))
+        print(f"{count:>10} {step_ms:>10.3f} {np.mean(turns):>12.0f} {refreshed:>16} "
+              f"{following_ms:>13.3f}")
+
+
+def run_routes(sizes=(3, 5, 10, 20, 30), closures=20):
+    """Print the time to route to every destination and the cost of closing
+    edges one by one"""
+    print(f"\n{'grid':>6} {'nodes':>6} {'all routes ms':>14} {'full rebuilds':>14} "
+          f"{'close+refresh ms':>17} {'invalidated/close':>18}")
+    rng = np.random.default_rng(0)
+    for size in sizes:
+        graph = RoadGraph(grid_road(size))
+        routes = RouteCache(graph)
+        nodes = np.arange(graph.num_nodes)
+        start = time.perf_counter()
+        routes.next_edges(nodes, nodes[::-1])
+        build_ms = (time.perf_counter() - start) * 1000.0
+
+        # Close random edges, then look up a route to every destination
+        start = time.perf_counter()
+        for edge in rng.choice(graph.num_edges, closures, replace=False):
+            routes.set_edge_open(edge, False)
+            routes.next_edges(nodes, nodes[::-1])
+        close_ms = (time.perf_counter() - start) * 1000.0 / closures
+        print(f"{size:>6} {graph.num_nodes:>6} {build_ms:>14.2f} {routes.full_rebuilds:>14} "
+              f"{close_ms:>17.3f} {routes.invalidated / closures:>18.1f}")
+
+
+if __name__ == "__main__":
+    counts = [int(arg) for arg in sys.argv[1:]] or (10000, 100000, 1000000)
+    run_fleet(counts)
+    run_routes()
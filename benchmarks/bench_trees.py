@@ -0,0 +1,66 @@
+"""
+Benchmark: road-side tree planting and tree storage
+Times the original per-tree loops against the vectorized planting routine
+and compares the memory of Tree object lists with the record array
+Usage: python -m benchmarks.bench_trees [grid sizes...]
+"""
+import sys
+import time
+import tracemalloc
+
+from objects.road import Road
+from objects.tree import Tree
+from utils.helpers import plant_road_trees
+
+
+def loop_planting(road):
+    """The original nested loops: one exclusion check per road, one Tree per tree"""
+    trees = []
+    offset = road.road_width / 2 + 2.0
+    exclusion = road.road_width / 2 + 2.0
+    for road_z in road.horizontal_positions:
+        for i in range(int(road.road_length / 4.0)):
+            x = -road.road_length / 2 + i * 4.0
+            if all(abs(x - road_x) >= exclusion for road_x in road.vertical_positions):
+                trees.append(Tree(x, road_z + offset))
+                trees.append(Tree(x, road_z - offset))
+    for road_x in road.vertical_positions:
+        for i in range(int(road.road_length / 4.0)):
+            z = -road.road_length / 2 + i * 4.0
+            if all(abs(z - road_z) >= exclusion for road_z in road.horizontal_positions):
+                trees.append(Tree(road_x + offset, z))
+                trees.append(Tree(road_x - offset, z))
+    return trees
+
+
+def measure(function, road):
+    """
+    Time a planting function and the memory its result holds
+    Returns:
+        tuple: (seconds, bytes still allocated, result)
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function(road)
+    seconds = time.perf_counter() - start
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return seconds, held, result
+
+
+def run(grids=(10, 40, 100)):
+    """Print planting time and memory per grid size"""
+    print(f"{'grid':>6} {'trees':>9} {'loop s':>8} {'numpy s':>8} {'speedup':>8} "
+          f"{'objects MB':>11} {'array MB':>9}")
+    for grid in grids:
+        road = Road(num_horizontal=grid, num_vertical=grid)
+        loop_seconds, loop_bytes, objects = measure(loop_planting, road)
+        del objects
+        numpy_seconds, numpy_bytes, trees = measure(plant_road_trees, road)
+        print(f"{grid:>6} {len(trees):>9} {loop_seconds:>8.3f} {numpy_seconds:>8.4f} "
+              f"{loop_seconds / numpy_seconds:>8.0f} {loop_bytes / 1e6:>11.1f} {numpy_bytes / 1e6:>9.2f}")
+
+
+if __name__ == "__main__":
+    grids = [int(arg) for arg in sys.argv[1:]] or (10, 40, 100)
+    run(grids)
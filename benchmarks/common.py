@@ -0,0 +1,62 @@
+"""
+Shared helpers for the benchmark scripts
+Creates a GL context and times frames
+
+Benchmarks run on the offscreen EGL backend by default (set by the package
+__init__); pick another platform before running, e.g. a hidden window:
+    PYOPENGL_PLATFORM=glx python -m benchmarks.bench_buildings
+"""
+import os
+import time
+
+from OpenGL.GL import *
+
+from engine.offscreen import OFFSCREEN_BACKENDS
+from engine.renderer import Renderer
+from engine.camera import Camera
+from engine.lighting import Lighting
+
+
+def create_gl_context(width=800, height=600):
+    """
+    Create a GL context with the same GL state as CitySimulation
+    (offscreen when PYOPENGL_PLATFORM selects EGL/OSMesa, else a hidden window)
+    Args:
+        width, height: Framebuffer size
+    Returns:
+        tuple: (renderer, camera, lighting)
+    """
+    renderer = Renderer(width, height)
+    backend = os.environ.get('PYOPENGL_PLATFORM')
+    if backend in OFFSCREEN_BACKENDS:
+        renderer.init_offscreen(backend)
+    else:
+        renderer.init_pygame(hidden=True)
+
+    lighting = Lighting()
+    lighting.setup()
+
+    return renderer, Camera(), lighting
+
+
+def time_frames(draw, frames=20, warmup=2):
+    """
+    Time a draw callback, waiting for the GPU after each frame
+    Args:
+        draw: Callable that renders one frame
+        frames: Number of timed frames
+        warmup: Untimed frames run first (buffer uploads, shader compiles)
+    Returns:
+        list: Frame times in milliseconds
+    """
+    for _ in range(warmup):
+        draw()
+        glFinish()
+
+    times = []
+    for _ in range(frames):
+        start = time.perf_counter()
+        draw()
+        glFinish()
+        times.append((time.perf_counter() - start) * 1000.0)
+    return times
@@ -4,7 +4,6 @@ Handles camera position, rotation and view transformations
 """
 import numpy as np
 from OpenGL.GL import *
-from OpenGL.GLU import *
 
 
 class Camera:
@@ -22,24 +21,23 @@ class Camera:
         self.min_zoom = 10.0
         self.max_zoom = 250.0  # Increased to see the larger city
         
-        # Look at target
-        self.target = np.array([0.0, 0.0, 0.0], dtype=np.float32)
+        # Look at target (double precision so the view stays exact far from the origin)
+        self.target = np.array([0.0, 0.0, 0.0], dtype=np.float64)
         
-    def apply_view(self):
-        """Apply camera transformations to OpenGL"""
-        glLoadIdentity()
+        # Incremented whenever the view changes (render on demand redraws
+        # when it differs from the last drawn frame's)
+        self.revision = 0
         
-        # Calculate camera position based on angles and zoom
-        x = self.target[0] + self.zoom * np.cos(np.radians(self.pitch)) * np.sin(np.radians(self.yaw))
-        y = self.target[1] + self.zoom * np.sin(np.radians(self.pitch))
-        z = self.target[2] + self.zoom * np.cos(np.radians(self.pitch)) * np.cos(np.radians(self.yaw))
-        
-        # Set up the camera view
-        gluLookAt(
-            x, y, z,  # Camera position
-            self.target[0], self.target[1], self.target[2],  # Look at point
-            0.0, 1.0, 0.0  # Up vector
-        )
+    def apply_view(self, origin=None):
+        """
+        Apply camera transformations to OpenGL
+        Args:
+            origin: World point placed at the GL origin (world origin if None);
+                    geometry must then be translated by -origin when drawn
+        """
+        # Same matrix gluLookAt builds (GL reads it column-major, hence the
+        # transpose), without loading GLU at startup
+        glLoadMatrixd(np.ascontiguousarray(self.view_matrix(origin).T))
     
     def rotate(self, delta_yaw, delta_pitch):
         """
@@ -48,11 +46,13 @@ class Camera:
             delta_yaw: Change in yaw (left/right rotation)
             delta_pitch: Change in pitch (up/down rotation)
         """
-        self.yaw += delta_yaw
-        self.pitch += delta_pitch
-        
         # Clamp pitch to prevent flipping
-        self.pitch = max(-89.0, min(89.0, self.pitch))
+        pitch = max(-89.0, min(89.0, self.pitch + delta_pitch))
+        if delta_yaw == 0.0 and pitch == self.pitch:
+            return
+        self.yaw += delta_yaw
+        self.pitch = pitch
+        self.revision += 1
         
     def zoom_camera(self, delta):
         """
@@ -60,8 +60,10 @@ class Camera:
         Args:
             delta: Amount to zoom (positive = zoom out, negative = zoom in)
         """
-        self.zoom += delta
-        self.zoom = max(self.min_zoom, min(self.max_zoom, self.zoom))
+        zoom = max(self.min_zoom, min(self.max_zoom, self.zoom + delta))
+        if zoom != self.zoom:
+            self.zoom = zoom
+            self.revision += 1
     
     def set_preset_view(self, view_type):
         """
@@ -84,6 +86,7 @@ class Camera:
             self.yaw = 45.0
             self.pitch = -30.0
             self.zoom = 100.0
+        self.revision += 1
     
     def move_target(self, dx, dz):
         """
@@ -92,8 +95,11 @@ class Camera:
             dx: Movement in X direction
             dz: Movement in Z direction
         """
+        if dx == 0.0 and dz == 0.0:
+            return
         self.target[0] += dx
         self.target[2] += dz
+        self.revision += 1
     
     def get_camera_position(self):
         """
@@ -105,3 +111,30 @@ class Camera:
         y = self.target[1] + self.zoom * np.sin(np.radians(self.pitch))
         z = self.target[2] + self.zoom * np.cos(np.radians(self.pitch)) * np.cos(np.radians(self.yaw))
         return (x, y, z)
+    
+    def view_matrix(self, origin=None):
+        """
+        Get the view matrix set by apply_view (same as gluLookAt would build)
+        Args:
+            origin: World point placed at the origin (see apply_view)
+        Returns:
+            np.ndarray: 4x4 matrix for column vectors (eye = V @ world)
+        """
+        eye = np.array(self.get_camera_position(), dtype=np.float64)
+        target = self.target.astype(np.float64)
+        if origin is not None:
+            eye -= origin
+            target = target - origin
+        
+        forward = target - eye
+        forward /= np.linalg.norm(forward)
+        side = np.cross(forward, [0.0, 1.0, 0.0])
+        side /= np.linalg.norm(side)
+        up = np.cross(side, forward)
+        
+        view = np.identity(4)
+        view[0, :3] = side
+        view[1, :3] = up
+        view[2, :3] = -forward
+        view[:3, 3] = -view[:3, :3] @ eye
+        return view
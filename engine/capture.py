@@ -0,0 +1,312 @@
+"""
+Frame capture for 3D city simulation
+Reads rendered frames back through a ring of pixel buffer objects (the GPU
+copies a frame while later frames render) and hands them to a thread pool
+that encodes and writes them: a PNG sequence, raw RGBA frames or video
+through a local encoder process
+"""
+import ctypes
+import os
+import queue
+import shutil
+import struct
+import subprocess
+import threading
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from OpenGL.GL import *
+
+from utils.timing import summarize_times
+
+
+# Capture formats by output path extension (anything else is a PNG directory)
+VIDEO_EXTENSIONS = ('.mp4', '.mkv', '.mov', '.webm')
+RAW_EXTENSIONS = ('.rgba', '.raw')
+
+# Encoder command for video output; {width}, {height}, {fps} and {path} are
+# filled in, frames arrive as bottom-up RGBA on stdin
+VIDEO_ENCODER = (
+    'ffmpeg', '-loglevel', 'error', '-y', '-f', 'rawvideo', '-pix_fmt', 'rgba',
+    '-s', '{width}x{height}', '-r', '{fps}', '-i', '-', '-vf', 'vflip',
+    '-pix_fmt', 'yuv420p', '{path}',
+)
+
+
+def capture_format(path):
+    """
+    Pick the capture format from an output path
+    Args:
+        path: Output file or directory
+    Returns:
+        str: 'video', 'raw' or 'png'
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension in VIDEO_EXTENSIONS:
+        return 'video'
+    if extension in RAW_EXTENSIONS:
+        return 'raw'
+    return 'png'
+
+
+def encode_png(frame, level=1):
+    """
+    Encode a frame as an RGB PNG
+    Args:
+        frame: (height, width, 4) uint8 RGBA rows, bottom row first (as read
+               from GL); alpha is dropped
+        level: zlib compression level (1 favours speed)
+    Returns:
+        bytes: PNG file contents
+    """
+    height, width = frame.shape[:2]
+
+    # Top row first, each row prefixed with filter type 0 (none)
+    rows = np.empty((height, width * 3 + 1), dtype=np.uint8)
+    rows[:, 0] = 0
+    rows[:, 1:] = frame[::-1, :, :3].reshape(height, width * 3)
+
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) +
+            chunk(b'IDAT', zlib.compress(rows.tobytes(), level)) + chunk(b'IEND', b''))
+
+
+class FrameWriter:
+    def __init__(self, path, width, height, fmt=None, workers=2, max_pending=8, fps=60,
+                 encoder=VIDEO_ENCODER):
+        """
+        Encode and write frames on background threads
+        Args:
+            path: PNG directory, raw frame file or video file
+            width, height: Frame size
+            fmt: 'png', 'raw' or 'video' (from the path if None)
+            workers: Encoding threads for PNG (raw and video frames are
+                     written in order by one thread)
+            max_pending: Frames waiting or being written at most; acquire()
+                         blocks while all of them are in use
+            fps: Frame rate passed to the video encoder
+            encoder: Video encoder command (see VIDEO_ENCODER)
+        """
+        self.path = path
+        self.width = width
+        self.height = height
+        self.format = fmt or capture_format(path)
+        self.process = None
+        self.stream = None
+
+        if self.format == 'png':
+            os.makedirs(path, exist_ok=True)
+        elif self.format == 'raw':
+            self.stream = open(path, 'wb')
+        else:
+            if shutil.which(encoder[0]) is None:
+                raise RuntimeError(f"video encoder '{encoder[0]}' not found "
+                                   "(capture to a directory for PNG frames instead)")
+            command = [part.format(width=width, height=height, fps=fps, path=path) for part in encoder]
+            self.process = subprocess.Popen(command, stdin=subprocess.PIPE)
+            self.stream = self.process.stdin
+
+        # Frame buffers cycle between the capture and the writer threads;
+        # their number bounds the memory and the queue of pending frames
+        self.free = queue.Queue()
+        for _ in range(max_pending):
+            self.free.put(np.empty((height, width, 4), dtype=np.uint8))
+        self.executor = ThreadPoolExecutor(max_workers=workers if self.format == 'png' else 1,
+                                           thread_name_prefix='frame-writer')
+
+        self.frames_written = 0
+        self.bytes_written = 0
+        self.wait_time = 0.0
+        self.error = None
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Get a free frame buffer (blocks while the writers are behind)
+        Returns:
+            np.ndarray: (height, width, 4) uint8 buffer to fill
+        """
+        try:
+            return self.free.get_nowait()
+        except queue.Empty:
+            start = time.perf_counter()
+            frame = self.free.get()
+            self.wait_time += time.perf_counter() - start
+            return frame
+
+    def submit(self, number, frame, source=None, copied=None):
+        """
+        Queue a buffer for writing (it returns to the pool afterwards)
+        Args:
+            number: Frame number (names the PNG file)
+            frame: Buffer from acquire()
+            source: Address to copy the frame from first (a mapped pixel
+                    buffer), or None if frame is already filled
+            copied: threading.Event set once source has been read
+        """
+        self.executor.submit(self.write, number, frame, source, copied)
+
+    def write(self, number, frame, source=None, copied=None):
+        """Copy, encode and write one frame (on a writer thread)"""
+        try:
+            if source is not None:
+                ctypes.memmove(frame.ctypes.data, source, frame.nbytes)
+            if copied is not None:
+                copied.set()
+            if self.error is None:
+                if self.format == 'png':
+                    data = encode_png(frame)
+                    with open(os.path.join(self.path, f"frame_{number:06d}.png"), 'wb') as f:
+                        f.write(data)
+                    size = len(data)
+                else:
+                    self.stream.write(frame.data)
+                    size = frame.nbytes
+                with self.lock:
+                    self.frames_written += 1
+                    self.bytes_written += size
+        except Exception as e:
+            self.error = e
+        finally:
+            if copied is not None:
+                copied.set()
+            self.free.put(frame)
+
+    def close(self):
+        """Finish writing every queued frame and close the output"""
+        self.executor.shutdown(wait=True)
+        if self.stream is not None:
+            self.stream.close()
+        if self.process is not None:
+            self.process.wait()
+        if self.error is not None:
+            print(f"Frame capture failed: {self.error}")
+
+
+class FrameCapture:
+    def __init__(self, writer, delay=2, buffers=4):
+        """
+        Read frames back without stalling the render loop
+        Args:
+            writer: FrameWriter receiving the frames
+            delay: Frames between issuing a read and mapping its buffer, so
+                   the GPU has finished the copy by then
+            buffers: Pixel buffer objects in the ring (reads in flight plus
+                     mapped buffers the writers are still copying from)
+        """
+        self.writer = writer
+        self.width = writer.width
+        self.height = writer.height
+        self.delay = delay
+        self.buffer_count = max(buffers, delay + 1)
+        self.buffers = None
+        self.free = []
+        self.reading = deque()  # (frame number, buffer) with a read in flight
+        self.mapped = deque()   # (buffer, copied event) being copied by a writer
+        self.frame = 0
+
+        # Render-thread milliseconds spent per captured frame
+        self.times = []
+
+    def init_gl(self):
+        """Create the pixel buffer objects"""
+        size = self.width * self.height * 4
+        self.buffers = list(np.atleast_1d(glGenBuffers(self.buffer_count)))
+        for buffer in self.buffers:
+            glBindBuffer(GL_PIXEL_PACK_BUFFER, buffer)
+            glBufferData(GL_PIXEL_PACK_BUFFER, size, None, GL_STREAM_READ)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        self.free = list(self.buffers)
+
+    def capture(self):
+        """Start reading the current frame back and hand the frames read
+        delay frames ago to the writers (call after rendering, before swapping)"""
+        start = time.perf_counter()
+        if self.buffers is None:
+            self.init_gl()
+        self.release_copied()
+        while self.reading and self.frame - self.reading[0][0] >= self.delay:
+            self.hand_off(*self.reading.popleft())
+
+        # Asynchronous read into the buffer: returns before the copy is done
+        buffer = self.free_buffer()
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, buffer)
+        glPixelStorei(GL_PACK_ALIGNMENT, 4)
+        glReadPixels(0, 0, self.width, self.height, GL_RGBA, GL_UNSIGNED_BYTE, ctypes.c_void_p(0))
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        self.reading.append((self.frame, buffer))
+        self.frame += 1
+        self.times.append((time.perf_counter() - start) * 1000.0)
+
+    def free_buffer(self):
+        """Get a buffer to read into, waiting for the oldest copy if all are busy"""
+        if not self.free:
+            if self.mapped:
+                self.release_copied(wait=True, count=1)
+            else:
+                self.hand_off(*self.reading.popleft())
+                self.release_copied(wait=True, count=1)
+        return self.free.pop()
+
+    def hand_off(self, number, buffer):
+        """Map a finished read and let a writer copy the frame out of it"""
+        frame = self.writer.acquire()
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, buffer)
+        pointer = glMapBufferRange(GL_PIXEL_PACK_BUFFER, 0, frame.nbytes, GL_MAP_READ_BIT)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        copied = threading.Event()
+        self.writer.submit(number, frame, pointer, copied)
+        self.mapped.append((buffer, copied))
+
+    def release_copied(self, wait=False, count=None):
+        """
+        Unmap buffers the writers have copied out of, oldest first
+        Args:
+            wait: Wait for copies still running
+            count: Release at most this many buffers (all if None)
+        """
+        while self.mapped and (count is None or count > 0) and (wait or self.mapped[0][1].is_set()):
+            buffer, copied = self.mapped.popleft()
+            if not copied.is_set():
+                wait_start = time.perf_counter()
+                copied.wait()
+                self.writer.wait_time += time.perf_counter() - wait_start
+            glBindBuffer(GL_PIXEL_PACK_BUFFER, buffer)
+            glUnmapBuffer(GL_PIXEL_PACK_BUFFER)
+            glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+            self.free.append(buffer)
+            if count is not None:
+                count -= 1
+
+    def close(self):
+        """Hand off the reads still in flight, finish writing and free the buffers"""
+        while self.reading:
+            self.hand_off(*self.reading.popleft())
+        self.release_copied(wait=True)
+        self.writer.close()
+        if self.buffers is not None:
+            glDeleteBuffers(len(self.buffers), self.buffers)
+            self.buffers = None
+
+    def summary(self):
+        """
+        Summarize the capture
+        Returns:
+            dict: Frames captured and written, render-thread cost per frame
+                  (mean/p50/p95/p99 ms) and seconds spent waiting for writers
+        """
+        return {
+            'path': self.writer.path,
+            'format': self.writer.format,
+            'frames': self.frame,
+            'written': self.writer.frames_written,
+            'bytes': self.writer.bytes_written,
+            'capture_ms': summarize_times(self.times),
+            'writer_wait_s': self.writer.wait_time,
+        }
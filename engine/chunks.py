@@ -0,0 +1,357 @@
+"""
+Streaming chunked city for 3D city simulation
+Generates road tiles, buildings and trees around the camera target on demand
+and keeps a bounded number of chunks (with their GPU buffers) resident
+"""
+import math
+from collections import OrderedDict
+
+import numpy as np
+from OpenGL.GL import *
+
+from engine.mesh import StaticMesh, VERTEX_FLOATS, build_box_vertices
+from engine.tree_renderer import tessellate_tree, LOW_POLY_SLICES, LOW_POLY_STACKS
+from objects.road import Road
+from objects.tree import TREE_SPECIES, Tree
+from utils.helpers import TREE_CLEARANCE, TREE_SPACING, compute_city_blocks, pick_species
+
+
+# Seed sequences need non-negative entropy, so chunk coordinates are shifted
+CHUNK_COORD_OFFSET = 2 ** 40
+
+# Buildings sit one per lattice cell, so no collision checks are needed
+BUILDING_CELL_SIZE = 7.0
+BUILDING_BUFFER = 1.0
+
+
+def chunk_rng(seed, chunk_x, chunk_z):
+    """
+    Random generator for one chunk, independent of generation order
+    Args:
+        seed: World seed
+        chunk_x, chunk_z: Chunk coordinates
+    Returns:
+        np.random.Generator
+    """
+    return np.random.default_rng([seed, chunk_x + CHUNK_COORD_OFFSET, chunk_z + CHUNK_COORD_OFFSET])
+
+
+def chunk_tree_meshes():
+    """
+    Build the low-poly tree of every species once
+    Returns:
+        np.ndarray: (species, vertices, VERTEX_FLOATS) de-indexed triangles
+                    (every species has the same tessellation)
+    """
+    meshes = []
+    for species in range(len(TREE_SPECIES)):
+        vertices, indices = tessellate_tree(Tree(0.0, 0.0, species), LOW_POLY_SLICES, LOW_POLY_STACKS)
+        meshes.append(vertices[indices])
+    return np.stack(meshes)
+
+
+def chunk_buildings(rng, blocks, density):
+    """
+    Place buildings on a lattice inside the blocks of a chunk
+    Args:
+        rng: Chunk random generator
+        blocks: Blocks as (x_min, z_min, x_max, z_max) tuples in chunk coordinates
+        density: Probability that a lattice cell holds a building
+    Returns:
+        tuple: (centers, half_sizes, colors) as (N, 3) arrays
+    """
+    cell_min, cell_size = [], []
+    for x_min, z_min, x_max, z_max in blocks:
+        nx = max(int((x_max - x_min) // BUILDING_CELL_SIZE), 1)
+        nz = max(int((z_max - z_min) // BUILDING_CELL_SIZE), 1)
+        size = ((x_max - x_min) / nx, (z_max - z_min) / nz)
+        ix, iz = np.meshgrid(np.arange(nx), np.arange(nz), indexing='ij')
+        cell_min.append(np.stack([x_min + ix.ravel() * size[0], z_min + iz.ravel() * size[1]], axis=1))
+        cell_size.append(np.broadcast_to(size, (nx * nz, 2)))
+    cell_min = np.concatenate(cell_min)
+    cell_size = np.concatenate(cell_size)
+    count = len(cell_min)
+
+    # Draw every value for every cell so the layout depends only on the seed
+    occupied = rng.random(count) < density
+    footprint = rng.uniform(2, 5, (count, 2))
+    height = rng.uniform(5, 20, count)
+    gray = rng.uniform(0.5, 0.8, count)
+    jitter = rng.random((count, 2))
+
+    # Footprint plus half the buffer stays inside the cell
+    slack = np.maximum(cell_size - footprint - BUILDING_BUFFER, 0.0)
+    center = cell_min + BUILDING_BUFFER / 2 + footprint / 2 + jitter * slack
+
+    centers = np.stack([center[:, 0], height / 2, center[:, 1]], axis=1)[occupied]
+    half_sizes = np.stack([footprint[:, 0] / 2, height / 2, footprint[:, 1] / 2], axis=1)[occupied]
+    colors = np.repeat(gray[occupied, None], 3, axis=1)
+    return centers, half_sizes, colors
+
+
+def chunk_trees(road, size):
+    """
+    Tree positions along the two roads crossing a chunk (same spacing and
+    clearance as plant_road_trees)
+    Args:
+        road: Road defining the road width
+        size: Chunk side length
+    Returns:
+        np.ndarray: (N, 2) x, z positions in chunk coordinates
+    """
+    # The same distance from the crossing road keeps trees off the intersection
+    offset = road.road_width / 2 + TREE_CLEARANCE
+    along = -size / 2 + TREE_SPACING * np.arange(int(size / TREE_SPACING))
+    along = along[np.abs(along) >= offset]
+    side = np.concatenate([np.full(len(along), offset), np.full(len(along), -offset)])
+    along = np.concatenate([along, along])
+    return np.concatenate([
+        np.stack([along, side], axis=1),   # Along the east-west road
+        np.stack([side, along], axis=1),   # Along the north-south road
+    ])
+
+
+class Chunk:
+    def __init__(self, key, origin, size, mesh, building_count, tree_count, top):
+        """
+        A generated square of the city with its baked mesh
+        Args:
+            key: (chunk_x, chunk_z) coordinates
+            origin: World position of the chunk center (float64)
+            size: Chunk side length
+            mesh: StaticMesh in chunk coordinates
+            building_count, tree_count: Object counts
+            top: Height of the tallest object
+        """
+        self.key = key
+        self.origin = origin
+        self.mesh = mesh
+        self.building_count = building_count
+        self.tree_count = tree_count
+
+        # World bounding box for culling
+        self.center = origin + (0.0, top / 2, 0.0)
+        self.half = np.array([size / 2, top / 2, size / 2])
+
+    def release(self):
+        """Free the GPU buffer (must be called from the GL thread)"""
+        self.mesh.release()
+
+
+def generate_chunk(seed, chunk_x, chunk_z, road, building_density=0.5, tree_meshes=None):
+    """
+    Generate one chunk deterministically from (seed, chunk_x, chunk_z)
+    Args:
+        seed: World seed
+        chunk_x, chunk_z: Chunk coordinates
+        road: Road defining road size, spacing (= chunk size) and colors
+        building_density: Probability that a building lattice cell is used
+        tree_meshes: chunk_tree_meshes() result (built here if None)
+    Returns:
+        Chunk
+    """
+    size = road.grid_spacing
+    rng = chunk_rng(seed, chunk_x, chunk_z)
+
+    # One east-west and one north-south road through the chunk center, so
+    # neighbouring chunks join into a continuous grid
+    surfaces, lines = [], []
+    for x, z, orientation in ((-size / 2, 0.0, 'horizontal'), (0.0, -size / 2, 'vertical')):
+        surface, edges, dashes = road.segment_geometry(x, z, road.road_width, size, orientation)
+        surfaces.append(surface)
+        lines.extend([edges, dashes])
+
+    # Buildings in the four blocks between the roads
+    blocks = compute_city_blocks([0.0], [0.0], road.road_width, size)
+    centers, half_sizes, colors = chunk_buildings(rng, blocks, building_density)
+    boxes = build_box_vertices(centers, half_sizes, colors)
+
+    # Trees baked into the chunk mesh, species drawn by planting share
+    if tree_meshes is None:
+        tree_meshes = chunk_tree_meshes()
+    positions = chunk_trees(road, size)
+    trees = tree_meshes[pick_species(rng, len(positions))]
+    trees[..., 0] += positions[:, 0, None]
+    trees[..., 2] += positions[:, 1, None]
+    trees = trees.reshape(-1, VERTEX_FLOATS)
+
+    quads = np.concatenate(surfaces + [boxes])
+    lines = np.concatenate(lines)
+    mesh = StaticMesh()
+    mesh.line_width = 3.0
+    mesh.set_data(np.concatenate([quads, trees, lines]), [
+        (GL_QUADS, 0, len(quads)),
+        (GL_TRIANGLES, len(quads), len(trees)),
+        (GL_LINES, len(quads) + len(trees), len(lines)),
+    ])
+
+    top = max(float((centers[:, 1] * 2).max()) if len(centers) else 0.0,
+              float(tree_meshes[..., 1].max()))
+    origin = np.array([chunk_x * size, 0.0, chunk_z * size])
+    return Chunk((chunk_x, chunk_z), origin, size, mesh, len(centers), len(positions), top)
+
+
+class ChunkManager:
+    def __init__(self, seed=0, view_distance=250.0, max_resident=None, generate_per_frame=4,
+                 building_density=0.5):
+        """
+        Stream chunks of an unbounded city around the camera target
+        Args:
+            seed: World seed
+            view_distance: Chunks within this distance of the target are kept drawn
+            max_resident: Chunks kept in memory (twice the visible area if None)
+            generate_per_frame: New chunks generated per update, nearest first
+            building_density: Probability that a building lattice cell is used
+        """
+        self.seed = seed
+        self.road = Road()
+        self.chunk_size = self.road.grid_spacing
+        self.radius = int(math.ceil(view_distance / self.chunk_size))
+        self.generate_per_frame = generate_per_frame
+        self.building_density = building_density
+
+        visible_count = (2 * self.radius + 1) ** 2
+        self.max_resident = max_resident if max_resident is not None else 2 * visible_count
+        if self.max_resident < visible_count:
+            raise ValueError(f"max_resident must hold the {visible_count} chunks in view")
+
+        # Chunk key -> Chunk, least recently used first
+        self.chunks = OrderedDict()
+        self.visible_keys = []
+
+        # False while chunks in view are still waiting to be generated
+        self.complete = False
+
+        # Chunks dropped by reset(), released on the next update (GL thread)
+        self.retired = []
+
+        # Generate every chunk in view on the next update (e.g. after a reset)
+        self.fill_view = True
+
+        # Counters for reporting
+        self.generated = 0
+        self.evicted = 0
+
+        self.tree_meshes = chunk_tree_meshes()
+
+    def __len__(self):
+        return len(self.chunks)
+
+    def chunk_of(self, x, z):
+        """
+        Get the chunk containing a world position
+        Args:
+            x, z: World position
+        Returns:
+            tuple: (chunk_x, chunk_z)
+        """
+        return (int(math.floor(x / self.chunk_size + 0.5)),
+                int(math.floor(z / self.chunk_size + 0.5)))
+
+    def wanted(self, target):
+        """
+        Chunks in view distance of a point, nearest first
+        Args:
+            target: World position (x, y, z)
+        Returns:
+            list: Chunk keys
+        """
+        center_x, center_z = self.chunk_of(target[0], target[2])
+        offsets = np.arange(-self.radius, self.radius + 1)
+        dx, dz = np.meshgrid(offsets, offsets, indexing='ij')
+        distance = dx.ravel() ** 2 + dz.ravel() ** 2
+        keep = distance <= self.radius ** 2
+        order = np.argsort(distance[keep], kind='stable')
+        return [(center_x + int(x), center_z + int(z))
+                for x, z in zip(dx.ravel()[keep][order], dz.ravel()[keep][order])]
+
+    def reset(self, seed):
+        """
+        Switch to a new world seed (safe to call from any thread)
+        Args:
+            seed: New world seed
+        """
+        self.seed = seed
+        self.retired.append(self.chunks)
+        self.chunks = OrderedDict()
+        self.visible_keys = []
+        self.complete = False
+        self.fill_view = True
+
+    def update(self, target):
+        """
+        Generate chunks near the target and evict the least recently used
+        (must be called from the GL thread, since evicted buffers are freed)
+        Args:
+            target: Camera target (x, y, z)
+        """
+        while self.retired:
+            for chunk in self.retired.pop().values():
+                chunk.release()
+
+        # At most generate_per_frame new chunks per frame, nearest first,
+        # except when the view starts out empty
+        budget = None if self.fill_view else self.generate_per_frame
+        self.fill_view = False
+        wanted = self.wanted(target)
+        for key in wanted:
+            if key not in self.chunks:
+                if budget == 0:
+                    continue
+                self.chunks[key] = generate_chunk(
+                    self.seed, key[0], key[1], self.road, self.building_density, self.tree_meshes
+                )
+                self.generated += 1
+                if budget is not None:
+                    budget -= 1
+            self.chunks.move_to_end(key)
+
+        while len(self.chunks) > self.max_resident:
+            _, chunk = self.chunks.popitem(last=False)
+            chunk.release()
+            self.evicted += 1
+
+        self.visible_keys = [key for key in wanted if key in self.chunks]
+        self.complete = len(self.visible_keys) == len(wanted)
+
+    def draw(self, origin, frustum=None, stats=None, pipeline=None):
+        """
+        Render the chunks in view distance
+        Args:
+            origin: World point the view was set up around (see Camera.apply_view)
+            frustum: World-space Frustum to cull chunks against (no culling if None)
+            stats: Optional CullingStats to record results in
+            pipeline: ShaderPipeline to draw with (fixed function if None)
+        """
+        chunks = [self.chunks[key] for key in self.visible_keys]
+        if frustum is not None and chunks:
+            visible = frustum.visible(np.array([c.center for c in chunks]),
+                                      np.array([c.half for c in chunks]))
+            drawn = [chunk for chunk, keep in zip(chunks, visible) if keep]
+        else:
+            drawn = chunks
+        if stats is not None:
+            stats.record('chunks', len(chunks), len(drawn))
+
+        for chunk in drawn:
+            # Offsets are taken in double precision, vertices stay chunk-local
+            if pipeline is not None:
+                pipeline.draw_mesh(chunk.mesh, chunk.origin - origin)
+                continue
+            glPushMatrix()
+            glTranslated(*(chunk.origin - origin))
+            chunk.mesh.draw()
+            glPopMatrix()
+
+    def stats(self):
+        """
+        Get streaming counters
+        Returns:
+            dict: Resident, generated and evicted chunks and resident vertex bytes
+        """
+        return {
+            'resident': len(self.chunks),
+            'generated': self.generated,
+            'evicted': self.evicted,
+            'vertex_bytes': sum(chunk.mesh.vertices.nbytes for chunk in self.chunks.values()),
+        }
@@ -0,0 +1,286 @@
+"""
+View-frustum culling for 3D city simulation
+Rejects objects outside the camera view before any GL calls are made
+"""
+import numpy as np
+
+
+class Frustum:
+    def __init__(self, planes):
+        """
+        Create a frustum from its six planes
+        Args:
+            planes: (6, 4) array of (nx, ny, nz, d); inside is n . p + d >= 0
+        """
+        planes = np.asarray(planes, dtype=np.float64)
+        self.planes = planes / np.linalg.norm(planes[:, :3], axis=1, keepdims=True)
+
+    @classmethod
+    def from_matrix(cls, clip):
+        """
+        Extract the planes of a combined projection @ view matrix
+        Args:
+            clip: 4x4 matrix for column vectors
+        Returns:
+            Frustum
+        """
+        clip = np.asarray(clip, dtype=np.float64)
+        return cls([
+            clip[3] + clip[0],  # Left
+            clip[3] - clip[0],  # Right
+            clip[3] + clip[1],  # Bottom
+            clip[3] - clip[1],  # Top
+            clip[3] + clip[2],  # Near
+            clip[3] - clip[2],  # Far
+        ])
+
+    @classmethod
+    def from_camera(cls, camera, renderer, far=None):
+        """
+        Build the frustum the scene is rendered with this frame
+        Args:
+            camera: Camera (yaw, pitch, zoom, target)
+            renderer: Renderer (fov, aspect, near, far)
+            far: Draw distance culling objects sooner than the far plane
+                 (renderer.far if None)
+        Returns:
+            Frustum
+        """
+        return cls.from_matrix(renderer.projection_matrix(far) @ camera.view_matrix())
+
+    def classify(self, centers, half_sizes):
+        """
+        Classify axis-aligned boxes against the frustum
+        Args:
+            centers: (N, 3) box centers
+            half_sizes: (N, 3) box half extents
+        Returns:
+            tuple: (outside, inside) boolean arrays; boxes in neither straddle a plane
+        """
+        normals = self.planes[:, :3]
+        distance = np.asarray(centers) @ normals.T + self.planes[:, 3]
+        radius = np.asarray(half_sizes) @ np.abs(normals).T
+        outside = (distance < -radius).any(axis=1)
+        inside = (distance >= radius).all(axis=1)
+        return outside, inside
+
+    def visible(self, centers, half_sizes):
+        """
+        Test boxes for visibility
+        Returns:
+            np.ndarray: Boolean array, True where the box may be visible
+        """
+        return ~self.classify(centers, half_sizes)[0]
+
+
+def ranges_to_indices(starts, ends):
+    """
+    Concatenate several index ranges
+    Args:
+        starts, ends: Arrays of half-open [start, end) ranges
+    Returns:
+        np.ndarray: All indices of the ranges in order
+    """
+    lengths = ends - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return np.zeros(0, dtype=np.int64)
+    # Offset each position by the start of the range it belongs to
+    range_of = np.repeat(np.arange(len(starts)), lengths)
+    first = np.cumsum(lengths) - lengths
+    return starts[range_of] + (np.arange(total) - first[range_of])
+
+
+def index_runs(indices):
+    """
+    Split sorted indices into runs of consecutive values
+    Args:
+        indices: Sorted integer array
+    Returns:
+        tuple: (run starts, run lengths) arrays
+    """
+    if len(indices) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    breaks = np.flatnonzero(np.diff(indices) != 1) + 1
+    starts = indices[np.concatenate([[0], breaks])]
+    lengths = np.diff(np.concatenate([[0], breaks, [len(indices)]]))
+    return starts, lengths
+
+
+class BoxHierarchy:
+    def __init__(self, centers, half_sizes, leaf_size=32):
+        """
+        Build a bounding volume hierarchy over static boxes
+        Items are split on x/z at the median, so leaves end up as groups of
+        neighbouring buildings or trees (roughly city blocks)
+        Args:
+            centers: (N, 3) box centers
+            half_sizes: (N, 3) box half extents
+            leaf_size: Maximum number of items per leaf
+        """
+        centers = np.asarray(centers, dtype=np.float64).reshape(-1, 3)
+        half_sizes = np.asarray(half_sizes, dtype=np.float64).reshape(-1, 3)
+        count = len(centers)
+        mins, maxs = centers - half_sizes, centers + half_sizes
+
+        # Item order after partitioning; each node covers order[start:end]
+        self.order = np.arange(count)
+        node_min, node_max, node_left, node_right, node_start, node_end = [], [], [], [], [], []
+
+        def add_node(start, end):
+            items = self.order[start:end]
+            node_min.append(mins[items].min(axis=0) if end > start else np.zeros(3))
+            node_max.append(maxs[items].max(axis=0) if end > start else np.zeros(3))
+            node_left.append(-1)
+            node_right.append(-1)
+            node_start.append(start)
+            node_end.append(end)
+            return len(node_start) - 1
+
+        stack = [add_node(0, count)]
+        while stack:
+            node = stack.pop()
+            start, end = node_start[node], node_end[node]
+            if end - start <= leaf_size:
+                continue
+
+            # Split along the longer horizontal axis at the median
+            extent = node_max[node] - node_min[node]
+            axis = 0 if extent[0] >= extent[2] else 2
+            items = self.order[start:end]
+            middle = (end - start) // 2
+            partition = np.argpartition(centers[items, axis], middle)
+            self.order[start:end] = items[partition]
+
+            node_left[node] = add_node(start, start + middle)
+            node_right[node] = add_node(start + middle, end)
+            stack.extend([node_left[node], node_right[node]])
+
+        node_min, node_max = np.array(node_min), np.array(node_max)
+        self.node_center = (node_min + node_max) / 2
+        self.node_half = (node_max - node_min) / 2
+        self.node_left = np.array(node_left)
+        self.node_right = np.array(node_right)
+        self.node_start = np.array(node_start)
+        self.node_end = np.array(node_end)
+
+        # Item boxes in hierarchy order (positions returned by query index these)
+        self.item_center = centers[self.order]
+        self.item_half = half_sizes[self.order]
+
+        # Leaf nodes sorted by their item range, and the leaf of every position
+        leaves = np.flatnonzero(self.node_left < 0)
+        self.leaves = leaves[np.argsort(self.node_start[leaves])]
+        self.item_leaf = np.repeat(np.arange(len(self.leaves)),
+                                   self.node_end[self.leaves] - self.node_start[self.leaves])
+
+    def __len__(self):
+        return len(self.order)
+
+    def query(self, frustum):
+        """
+        Find items that may be visible, rejecting whole groups at a time
+        Args:
+            frustum: Frustum to test against
+        Returns:
+            tuple: (sorted visible positions in hierarchy order, nodes tested)
+        """
+        if len(self) == 0:
+            return np.zeros(0, dtype=np.int64), 0
+
+        accepted = []
+        nodes_tested = 0
+        frontier = np.array([0])
+
+        # Walk the tree one level at a time, testing every node of a level at once
+        while len(frontier):
+            outside, inside = frustum.classify(self.node_center[frontier], self.node_half[frontier])
+            nodes_tested += len(frontier)
+
+            # Fully inside: accept the whole group without testing its items
+            full = frontier[inside]
+            accepted.append(ranges_to_indices(self.node_start[full], self.node_end[full]))
+
+            straddling = frontier[~outside & ~inside]
+            is_leaf = self.node_left[straddling] < 0
+
+            # Straddling leaves: test their items individually
+            leaves = straddling[is_leaf]
+            items = ranges_to_indices(self.node_start[leaves], self.node_end[leaves])
+            if len(items):
+                accepted.append(items[frustum.visible(self.item_center[items], self.item_half[items])])
+
+            inner = straddling[~is_leaf]
+            frontier = np.concatenate([self.node_left[inner], self.node_right[inner]])
+
+        visible = np.sort(np.concatenate(accepted)) if accepted else np.zeros(0, dtype=np.int64)
+        return visible, nodes_tested
+
+
+class CullingStats:
+    def __init__(self):
+        """Per-frame culling counters"""
+        self.categories = {}
+        self.nodes_tested = 0
+        self.lod = {}
+        self.occluded = {}
+
+    def reset(self):
+        """Clear counters at the start of a frame"""
+        self.categories = {}
+        self.nodes_tested = 0
+        self.lod = {}
+        self.occluded = {}
+
+    def record(self, category, total, visible, nodes_tested=0):
+        """
+        Record culling results for one object category
+        Args:
+            category: e.g. 'buildings', 'trees', 'cars'
+            total: Objects considered
+            visible: Objects drawn
+            nodes_tested: Hierarchy nodes tested
+        """
+        self.categories[category] = {
+            'total': int(total),
+            'visible': int(visible),
+            'culled': int(total - visible),
+        }
+        self.nodes_tested += nodes_tested
+
+    def record_lod(self, category, counts):
+        """
+        Record how many drawn objects used each detail level
+        Args:
+            category: e.g. 'buildings', 'trees'
+            counts: Object count per level, full detail first
+        """
+        self.lod[category] = [int(count) for count in counts]
+
+    def record_occluded(self, category, tested, occluded):
+        """
+        Record how many objects the occlusion culler rejected
+        Args:
+            category: e.g. 'buildings', 'trees', 'cars'
+            tested: Objects tested (those left after frustum culling)
+            occluded: Objects found hidden
+        """
+        self.occluded[category] = {'tested': int(tested), 'occluded': int(occluded)}
+
+    def culled(self):
+        """Total objects skipped this frame"""
+        return sum(entry['culled'] for entry in self.categories.values())
+
+    def as_dict(self):
+        """
+        Get a copy of this frame's counters
+        Returns:
+            dict: Per-category totals plus hierarchy nodes tested
+        """
+        stats = {name: dict(entry) for name, entry in self.categories.items()}
+        stats['nodes_tested'] = self.nodes_tested
+        if self.lod:
+            stats['lod'] = {name: list(counts) for name, counts in self.lod.items()}
+        if self.occluded:
+            stats['occluded'] = {name: dict(entry) for name, entry in self.occluded.items()}
+        return stats
@@ -0,0 +1,158 @@
+"""
+Frame governor for 3D city simulation
+Watches recent frame times and trades render resolution, level of detail and
+draw distance for speed to keep frames inside a time budget
+"""
+from collections import deque
+
+import numpy as np
+
+
+# Quality levels, best first: (render scale, LOD distance scale, draw
+# distance scale); each step down gives up a little more of each
+QUALITY_LEVELS = (
+    (1.0, 1.0, 1.0),
+    (0.85, 0.8, 1.0),
+    (0.7, 0.65, 0.8),
+    (0.6, 0.5, 0.65),
+    (0.5, 0.4, 0.5),
+)
+
+# Frames measured per decision, and frames ignored after a change while the
+# new settings take effect (framebuffer reallocated, LOD levels settling)
+GOVERNOR_WINDOW = 30
+GOVERNOR_SETTLE = 10
+
+
+class FrameGovernor:
+    def __init__(self, budget_ms=0.0, window=GOVERNOR_WINDOW, settle=GOVERNOR_SETTLE,
+                 headroom=0.7, raise_windows=3, levels=QUALITY_LEVELS):
+        """
+        Adjust the quality level to hold a frame time budget
+        Args:
+            budget_ms: Target frame time in milliseconds (0 = off, full quality)
+            window: Frames whose 90th percentile decides each adjustment
+            settle: Frames skipped after an adjustment before measuring again
+            headroom: Quality is only raised while the percentile stays below
+                      budget_ms * headroom (the band up to the budget is the
+                      hysteresis that keeps it from flipping back and forth)
+            raise_windows: Consecutive windows with headroom needed to raise
+                           quality (it drops after a single window over budget)
+            levels: Quality levels, best first (see QUALITY_LEVELS)
+        """
+        self.budget_ms = budget_ms
+        self.headroom = headroom
+        self.raise_windows = raise_windows
+        self.levels = levels
+        self.settle = settle
+        self.level = 0
+
+        # Frame times of the current window, frames still settling and the
+        # windows in a row with room to raise quality
+        self.times = deque(maxlen=window)
+        self.settling = 0
+        self.quiet_windows = 0
+
+        # Every adjustment: frame, old and new level, percentile and budget
+        self.log = []
+        self.frame = 0
+
+    @property
+    def enabled(self):
+        """True when a budget is set"""
+        return self.budget_ms > 0
+
+    @property
+    def settings(self):
+        """
+        Settings of the current level
+        Returns:
+            tuple: (render scale, LOD distance scale, draw distance scale)
+        """
+        return self.levels[self.level]
+
+    def set_budget(self, budget_ms):
+        """
+        Change the frame time budget (0 turns the governor off)
+        Args:
+            budget_ms: Target frame time in milliseconds
+        Returns:
+            bool: True if the quality level changed (back to full quality)
+        """
+        self.budget_ms = budget_ms
+        self.times.clear()
+        self.quiet_windows = 0
+        print(f"Frame governor: budget {budget_ms:.1f} ms" if budget_ms > 0 else "Frame governor: off")
+        if not self.enabled and self.level != 0:
+            self.adjust(0, None)
+            return True
+        return False
+
+    def record(self, frame_ms):
+        """
+        Add a frame time and adjust the quality level if needed
+        Args:
+            frame_ms: Time the frame took (update and render) in milliseconds
+        Returns:
+            bool: True if the quality level changed
+        """
+        self.frame += 1
+        if not self.enabled:
+            return False
+        if self.settling > 0:
+            self.settling -= 1
+            return False
+        self.times.append(frame_ms)
+        if len(self.times) < self.times.maxlen:
+            return False
+
+        p90 = float(np.percentile(self.times, 90))
+        self.times.clear()
+        if p90 > self.budget_ms and self.level < len(self.levels) - 1:
+            self.adjust(self.level + 1, p90)
+            return True
+        if p90 < self.budget_ms * self.headroom and self.level > 0:
+            self.quiet_windows += 1
+            if self.quiet_windows >= self.raise_windows:
+                self.adjust(self.level - 1, p90)
+                return True
+        else:
+            self.quiet_windows = 0
+        return False
+
+    def adjust(self, level, p90):
+        """
+        Switch to a quality level and log the change
+        Args:
+            level: New level (0 = full quality)
+            p90: Frame time percentile that triggered it (None if the budget
+                 was turned off)
+        """
+        entry = {'frame': self.frame, 'from': self.level, 'to': level,
+                 'p90_ms': p90, 'budget_ms': self.budget_ms}
+        self.log.append(entry)
+        self.level = level
+        self.settling = self.settle
+        self.quiet_windows = 0
+        render_scale, lod_scale, draw_scale = self.settings
+        reason = (f"p90 {p90:.1f} ms {'over' if entry['to'] > entry['from'] else 'under'} "
+                  f"the {self.budget_ms:.1f} ms budget" if p90 is not None else "budget off")
+        print(f"Frame governor: {reason}, quality {entry['from']} -> {level} "
+              f"(resolution {render_scale:.0%}, LOD distance {lod_scale:.0%}, "
+              f"draw distance {draw_scale:.0%})")
+
+    def summary(self):
+        """
+        Summarize the governor
+        Returns:
+            dict: Budget, current level and settings, and the adjustment log
+        """
+        render_scale, lod_scale, draw_scale = self.settings
+        return {
+            'budget_ms': self.budget_ms,
+            'level': self.level,
+            'render_scale': render_scale,
+            'lod_scale': lod_scale,
+            'draw_scale': draw_scale,
+            'adjustments': list(self.log),
+        }
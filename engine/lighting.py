@@ -20,6 +20,13 @@ class Lighting:
         # Light position (sun-like from above and angle)
         self.position = [10.0, 20.0, 10.0, 1.0]
         
+        # Scene-wide ambient (the GL default light model) and material shininess
+        self.scene_ambient = [0.2, 0.2, 0.2, 1.0]
+        self.shininess = 50.0
+        
+        # Incremented whenever the light changes (render on demand)
+        self.revision = 0
+        
     def setup(self):
         """Configure OpenGL lighting"""
         # Enable lighting
@@ -41,7 +48,19 @@ class Lighting:
         
         # Set material properties
         glMaterialfv(GL_FRONT, GL_SPECULAR, [1.0, 1.0, 1.0, 1.0])
-        glMaterialfv(GL_FRONT, GL_SHININESS, [50.0])
+        glMaterialfv(GL_FRONT, GL_SHININESS, [self.shininess])
+    
+    def set_position(self, x, y, z, w=1.0):
+        """
+        Move the light (applied by update_position or the shader pipeline)
+        Args:
+            x, y, z: Light position
+            w: 1 for a point light, 0 for a directional light
+        """
+        position = [x, y, z, w]
+        if position != self.position:
+            self.position = position
+            self.revision += 1
     
     def update_position(self):
         """Update light position (call each frame if light moves)"""
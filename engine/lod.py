@@ -0,0 +1,59 @@
+"""
+Level-of-detail selection for 3D city simulation
+Picks mesh detail from camera distance, with hysteresis against flicker
+"""
+import numpy as np
+
+
+def box_distances(point, centers, half_sizes):
+    """
+    Distance from a point to many axis-aligned boxes (0 inside a box)
+    Args:
+        point: (3,) position, e.g. the camera
+        centers: (N, 3) box centers
+        half_sizes: (N, 3) box half extents
+    Returns:
+        np.ndarray: (N,) distances
+    """
+    gap = np.maximum(np.abs(np.asarray(centers) - point) - half_sizes, 0.0)
+    return np.sqrt((gap * gap).sum(axis=1))
+
+
+class LODSelector:
+    def __init__(self, thresholds, hysteresis=0.1):
+        """
+        Create a selector for len(thresholds) + 1 detail levels
+        Args:
+            thresholds: Increasing distances where detail drops a level
+            hysteresis: Relative band around each threshold; an object only
+                        switches once it is this far past the threshold
+        """
+        self.thresholds = np.asarray(thresholds, dtype=np.float64)
+        self.hysteresis = hysteresis
+
+        # Multiplier on every threshold (below 1 drops detail sooner)
+        self.distance_scale = 1.0
+
+    @property
+    def num_levels(self):
+        return len(self.thresholds) + 1
+
+    def select(self, distances, current=None):
+        """
+        Pick detail levels (0 = full detail)
+        Args:
+            distances: (N,) camera distances
+            current: (N,) levels used last frame (no hysteresis if None)
+        Returns:
+            np.ndarray: (N,) int8 levels
+        """
+        thresholds = self.thresholds * self.distance_scale
+        distances = np.asarray(distances)
+        if current is None:
+            return np.searchsorted(thresholds, distances, side='right').astype(np.int8)
+
+        # Coarsest level allowed while staying inside the band, and the
+        # finest level allowed once past the outer edge of the band
+        finest = np.searchsorted(thresholds * (1 + self.hysteresis), distances, side='right')
+        coarsest = np.searchsorted(thresholds * (1 - self.hysteresis), distances, side='right')
+        return np.clip(current, finest, coarsest).astype(np.int8)
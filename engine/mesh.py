@@ -0,0 +1,481 @@
+"""
+Static mesh helpers for 3D city simulation
+Packs geometry into NumPy arrays once and redraws it from a vertex buffer
+"""
+import ctypes
+
+import numpy as np
+from OpenGL.GL import *
+
+from engine.culling import BoxHierarchy, index_runs
+from engine.lod import LODSelector, box_distances
+from engine.profiler import count_draw
+
+
+# Interleaved vertex layout: position (3), normal (3), color (3) as float32
+VERTEX_FLOATS = 9
+VERTEX_STRIDE = VERTEX_FLOATS * 4
+
+# Quads of 4 vertices per box
+BOX_VERTICES = 24
+
+# Boxes without the bottom face (only seen from below the ground)
+OPEN_BOX_VERTICES = 20
+
+# Triangle indices of an open unit box (instanced boxes list the bottom
+# face last, so its first indices are the open box)
+OPEN_BOX_INDICES = 30
+
+# Camera distances where buildings drop to open boxes, then to one
+# merged box per block
+BUILDING_LOD_DISTANCES = (120.0, 300.0)
+
+# Instance rows for the shader pipeline: offset (3), scale (3), color (3), yaw
+INSTANCE_FLOATS = 10
+
+# Unit box faces (same order and winding as Building.draw)
+BOX_FACE_NORMALS = np.array([
+    (0, 0, 1),    # Front
+    (0, 0, -1),   # Back
+    (-1, 0, 0),   # Left
+    (1, 0, 0),    # Right
+    (0, 1, 0),    # Top
+    (0, -1, 0),   # Bottom
+], dtype=np.float32)
+
+BOX_FACE_CORNERS = np.array([
+    [(-1, -1, 1), (1, -1, 1), (1, 1, 1), (-1, 1, 1)],
+    [(-1, -1, -1), (-1, 1, -1), (1, 1, -1), (1, -1, -1)],
+    [(-1, -1, -1), (-1, -1, 1), (-1, 1, 1), (-1, 1, -1)],
+    [(1, -1, -1), (1, 1, -1), (1, 1, 1), (1, -1, 1)],
+    [(-1, 1, -1), (-1, 1, 1), (1, 1, 1), (1, 1, -1)],
+    [(-1, -1, -1), (1, -1, -1), (1, -1, 1), (-1, -1, 1)],
+], dtype=np.float32)
+
+
+def build_box_vertices(centers, half_sizes, colors, num_faces=6):
+    """
+    Build interleaved quad vertices for many axis-aligned boxes at once
+    Args:
+        centers: (N, 3) box centers
+        half_sizes: (N, 3) half extents along x, y, z
+        colors: (N, 3) RGB colors
+        num_faces: Faces per box in BOX_FACE_CORNERS order (5 drops the bottom)
+    Returns:
+        np.ndarray: (N * num_faces * 4, VERTEX_FLOATS) float32 vertex array
+    """
+    centers = np.asarray(centers, dtype=np.float32).reshape(-1, 1, 1, 3)
+    half_sizes = np.asarray(half_sizes, dtype=np.float32).reshape(-1, 1, 1, 3)
+    colors = np.asarray(colors, dtype=np.float32).reshape(-1, 1, 1, 3)
+    count = centers.shape[0]
+
+    vertices = np.empty((count, num_faces, 4, VERTEX_FLOATS), dtype=np.float32)
+    vertices[..., 0:3] = centers + BOX_FACE_CORNERS[:num_faces] * half_sizes
+    vertices[..., 3:6] = BOX_FACE_NORMALS[:num_faces, None, :]
+    vertices[..., 6:9] = colors
+    return vertices.reshape(-1, VERTEX_FLOATS)
+
+
+def quad_indices(num_quads):
+    """
+    Split quads into triangles (for paths without GL_QUADS)
+    Args:
+        num_quads: Number of consecutive 4-vertex quads
+    Returns:
+        np.ndarray: uint32 GL_TRIANGLES indices, two triangles per quad
+    """
+    corners = np.array([0, 1, 2, 0, 2, 3], dtype=np.uint32)
+    return (np.arange(num_quads, dtype=np.uint32)[:, None] * 4 + corners).ravel()
+
+
+def instance_rows(offsets, scales=None, colors=None, yaws=None):
+    """
+    Pack per-instance attributes into instance buffer rows
+    Args:
+        offsets: (N, 3) instance positions
+        scales: (N, 3) scale factors (1 if None)
+        colors: (N, 3) colors multiplying the vertex colors (1 if None)
+        yaws: (N,) rotations about the vertical axis in radians (0 if None)
+    Returns:
+        np.ndarray: (N, INSTANCE_FLOATS) float32 rows
+    """
+    rows = np.empty((len(offsets), INSTANCE_FLOATS), dtype=np.float32)
+    rows[:, 0:3] = offsets
+    rows[:, 3:6] = 1.0 if scales is None else scales
+    rows[:, 6:9] = 1.0 if colors is None else colors
+    rows[:, 9] = 0.0 if yaws is None else yaws
+    return rows
+
+
+class InstanceBuffer:
+    def __init__(self):
+        """GPU buffer of instance rows, re-uploaded only when its rows change"""
+        self.buffer = None
+        self.rows = np.zeros((0, INSTANCE_FLOATS), dtype=np.float32)
+
+    def update(self, rows, compare=True):
+        """
+        Upload instance rows (skipped if they equal the previous upload)
+        Args:
+            rows: (N, INSTANCE_FLOATS) float32 rows
+            compare: Check for unchanged rows first (False for rows that
+                     change every frame)
+        """
+        if compare and self.buffer is not None and np.array_equal(rows, self.rows):
+            return
+        self.rows = np.ascontiguousarray(rows, dtype=np.float32)
+        if len(self.rows) == 0:
+            return
+        if self.buffer is None:
+            self.buffer = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, self.buffer)
+        glBufferData(GL_ARRAY_BUFFER, self.rows.nbytes, self.rows, GL_STREAM_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def release(self):
+        """Free the GPU buffer (must be called from the GL thread)"""
+        if self.buffer is not None:
+            glDeleteBuffers(1, [self.buffer])
+            self.buffer = None
+        self.rows = np.zeros((0, INSTANCE_FLOATS), dtype=np.float32)
+
+
+class StaticMesh:
+    def __init__(self):
+        """Initialize an empty mesh (GPU buffer is created on first draw)"""
+        self.vertices = np.zeros((0, VERTEX_FLOATS), dtype=np.float32)
+
+        # Draw batches as (primitive, first vertex, vertex count)
+        self.batches = []
+        self.line_width = 1.0
+
+        # GL_STREAM_DRAW for meshes rebuilt every frame
+        self.usage = GL_STATIC_DRAW
+
+        # Vertex buffer object, uploaded lazily from the GL thread
+        self.vbo = None
+        self.needs_upload = False
+
+    def set_data(self, vertices, batches):
+        """
+        Replace mesh contents; the upload happens on the next draw
+        Args:
+            vertices: (N, VERTEX_FLOATS) float32 vertex array
+            batches: List of (primitive, first, count) tuples
+        """
+        self.vertices = np.ascontiguousarray(vertices, dtype=np.float32)
+        self.batches = list(batches)
+        self.needs_upload = True
+
+    def upload(self):
+        """Copy vertex data into the vertex buffer object"""
+        self.needs_upload = False
+        if len(self.vertices) == 0:
+            return
+        if self.vbo is None:
+            self.vbo = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glBufferData(GL_ARRAY_BUFFER, self.vertices.nbytes, self.vertices, self.usage)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def bind(self):
+        """Bind the vertex buffer and point the fixed-function arrays at it"""
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_NORMAL_ARRAY)
+        glEnableClientState(GL_COLOR_ARRAY)
+        glVertexPointer(3, GL_FLOAT, VERTEX_STRIDE, ctypes.c_void_p(0))
+        glNormalPointer(GL_FLOAT, VERTEX_STRIDE, ctypes.c_void_p(12))
+        glColorPointer(3, GL_FLOAT, VERTEX_STRIDE, ctypes.c_void_p(24))
+
+    def unbind(self):
+        """Restore client state after drawing"""
+        glDisableClientState(GL_COLOR_ARRAY)
+        glDisableClientState(GL_NORMAL_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def draw(self):
+        """Render every batch of the mesh"""
+        if self.needs_upload:
+            self.upload()
+        if self.vbo is None or len(self.vertices) == 0:
+            return
+
+        self.bind()
+        for primitive, first, count in self.batches:
+            if primitive == GL_LINES:
+                glLineWidth(self.line_width)
+            glDrawArrays(primitive, first, count)
+            count_draw(primitive, count)
+        glLineWidth(1.0)
+        self.unbind()
+
+    def draw_ranges(self, primitive, firsts, counts):
+        """
+        Render several vertex ranges with a single multi-draw call
+        Args:
+            primitive: GL primitive type
+            firsts: First vertex of each range
+            counts: Vertex count of each range
+        """
+        if self.needs_upload:
+            self.upload()
+        if self.vbo is None or len(firsts) == 0:
+            return
+
+        self.bind()
+        counts = np.asarray(counts, dtype=np.int32)
+        glMultiDrawArrays(primitive, np.asarray(firsts, dtype=np.int32), counts, len(firsts))
+        count_draw(primitive, int(counts.sum()))
+        self.unbind()
+
+    def release(self):
+        """Free the GPU buffer (must be called from the GL thread)"""
+        if self.vbo is not None:
+            glDeleteBuffers(1, [self.vbo])
+            self.vbo = None
+        self.needs_upload = len(self.vertices) > 0
+
+
+def building_arrays(buildings):
+    """
+    Pack building attributes into NumPy arrays
+    Args:
+        buildings: List of Building objects, or a RecordList whose columns are
+                   read directly (no Building objects are created)
+    Returns:
+        tuple: (centers, half_sizes, colors) as (N, 3) float32 arrays
+    """
+    columns = getattr(buildings, 'columns', None)
+    if columns is not None:
+        x, z, width, height, depth = (
+            np.asarray(columns[name], dtype=np.float32)
+            for name in ('x', 'z', 'width', 'height', 'depth')
+        )
+        colors = np.asarray(columns['color'], dtype=np.float32).reshape(-1, 3)
+    else:
+        data = np.array(
+            [(b.x, b.z, b.width, b.height, b.depth) + tuple(b.color) for b in buildings],
+            dtype=np.float32
+        ).reshape(-1, 8)
+        x, z, width, height, depth = data[:, 0], data[:, 1], data[:, 2], data[:, 3], data[:, 4]
+        colors = data[:, 5:8]
+
+    centers = np.stack([x, height / 2, z], axis=1)
+    half_sizes = np.stack([width / 2, height / 2, depth / 2], axis=1)
+    return centers, half_sizes, colors
+
+
+class CityMesh(StaticMesh):
+    def __init__(self):
+        """Initialize the baked building mesh"""
+        super().__init__()
+        self.building_count = 0
+        self.hierarchy = BoxHierarchy(np.zeros((0, 3)), np.zeros((0, 3)))
+
+        # Coarse levels: open boxes for every building, then one merged box
+        # per hierarchy leaf (a block of neighbouring buildings)
+        self.far_mesh = StaticMesh()
+        self.lod = LODSelector(BUILDING_LOD_DISTANCES)
+        self.block_levels = np.zeros(0, dtype=np.int8)
+
+        # Shader pipeline: one unit box instance per building (hierarchy
+        # order), then one per merged block
+        self.instances = np.zeros((0, INSTANCE_FLOATS), dtype=np.float32)
+        self.instance_buffer = InstanceBuffer()
+
+        # Merged block boxes (tested for occlusion instead of their buildings)
+        self.block_center = np.zeros((0, 3))
+        self.block_half = np.zeros((0, 3))
+
+    def build(self, buildings):
+        """
+        Bake all buildings into one vertex array (call when the city changes)
+        Args:
+            buildings: List of Building objects
+        """
+        centers, half_sizes, colors = building_arrays(buildings)
+
+        # Bounding boxes are precomputed once; vertices are stored in hierarchy
+        # order so every group of the hierarchy is one contiguous vertex range
+        self.hierarchy = BoxHierarchy(centers, half_sizes)
+        order = self.hierarchy.order
+        vertices = build_box_vertices(centers[order], half_sizes[order], colors[order])
+        self.building_count = len(centers)
+        self.set_data(vertices, [(GL_QUADS, 0, len(vertices))])
+
+        open_boxes = build_box_vertices(centers[order], half_sizes[order], colors[order], 5)
+        merged = self.merge_blocks(half_sizes[order], colors[order])
+        self.block_center, self.block_half = merged[0], merged[1]
+        blocks = build_box_vertices(*merged)
+        self.far_mesh.set_data(np.concatenate([open_boxes, blocks]), [])
+        self.block_levels = np.zeros(len(self.hierarchy.leaves), dtype=np.int8)
+        self.instances = np.concatenate([
+            instance_rows(centers[order], half_sizes[order], colors[order]),
+            instance_rows(*merged),
+        ])
+
+    def merge_blocks(self, half_sizes, colors):
+        """
+        Replace each hierarchy leaf by one box over its footprint
+        Args:
+            half_sizes: (N, 3) building half extents in hierarchy order
+            colors: (N, 3) building colors in hierarchy order
+        Returns:
+            tuple: (centers, half_sizes, colors) of the merged boxes
+        """
+        hierarchy = self.hierarchy
+        leaves = hierarchy.leaves
+        if self.building_count == 0:
+            return np.zeros((0, 3)), np.zeros((0, 3)), np.zeros((0, 3))
+
+        # Height and color are averaged weighted by footprint area
+        area = half_sizes[:, 0] * half_sizes[:, 2]
+        block_area = np.bincount(hierarchy.item_leaf, area, len(leaves))
+        height = np.bincount(hierarchy.item_leaf, area * half_sizes[:, 1], len(leaves)) / block_area
+        color = np.stack([
+            np.bincount(hierarchy.item_leaf, area * colors[:, channel], len(leaves)) / block_area
+            for channel in range(3)
+        ], axis=1)
+
+        # Footprint shrunk about the block center to the built-up area, so
+        # the gaps between buildings do not turn into one solid slab
+        centers = hierarchy.node_center[leaves].copy()
+        half = hierarchy.node_half[leaves].copy()
+        coverage = np.sqrt(np.minimum(block_area / np.maximum(half[:, 0] * half[:, 2], 1e-9), 1.0))
+        half[:, [0, 2]] *= coverage[:, None]
+        centers[:, 1] = height
+        half[:, 1] = height
+        return centers, half, color
+
+    def select_levels(self, camera):
+        """
+        Update the detail level of every block from the camera distance
+        Args:
+            camera: Camera the frame is rendered from
+        Returns:
+            np.ndarray: Level per hierarchy leaf
+        """
+        leaves = self.hierarchy.leaves
+        eye = np.array(camera.get_camera_position())
+        distances = box_distances(eye, self.hierarchy.node_center[leaves],
+                                  self.hierarchy.node_half[leaves])
+        self.block_levels = self.lod.select(distances, self.block_levels)
+        return self.block_levels
+
+    def draw(self, frustum=None, stats=None, camera=None, pipeline=None, occlusion=None):
+        """
+        Render the buildings, skipping those outside the frustum
+        Args:
+            frustum: Frustum to cull against (draw everything if None)
+            stats: Optional CullingStats to record results in
+            camera: Camera for distance-based detail (full detail if None)
+            pipeline: ShaderPipeline to draw instanced boxes with (baked
+                      vertices through fixed function if None)
+            occlusion: OcclusionCuller begun for this frame; the nearest
+                       buildings become its occluders, hidden ones are skipped
+        """
+        if frustum is None and camera is None and pipeline is None and occlusion is None:
+            super().draw()
+            return
+
+        if frustum is not None:
+            visible, nodes_tested = self.hierarchy.query(frustum)
+            if stats is not None:
+                stats.record('buildings', self.building_count, len(visible), nodes_tested)
+        else:
+            visible = np.arange(self.building_count)
+
+        # Every building of a block shares the block's level, so merged
+        # blocks are all-or-nothing
+        block_of = self.hierarchy.item_leaf[visible]
+        if camera is None:
+            building_level = np.zeros(len(visible), dtype=np.int8)
+        else:
+            building_level = self.select_levels(camera)[block_of]
+
+            # Bottom faces are visible from below the ground (e.g. the top preset)
+            if camera.get_camera_position()[1] < 0:
+                building_level[building_level == 1] = 0
+            if stats is not None:
+                stats.record_lod('buildings', np.bincount(building_level, minlength=self.lod.num_levels))
+
+        if occlusion is not None:
+            visible, building_level, block_of = self.cull_occluded(
+                occlusion, visible, building_level, block_of, stats
+            )
+
+        if pipeline is not None:
+            self.draw_instances(pipeline, visible, building_level, block_of)
+            return
+
+        starts, lengths = index_runs(visible[building_level == 0])
+        self.draw_ranges(GL_QUADS, starts * BOX_VERTICES, lengths * BOX_VERTICES)
+
+        # Open boxes and merged blocks share one buffer and one draw call
+        open_starts, open_lengths = index_runs(visible[building_level == 1])
+        block_starts, block_lengths = index_runs(np.unique(block_of[building_level == 2]))
+        self.far_mesh.draw_ranges(
+            GL_QUADS,
+            np.concatenate([open_starts * OPEN_BOX_VERTICES,
+                            self.building_count * OPEN_BOX_VERTICES + block_starts * BOX_VERTICES]),
+            np.concatenate([open_lengths * OPEN_BOX_VERTICES, block_lengths * BOX_VERTICES])
+        )
+
+    def cull_occluded(self, occlusion, visible, building_level, block_of, stats=None):
+        """
+        Rasterize the buildings drawn as they are (not merged into blocks) as
+        occluders, then drop buildings and blocks hidden behind them
+        Args:
+            occlusion: OcclusionCuller begun for this frame
+            visible: Visible buildings in hierarchy order
+            building_level: Detail level of each visible building
+            block_of: Hierarchy leaf of each visible building
+            stats: Optional CullingStats to record the occluded count in
+        Returns:
+            tuple: (visible, building_level, block_of) of the remaining buildings
+        """
+        hierarchy = self.hierarchy
+        solid = visible[building_level < 2]
+        occlusion.add_occluders(hierarchy.item_center[solid], hierarchy.item_half[solid])
+
+        # Buildings of merged blocks share their block's test
+        keep = np.ones(len(visible), dtype=bool)
+        single = building_level < 2
+        keep[single] = occlusion.visible(hierarchy.item_center[visible[single]],
+                                         hierarchy.item_half[visible[single]])
+        blocks = np.unique(block_of[~single])
+        hidden = blocks[~occlusion.visible(self.block_center[blocks], self.block_half[blocks])]
+        keep[~single] = ~np.isin(block_of[~single], hidden)
+        if stats is not None:
+            stats.record_occluded('buildings', len(keep), int(len(keep) - keep.sum()))
+        return visible[keep], building_level[keep], block_of[keep]
+
+    def draw_instances(self, pipeline, visible, building_level, block_of):
+        """
+        Draw buildings and merged blocks as unit box instances (two calls:
+        closed boxes, then boxes without the bottom face)
+        Args:
+            pipeline: ShaderPipeline (begun for this frame)
+            visible: Visible buildings in hierarchy order
+            building_level: Detail level of each visible building
+            block_of: Hierarchy leaf of each visible building
+        """
+        box = pipeline.model('box', build_box_vertices(np.zeros((1, 3)), np.ones((1, 3)), np.ones((1, 3))))
+        closed = visible[building_level == 0]
+        blocks = self.building_count + np.unique(block_of[building_level == 2])
+        open_boxes = visible[building_level == 1]
+
+        # Rows only change when the visible set or a level does
+        self.instance_buffer.update(self.instances[np.concatenate([closed, blocks, open_boxes])])
+        buffer = self.instance_buffer.buffer
+        pipeline.draw_instanced(box, buffer, len(closed) + len(blocks))
+        pipeline.draw_instanced(box, buffer, len(open_boxes), first=len(closed) + len(blocks),
+                                index_count=OPEN_BOX_INDICES)
+
+    def release(self):
+        """Free the GPU buffers (must be called from the GL thread)"""
+        super().release()
+        self.far_mesh.release()
+        self.instance_buffer.release()
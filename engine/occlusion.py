@@ -0,0 +1,244 @@
+"""
+Software occlusion culling for 3D city simulation
+Rasterizes the nearest large buildings into a small CPU depth buffer and
+rejects boxes hidden behind them with a hierarchical-Z (max depth) pyramid
+"""
+import numpy as np
+
+from engine.lod import box_distances
+
+
+# Depth buffer size (powers of two, so every pyramid level halves evenly)
+OCCLUSION_WIDTH = 128
+OCCLUSION_HEIGHT = 64
+
+# Buildings rasterized per frame, picked by apparent size
+MAX_OCCLUDERS = 32
+
+# Box corner signs (for projecting occludee bounds)
+BOX_CORNERS = np.array([(x, y, z) for x in (-1, 1) for y in (-1, 1) for z in (-1, 1)], dtype=np.float64)
+
+
+class OcclusionCuller:
+    def __init__(self, width=OCCLUSION_WIDTH, height=OCCLUSION_HEIGHT, max_occluders=MAX_OCCLUDERS):
+        """
+        CPU occlusion culler, filled once per frame by the building pass
+        Args:
+            width, height: Depth buffer resolution (powers of two)
+            max_occluders: Boxes rasterized per frame
+        """
+        self.width = width
+        self.height = height
+        self.max_occluders = max_occluders
+
+        # Per-frame camera state (set by begin)
+        self.eye = np.zeros(3)
+        self.view_projection = np.eye(4)
+        self.near = 0.1
+        self.rays = None
+        self.ray_key = None
+        self.inverse_rays = None
+
+        # Depth pyramid: level 0 is the depth buffer (eye-space depth,
+        # inf where nothing was drawn), each level the max of 2x2 below it
+        self.pyramid = [np.full((height, width), np.inf)]
+        self.occluder_count = 0
+
+    def begin(self, camera, renderer):
+        """
+        Start a frame: clear the depth buffer and set up the camera
+        Args:
+            camera: Camera the frame is rendered from
+            renderer: Renderer (projection parameters)
+        """
+        view = camera.view_matrix()
+        self.eye = np.array(camera.get_camera_position(), dtype=np.float64)
+        self.view_projection = renderer.projection_matrix() @ view
+        self.near = renderer.near
+
+        # Eye-space rays through the pixel corners only change with the
+        # projection; they are turned into world space every frame
+        key = (renderer.fov, renderer.width / renderer.height)
+        if key != self.ray_key:
+            self.rays = corner_rays(self.width, self.height, *key)
+            self.ray_key = key
+        with np.errstate(divide='ignore'):
+            self.inverse_rays = (1.0 / (self.rays @ view[:3, :3])).reshape(self.height + 1, self.width + 1, 3)
+
+        self.pyramid = [np.full((self.height, self.width), np.inf)]
+        self.occluder_count = 0
+
+    def add_occluders(self, centers, half_sizes):
+        """
+        Rasterize the apparently largest boxes into the depth buffer
+        Args:
+            centers: (N, 3) candidate occluder centers (solid boxes that are
+                     drawn exactly as given, e.g. full-detail buildings)
+            half_sizes: (N, 3) their half extents
+        """
+        centers = np.asarray(centers, dtype=np.float64)
+        half_sizes = np.asarray(half_sizes, dtype=np.float64)
+        if len(centers) > self.max_occluders:
+            # Silhouette area over squared distance approximates screen size
+            area = (half_sizes[:, 0] + half_sizes[:, 2]) * half_sizes[:, 1]
+            distance = np.maximum(box_distances(self.eye, centers, half_sizes), self.near)
+            chosen = np.argpartition(-area / distance ** 2, self.max_occluders)[:self.max_occluders]
+            centers, half_sizes = centers[chosen], half_sizes[chosen]
+
+        if len(centers) == 0:
+            return
+        depth = self.pyramid[0].copy()
+        testable, x0, x1, y0, y1, _ = self.project(centers, half_sizes)
+        for box in range(len(centers)):
+            if not testable[box]:
+                # Reaches the near plane: cast every ray
+                x0[box], y0[box], x1[box], y1[box] = 0, 0, self.width - 1, self.height - 1
+            rect = (slice(y0[box], y1[box] + 1), slice(x0[box], x1[box] + 1))
+            corners = (slice(y0[box], y1[box] + 2), slice(x0[box], x1[box] + 2))
+            box_depth = rasterize_box(self.eye, self.inverse_rays[corners], centers[box],
+                                      half_sizes[box], self.near)
+            np.minimum(depth[rect], box_depth, out=depth[rect])
+        self.pyramid = build_pyramid(depth)
+        self.occluder_count += len(centers)
+
+    def project(self, centers, half_sizes):
+        """
+        Screen rectangles of boxes in depth buffer pixels
+        Args:
+            centers, half_sizes: (N, 3) boxes
+        Returns:
+            tuple: (testable, x0, x1, y0, y1, nearest): testable is False for
+                   boxes reaching the near plane (no rectangle), x0..y1 the
+                   first and last pixel touched and nearest the smallest
+                   eye-space depth of the box
+        """
+        corners = centers[:, None, :] + half_sizes[:, None, :] * BOX_CORNERS
+        clip = corners @ self.view_projection[:2, :3].T + self.view_projection[:2, 3]
+        w = corners @ self.view_projection[3, :3] + self.view_projection[3, 3]
+        testable = (w > self.near).all(axis=1)
+        w = np.where(testable[:, None], w, 1.0)
+
+        x = (clip[..., 0] / w + 1.0) * 0.5 * self.width
+        y = (clip[..., 1] / w + 1.0) * 0.5 * self.height
+        x0 = np.clip(np.floor(x.min(axis=1)), 0, self.width - 1).astype(np.int64)
+        x1 = np.clip(np.floor(x.max(axis=1)), 0, self.width - 1).astype(np.int64)
+        y0 = np.clip(np.floor(y.min(axis=1)), 0, self.height - 1).astype(np.int64)
+        y1 = np.clip(np.floor(y.max(axis=1)), 0, self.height - 1).astype(np.int64)
+        return testable, x0, x1, y0, y1, w.min(axis=1)
+
+    def visible(self, centers, half_sizes):
+        """
+        Test boxes against the depth pyramid
+        Args:
+            centers: (N, 3) box centers
+            half_sizes: (N, 3) box half extents
+        Returns:
+            np.ndarray: Boolean array, False where the box is certainly hidden
+        """
+        centers = np.asarray(centers, dtype=np.float64).reshape(-1, 3)
+        half_sizes = np.asarray(half_sizes, dtype=np.float64).reshape(-1, 3)
+        visible = np.ones(len(centers), dtype=bool)
+        if self.occluder_count == 0 or len(centers) == 0:
+            return visible
+
+        # Boxes reaching the near plane are kept
+        testable, x0, x1, y0, y1, nearest = self.project(centers, half_sizes)
+
+        # Pyramid level where the rectangle spans at most 2x2 texels
+        span = np.maximum(x1 - x0, y1 - y0) + 1
+        levels = np.minimum(np.ceil(np.log2(span)).astype(np.int64), len(self.pyramid) - 1)
+        farthest = np.empty(len(centers))
+        for level in np.unique(levels):
+            boxes = np.flatnonzero(levels == level)
+            depth = self.pyramid[level]
+            left, right = x0[boxes] >> level, x1[boxes] >> level
+            bottom, top = y0[boxes] >> level, y1[boxes] >> level
+            farthest[boxes] = np.maximum(
+                np.maximum(depth[bottom, left], depth[bottom, right]),
+                np.maximum(depth[top, left], depth[top, right])
+            )
+        return ~testable | (nearest <= farthest)
+
+    def cull(self, category, indices, centers, half_sizes, stats=None):
+        """
+        Drop hidden objects from a list of drawn ones
+        Args:
+            category: Stats category, e.g. 'trees'
+            indices: Indices of the objects to draw
+            centers, half_sizes: Their bounding boxes
+            stats: Optional CullingStats to record the occluded count in
+        Returns:
+            np.ndarray: The indices whose boxes may be visible
+        """
+        keep = self.visible(centers, half_sizes)
+        if stats is not None:
+            stats.record_occluded(category, len(keep), int(len(keep) - keep.sum()))
+        return indices[keep]
+
+
+def corner_rays(width, height, fov, aspect):
+    """
+    Eye-space directions through the pixel corners of a depth buffer
+    Args:
+        width, height: Depth buffer resolution
+        fov: Vertical field of view in degrees
+        aspect: Width over height of the view
+    Returns:
+        np.ndarray: ((height + 1) * (width + 1), 3) directions with z = -1,
+                    so the ray parameter of a hit is its eye-space depth
+    """
+    tangent = np.tan(np.radians(fov) / 2)
+    x = np.linspace(-1.0, 1.0, width + 1) * tangent * aspect
+    y = np.linspace(-1.0, 1.0, height + 1) * tangent
+    rays = np.empty((height + 1, width + 1, 3))
+    rays[..., 0] = x[None, :]
+    rays[..., 1] = y[:, None]
+    rays[..., 2] = -1.0
+    return rays.reshape(-1, 3)
+
+
+def rasterize_box(eye, inverse_rays, center, half_size, near):
+    """
+    Conservative depth of one box over a block of pixels: a pixel is covered
+    when its four corner rays hit the box, at the farthest of their entry
+    depths (a convex box's front surface is deepest at a pixel's corners)
+    Args:
+        eye: (3,) camera position
+        inverse_rays: (rows + 1, columns + 1, 3) reciprocals of the world-space
+                      corner rays of the pixels (see corner_rays)
+        center, half_size: (3,) box
+        near: Near plane distance (hits before it are ignored)
+    Returns:
+        np.ndarray: (rows, columns) depth, inf where the box does not cover
+    """
+    # Slab test of every corner ray, one axis at a time
+    entry = np.full(inverse_rays.shape[:2], -np.inf)
+    leave = np.full(inverse_rays.shape[:2], np.inf)
+    with np.errstate(invalid='ignore'):
+        for axis in range(3):
+            low = (center[axis] - half_size[axis] - eye[axis]) * inverse_rays[..., axis]
+            high = (center[axis] + half_size[axis] - eye[axis]) * inverse_rays[..., axis]
+            np.maximum(entry, np.minimum(low, high), out=entry)
+            np.minimum(leave, np.maximum(low, high), out=leave)
+    entry[~((entry <= leave) & (entry >= near))] = np.inf
+
+    # Farthest corner per pixel (inf if any corner misses)
+    return np.maximum(np.maximum(entry[:-1, :-1], entry[:-1, 1:]),
+                      np.maximum(entry[1:, :-1], entry[1:, 1:]))
+
+
+def build_pyramid(depth):
+    """
+    Build the hierarchical-Z pyramid of a depth buffer
+    Args:
+        depth: (height, width) depth buffer (powers of two)
+    Returns:
+        list: Levels from the buffer itself down to 1x1, each texel the
+              farthest depth of the 2x2 texels below it
+    """
+    pyramid = [depth]
+    while depth.shape[0] > 1 or depth.shape[1] > 1:
+        rows, columns = max(depth.shape[0] // 2, 1), max(depth.shape[1] // 2, 1)
+        depth = depth.reshape(rows, depth.shape[0] // rows, columns, depth.shape[1] // columns).max(axis=(1, 3))
+        pyramid.append(depth)
+    return pyramid
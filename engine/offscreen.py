@@ -0,0 +1,139 @@
+"""
+Offscreen OpenGL context for 3D city simulation
+Renders without a window or display (EGL or OSMesa software rendering)
+"""
+import ctypes
+import os
+
+from OpenGL.GL import *
+
+
+# Backends and the PYOPENGL_PLATFORM each one needs
+OFFSCREEN_BACKENDS = ('egl', 'osmesa')
+
+
+class OffscreenContext:
+    def __init__(self, width, height, backend='egl'):
+        """
+        Create a GL context with an offscreen framebuffer and make it current
+        Args:
+            width, height: Framebuffer size
+            backend: 'egl' (surfaceless, e.g. Mesa llvmpipe) or 'osmesa'
+        Note: PYOPENGL_PLATFORM must be set to the backend name before
+              OpenGL is first imported
+        """
+        if backend not in OFFSCREEN_BACKENDS:
+            raise ValueError(f"Unknown offscreen backend: {backend}")
+        platform = os.environ.get('PYOPENGL_PLATFORM')
+        if platform != backend:
+            raise RuntimeError(
+                f"PYOPENGL_PLATFORM is {platform!r}; set it to {backend!r} before importing OpenGL"
+            )
+
+        self.width = width
+        self.height = height
+        self.backend = backend
+        self.context = None
+        self.display = None
+        self.buffer = None
+
+        if backend == 'egl':
+            self.create_egl_context()
+        else:
+            self.create_osmesa_context()
+
+        # Render into our own framebuffer object so both backends behave the same
+        self.framebuffer = None
+        self.renderbuffers = []
+        self.create_framebuffer()
+
+    def create_egl_context(self):
+        """Create a surfaceless EGL context (no window system needed)"""
+        from OpenGL import EGL
+
+        # Mesa reads this when the display is opened
+        os.environ.setdefault('EGL_PLATFORM', 'surfaceless')
+
+        self.display = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+        major, minor = EGL.EGLint(), EGL.EGLint()
+        if not EGL.eglInitialize(self.display, ctypes.pointer(major), ctypes.pointer(minor)):
+            raise RuntimeError("eglInitialize failed")
+
+        attributes = (EGL.EGLint * 5)(
+            EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT,
+            EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT,
+            EGL.EGL_NONE
+        )
+        config = EGL.EGLConfig()
+        num_configs = EGL.EGLint()
+        EGL.eglChooseConfig(self.display, attributes, ctypes.pointer(config), 1,
+                            ctypes.pointer(num_configs))
+        if num_configs.value == 0:
+            raise RuntimeError("No EGL config with desktop OpenGL support")
+
+        EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+        self.context = EGL.eglCreateContext(self.display, config, EGL.EGL_NO_CONTEXT, None)
+        if not self.context:
+            raise RuntimeError("eglCreateContext failed")
+        EGL.eglMakeCurrent(self.display, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE, self.context)
+
+    def create_osmesa_context(self):
+        """Create an OSMesa software context rendering into a host buffer"""
+        from OpenGL import arrays, osmesa
+
+        self.context = osmesa.OSMesaCreateContextExt(osmesa.OSMESA_RGBA, 24, 0, 0, None)
+        if not self.context:
+            raise RuntimeError("OSMesaCreateContextExt failed")
+        self.buffer = arrays.GLubyteArray.zeros((self.height, self.width, 4))
+        if not osmesa.OSMesaMakeCurrent(self.context, self.buffer, GL_UNSIGNED_BYTE,
+                                        self.width, self.height):
+            raise RuntimeError("OSMesaMakeCurrent failed")
+
+    def create_framebuffer(self):
+        """Create and bind a color + depth framebuffer object"""
+        self.framebuffer = glGenFramebuffers(1)
+        glBindFramebuffer(GL_FRAMEBUFFER, self.framebuffer)
+
+        color, depth = glGenRenderbuffers(2)
+        self.renderbuffers = [color, depth]
+        glBindRenderbuffer(GL_RENDERBUFFER, color)
+        glRenderbufferStorage(GL_RENDERBUFFER, GL_RGBA8, self.width, self.height)
+        glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_RENDERBUFFER, color)
+        glBindRenderbuffer(GL_RENDERBUFFER, depth)
+        glRenderbufferStorage(GL_RENDERBUFFER, GL_DEPTH_COMPONENT24, self.width, self.height)
+        glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_DEPTH_ATTACHMENT, GL_RENDERBUFFER, depth)
+        glBindRenderbuffer(GL_RENDERBUFFER, 0)
+
+        if glCheckFramebufferStatus(GL_FRAMEBUFFER) != GL_FRAMEBUFFER_COMPLETE:
+            raise RuntimeError("Offscreen framebuffer is incomplete")
+
+    def renderer_info(self):
+        """
+        Describe the GL implementation in use
+        Returns:
+            dict: GL vendor, renderer and version strings
+        """
+        return {
+            'backend': self.backend,
+            'vendor': glGetString(GL_VENDOR).decode(),
+            'renderer': glGetString(GL_RENDERER).decode(),
+            'version': glGetString(GL_VERSION).decode(),
+        }
+
+    def destroy(self):
+        """Release the framebuffer and the context"""
+        if self.framebuffer is not None:
+            glDeleteRenderbuffers(len(self.renderbuffers), self.renderbuffers)
+            glDeleteFramebuffers(1, [self.framebuffer])
+            self.framebuffer = None
+
+        if self.backend == 'egl' and self.context:
+            from OpenGL import EGL
+            EGL.eglMakeCurrent(self.display, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE,
+                               EGL.EGL_NO_CONTEXT)
+            EGL.eglDestroyContext(self.display, self.context)
+            EGL.eglTerminate(self.display)
+        elif self.backend == 'osmesa' and self.context:
+            from OpenGL import osmesa
+            osmesa.OSMesaDestroyContext(self.context)
+        self.context = None
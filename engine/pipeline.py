@@ -0,0 +1,297 @@
+"""
+GLSL 3.30 rendering pipeline for 3D city simulation
+Replaces the fixed-function matrix stack and GL_LIGHT0: view and projection
+come from Camera/Renderer as NumPy matrices, lighting runs in the shader and
+objects are placed by per-instance attributes, so every building, tree level
+or car fleet is drawn with a single instanced call
+"""
+import ctypes
+
+import numpy as np
+from OpenGL.GL import *
+
+from engine.mesh import VERTEX_STRIDE, quad_indices
+from engine.profiler import count_draw
+from engine.shaders import (
+    CORE_FRAGMENT_SHADER, CORE_VERTEX_SHADER, create_program, glsl_version, instancing_supported
+)
+
+
+# Generic attribute locations (match the layout qualifiers in CORE_VERTEX_SHADER)
+POSITION_LOCATION = 0
+NORMAL_LOCATION = 1
+COLOR_LOCATION = 2
+
+# Per-instance attributes in instance row order (see engine.mesh.instance_rows):
+# name, float count, location, value when an instance buffer does not supply it
+INSTANCE_ATTRIBUTES = (
+    ('offset', 3, 3, (0.0, 0.0, 0.0)),
+    ('scale', 3, 4, (1.0, 1.0, 1.0)),
+    ('color', 3, 5, (1.0, 1.0, 1.0)),
+    ('yaw', 1, 6, (0.0,)),
+)
+
+# Lighting uniforms of the shader, filled from Lighting
+LIGHT_UNIFORMS = ('light_position', 'light_ambient', 'light_diffuse', 'light_specular',
+                  'scene_ambient')
+
+
+class IndexedModel:
+    def __init__(self, vertices, indices):
+        """
+        Model drawn once per instance (vertices in model coordinates)
+        Args:
+            vertices: (N, VERTEX_FLOATS) float32 vertex array
+            indices: uint32 GL_TRIANGLES indices
+        """
+        self.vertices = np.ascontiguousarray(vertices, dtype=np.float32)
+        self.indices = np.ascontiguousarray(indices, dtype=np.uint32)
+        self.vertex_buffer = None
+        self.index_buffer = None
+
+    @classmethod
+    def from_quads(cls, vertices):
+        """Model from consecutive 4-vertex quads (e.g. build_box_vertices output)"""
+        return cls(vertices, quad_indices(len(vertices) // 4))
+
+    def upload(self):
+        """Create the vertex and index buffers"""
+        self.vertex_buffer, self.index_buffer = glGenBuffers(2)
+        glBindBuffer(GL_ARRAY_BUFFER, self.vertex_buffer)
+        glBufferData(GL_ARRAY_BUFFER, self.vertices.nbytes, self.vertices, GL_STATIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.index_buffer)
+        glBufferData(GL_ELEMENT_ARRAY_BUFFER, self.indices.nbytes, self.indices, GL_STATIC_DRAW)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+
+    def release(self):
+        """Free the GPU buffers (must be called from the GL thread)"""
+        if self.vertex_buffer is not None:
+            glDeleteBuffers(2, [self.vertex_buffer, self.index_buffer])
+            self.vertex_buffer = self.index_buffer = None
+
+
+class ShaderPipeline:
+    def __init__(self):
+        """
+        Shader-based renderer state (GL objects are created by init_gl on the
+        GL thread; the fixed-function path stays usable in between frames)
+        """
+        self.program = None
+        self.vertex_array = None
+        self.uniforms = {}
+
+        # Models shared by the instanced draws (registered by name)
+        self.models = {}
+
+    @staticmethod
+    def supported():
+        """
+        Check whether the current context can run the pipeline
+        Returns:
+            bool: True with GLSL 3.30 or newer and instanced arrays
+        """
+        return glsl_version() >= (3, 30) and instancing_supported()
+
+    def init_gl(self):
+        """Compile the program and create the vertex array object"""
+        self.program = create_program(CORE_VERTEX_SHADER, CORE_FRAGMENT_SHADER)
+        names = ('view', 'projection', 'shininess', 'billboard', 'camera_right') + LIGHT_UNIFORMS
+        self.uniforms = {name: glGetUniformLocation(self.program, name) for name in names}
+        self.vertex_array = glGenVertexArrays(1)
+
+    def model(self, name, vertices, indices=None):
+        """
+        Get a shared model, creating it on first use
+        Args:
+            name: Model name
+            vertices: Vertex array (quads if indices is None)
+            indices: GL_TRIANGLES indices
+        Returns:
+            IndexedModel: The uploaded model
+        """
+        model = self.models.get(name)
+        if model is None:
+            model = IndexedModel(vertices, indices) if indices is not None else \
+                IndexedModel.from_quads(vertices)
+            model.upload()
+            self.models[name] = model
+        return model
+
+    def begin(self, view, projection, lighting):
+        """
+        Bind the program and set the per-frame uniforms
+        Args:
+            view: 4x4 view matrix (column vectors; see Camera.view_matrix)
+            projection: 4x4 projection matrix (see Renderer.projection_matrix)
+            lighting: Lighting with the light in world coordinates
+        """
+        glUseProgram(self.program)
+        glBindVertexArray(self.vertex_array)
+        uniforms = self.uniforms
+
+        # NumPy matrices are row-major: let GL transpose them
+        glUniformMatrix4fv(uniforms['view'], 1, GL_TRUE, np.asarray(view, dtype=np.float32))
+        glUniformMatrix4fv(uniforms['projection'], 1, GL_TRUE, np.asarray(projection, dtype=np.float32))
+
+        # The light is given in world space and lit in eye space, as
+        # glLightfv(GL_POSITION) does after the view is applied
+        light = np.asarray(view, dtype=np.float64) @ np.asarray(lighting.position, dtype=np.float64)
+        glUniform4f(uniforms['light_position'], *light)
+        glUniform4f(uniforms['light_ambient'], *lighting.ambient)
+        glUniform4f(uniforms['light_diffuse'], *lighting.diffuse)
+        glUniform4f(uniforms['light_specular'], *lighting.specular)
+        glUniform4f(uniforms['scene_ambient'], *lighting.scene_ambient)
+        glUniform1f(uniforms['shininess'], lighting.shininess)
+        glUniform1i(uniforms['billboard'], 0)
+        self.reset_instance_attributes()
+
+    def end(self):
+        """Unbind the program so fixed-function drawing works again"""
+        glBindVertexArray(0)
+        glUseProgram(0)
+
+    def reset_instance_attributes(self):
+        """Disable instance arrays and restore the identity instance values"""
+        for _, size, location, default in INSTANCE_ATTRIBUTES:
+            glDisableVertexAttribArray(location)
+            glVertexAttribDivisor(location, 0)
+            if size == 1:
+                glVertexAttrib1f(location, *default)
+            else:
+                glVertexAttrib3f(location, *default)
+
+    def bind_vertices(self, buffer):
+        """Point position, normal and color at an interleaved vertex buffer"""
+        glBindBuffer(GL_ARRAY_BUFFER, buffer)
+        for location, offset in ((POSITION_LOCATION, 0), (NORMAL_LOCATION, 12), (COLOR_LOCATION, 24)):
+            glEnableVertexAttribArray(location)
+            glVertexAttribPointer(location, 3, GL_FLOAT, GL_FALSE, VERTEX_STRIDE, ctypes.c_void_p(offset))
+
+    def bind_instances(self, buffer, first=0, attributes=None):
+        """
+        Feed instance attributes from a buffer (one row per instance)
+        Args:
+            buffer: GL buffer of instance rows
+            first: First row to draw
+            attributes: Names of the row's attributes in INSTANCE_ATTRIBUTES
+                        order (all of them if None; the rest keep defaults)
+        """
+        selected = [entry for entry in INSTANCE_ATTRIBUTES
+                    if attributes is None or entry[0] in attributes]
+        stride = sum(size for _, size, _, _ in selected) * 4
+        glBindBuffer(GL_ARRAY_BUFFER, buffer)
+        offset = first * stride
+        for _, size, location, _ in selected:
+            glEnableVertexAttribArray(location)
+            glVertexAttribPointer(location, size, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(offset))
+            glVertexAttribDivisor(location, 1)
+            offset += size * 4
+
+    def draw_mesh(self, mesh, offset=None):
+        """
+        Draw every batch of a StaticMesh
+        Args:
+            mesh: StaticMesh in world coordinates
+            offset: Translation applied to the whole mesh (None for none)
+        """
+        if mesh.needs_upload:
+            mesh.upload()
+        if mesh.vbo is None or len(mesh.vertices) == 0:
+            return
+        self.bind_vertices(mesh.vbo)
+        if offset is not None:
+            glVertexAttrib3f(INSTANCE_ATTRIBUTES[0][2], *offset)
+        for primitive, first, count in mesh.batches:
+            if primitive == GL_LINES:
+                glLineWidth(mesh.line_width)
+            glDrawArrays(primitive, first, count)
+            count_draw(primitive, count)
+        glLineWidth(1.0)
+        if offset is not None:
+            glVertexAttrib3f(INSTANCE_ATTRIBUTES[0][2], *INSTANCE_ATTRIBUTES[0][3])
+
+    def draw_mesh_ranges(self, mesh, primitive, firsts, counts):
+        """
+        Draw vertex ranges of a StaticMesh with one multi-draw call
+        Args:
+            mesh: StaticMesh in world coordinates
+            primitive: GL primitive type
+            firsts, counts: First vertex and vertex count of each range
+        """
+        if mesh.needs_upload:
+            mesh.upload()
+        if mesh.vbo is None or len(firsts) == 0:
+            return
+        self.bind_vertices(mesh.vbo)
+        counts = np.asarray(counts, dtype=np.int32)
+        glMultiDrawArrays(primitive, np.asarray(firsts, dtype=np.int32), counts, len(firsts))
+        count_draw(primitive, int(counts.sum()))
+
+    def draw_instanced(self, model, instance_buffer, count, first=0, index_count=None,
+                       attributes=None, vertex_buffer=None, index_buffer=None):
+        """
+        Draw a model once per instance with a single call
+        Args:
+            model: IndexedModel (or None with vertex_buffer and index_buffer)
+            instance_buffer: GL buffer of instance rows
+            count: Number of instances
+            first: First instance row
+            index_count: Indices per instance (all of the model's if None)
+            attributes: Attributes stored in the rows (see bind_instances)
+            vertex_buffer, index_buffer: Buffers to use instead of the model's
+        """
+        if count == 0:
+            return
+        if model is not None:
+            vertex_buffer, index_buffer = model.vertex_buffer, model.index_buffer
+            index_count = len(model.indices) if index_count is None else index_count
+        self.bind_vertices(vertex_buffer)
+        self.bind_instances(instance_buffer, first, attributes)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, index_buffer)
+        glDrawElementsInstanced(GL_TRIANGLES, index_count, GL_UNSIGNED_INT, None, count)
+        count_draw(GL_TRIANGLES, index_count, count)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+        self.reset_instance_attributes()
+
+    def set_billboard(self, camera_right):
+        """
+        Turn billboarding on for the next draws (None turns it off)
+        Args:
+            camera_right: Horizontal right vector of the camera
+        """
+        glUniform1i(self.uniforms['billboard'], camera_right is not None)
+        if camera_right is not None:
+            glUniform3f(self.uniforms['camera_right'], *camera_right)
+
+    def release(self):
+        """Free the program, vertex array and models (must be called from the GL thread)"""
+        for model in self.models.values():
+            model.release()
+        self.models = {}
+        if self.vertex_array is not None:
+            glDeleteVertexArrays(1, [self.vertex_array])
+            self.vertex_array = None
+        if self.program is not None:
+            glDeleteProgram(self.program)
+            self.program = None
+
+
+def create_pipeline():
+    """
+    Create the shader pipeline for the current GL context
+    Returns:
+        ShaderPipeline: Ready pipeline, or None (with the reason printed) if
+                        the context cannot run it
+    """
+    if not ShaderPipeline.supported():
+        major, minor = glsl_version()
+        print(f"GLSL 3.30 unavailable (GLSL {major}.{minor:02d}), using fixed-function rendering")
+        return None
+    pipeline = ShaderPipeline()
+    try:
+        pipeline.init_gl()
+    except RuntimeError as e:
+        print(f"Shader pipeline unavailable, using fixed-function rendering: {e}")
+        return None
+    return pipeline
@@ -0,0 +1,285 @@
+"""
+Frame profiler for 3D city simulation
+Times nested frame phases, counts draw calls and primitives per phase and
+optionally measures GPU time with GL timestamp queries
+"""
+import contextlib
+import ctypes
+import json
+import time
+
+import numpy as np
+from OpenGL.GL import *
+
+from utils.timing import summarize_times
+
+
+# Vertices per primitive for the independent primitive types
+PRIMITIVE_VERTICES = {
+    GL_POINTS: 1, GL_LINES: 2, GL_TRIANGLES: 3, GL_QUADS: 4,
+}
+
+
+class DrawCounters:
+    def __init__(self):
+        """Running totals of draw calls issued (read as deltas by the profiler)"""
+        self.calls = 0
+        self.primitives = 0
+
+
+# Incremented at every draw site; a few integer adds per call, always on
+draw_counters = DrawCounters()
+
+
+def count_draw(primitive, vertices, instances=1, calls=1):
+    """
+    Record draw calls in draw_counters
+    Args:
+        primitive: GL primitive type
+        vertices: Vertices per instance (total over all ranges of a multi-draw)
+        instances: Instance count
+        calls: GL draw calls issued
+    """
+    draw_counters.calls += calls
+    per_primitive = PRIMITIVE_VERTICES.get(primitive)
+    if per_primitive is not None:
+        draw_counters.primitives += vertices // per_primitive * instances
+    else:
+        # Strips and fans: one primitive per vertex after the first two
+        draw_counters.primitives += max(vertices - 2 * calls, 0) * instances
+
+
+# Ring buffer record of one timed phase
+EVENT_DTYPE = np.dtype([
+    ('frame', np.int32),
+    ('name', np.int16),            # Index into FrameProfiler.names
+    ('depth', np.int8),
+    ('start', np.float64),         # Seconds since the profiler was created
+    ('duration', np.float64),      # Milliseconds
+    ('calls', np.int32),
+    ('primitives', np.int64),
+    ('gpu_start', np.float64),     # Seconds on the GPU clock (NaN if not measured)
+    ('gpu_duration', np.float64),  # Milliseconds (NaN if not measured)
+])
+
+# Returned by phase() while disabled: entering it does nothing
+NULL_PHASE = contextlib.nullcontext()
+
+
+class Phase:
+    __slots__ = ('profiler', 'name_id', 'depth', 'start', 'calls', 'primitives', 'queries')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name_id = profiler.name_ids.get(name)
+        if self.name_id is None:
+            # Register on entry so the summary lists outer phases first
+            self.name_id = profiler.name_ids[name] = len(profiler.names)
+            profiler.names.append(name)
+
+    def __enter__(self):
+        profiler = self.profiler
+        self.depth = profiler.depth
+        profiler.depth += 1
+        self.queries = profiler.gpu_timestamp() if profiler.gpu else None
+        self.calls = draw_counters.calls
+        self.primitives = draw_counters.primitives
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        profiler = self.profiler
+        if self.queries is not None:
+            self.queries = (self.queries, profiler.gpu_timestamp())
+        profiler.depth -= 1
+        profiler.record(self, end)
+        return False
+
+
+class FrameProfiler:
+    def __init__(self, capacity=16384, gpu=False):
+        """
+        Initialize the profiler (disabled until enabled is set)
+        Args:
+            capacity: Phases kept in the ring buffer (oldest are overwritten)
+            gpu: Also measure GPU time with GL timestamp queries (needs
+                 GL 3.3 or ARB_timer_query and a current context)
+        """
+        self.enabled = False
+        self.gpu = gpu
+        self.events = np.zeros(capacity, dtype=EVENT_DTYPE)
+        self.written = 0
+        self.frame = 0
+        self.depth = 0
+        self.epoch = time.perf_counter()
+
+        # Phase names in first-seen order
+        self.names = []
+        self.name_ids = {}
+
+        # Timestamp queries in flight: (event number, begin query, end query)
+        self.pending = []
+        self.free_queries = []
+
+    def phase(self, name):
+        """
+        Time a block of code
+        Args:
+            name: Phase name (phases nest: 'render' > 'buildings')
+        Returns:
+            Context manager recording the phase when it exits
+        """
+        if not self.enabled:
+            return NULL_PHASE
+        return Phase(self, name)
+
+    def gpu_timestamp(self):
+        """
+        Issue a GL timestamp query
+        Returns:
+            int: Query object, read back by end_frame()
+        """
+        if not self.free_queries:
+            self.free_queries.extend(int(q) for q in glGenQueries(64))
+        query = self.free_queries.pop()
+        glQueryCounter(query, GL_TIMESTAMP)
+        return query
+
+    def record(self, phase, end):
+        """Write a finished phase into the ring buffer"""
+        event = self.events[self.written % len(self.events)]
+        event['frame'] = self.frame
+        event['name'] = phase.name_id
+        event['depth'] = phase.depth
+        event['start'] = phase.start - self.epoch
+        event['duration'] = (end - phase.start) * 1000.0
+        event['calls'] = draw_counters.calls - phase.calls
+        event['primitives'] = draw_counters.primitives - phase.primitives
+        event['gpu_start'] = np.nan
+        event['gpu_duration'] = np.nan
+        if phase.queries is not None:
+            self.pending.append((self.written,) + phase.queries)
+        self.written += 1
+
+    def end_frame(self):
+        """Mark the end of a frame and collect GPU times that are ready"""
+        if not self.enabled and not self.pending:
+            return
+        self.frame += 1
+
+        # Results arrive in submission order; stop at the first one not ready
+        # instead of stalling the pipeline
+        result = ctypes.c_uint64()
+        resolved = 0
+        for number, begin, end in self.pending:
+            if not glGetQueryObjectiv(end, GL_QUERY_RESULT_AVAILABLE):
+                break
+            if self.written - number <= len(self.events):
+                glGetQueryObjectui64v(begin, GL_QUERY_RESULT, ctypes.byref(result))
+                gpu_start = result.value
+                glGetQueryObjectui64v(end, GL_QUERY_RESULT, ctypes.byref(result))
+                event = self.events[number % len(self.events)]
+                event['gpu_start'] = gpu_start * 1e-9
+                event['gpu_duration'] = (result.value - gpu_start) * 1e-6
+            self.free_queries.extend((begin, end))
+            resolved += 1
+        del self.pending[:resolved]
+
+    def recorded(self):
+        """
+        Get the events still in the ring buffer
+        Returns:
+            np.ndarray: EVENT_DTYPE records, oldest first
+        """
+        capacity = len(self.events)
+        if self.written <= capacity:
+            return self.events[:self.written].copy()
+        split = self.written % capacity
+        return np.concatenate([self.events[split:], self.events[:split]])
+
+    def summary(self):
+        """
+        Summarize every phase over the recorded frames
+        Returns:
+            dict: Phase name -> timing summary (ms) plus depth and mean draw
+                  calls, primitives and GPU time per occurrence
+        """
+        events = self.recorded()
+        result = {}
+        for name_id, name in enumerate(self.names):
+            selected = events[events['name'] == name_id]
+            if len(selected) == 0:
+                continue
+            entry = summarize_times(selected['duration'])
+            entry['depth'] = int(selected['depth'].min())
+            entry['calls'] = float(selected['calls'].mean())
+            entry['primitives'] = float(selected['primitives'].mean())
+            gpu = selected['gpu_duration'][~np.isnan(selected['gpu_duration'])]
+            if len(gpu):
+                entry['gpu_mean'] = float(gpu.mean())
+            result[name] = entry
+        return result
+
+    def print_summary(self):
+        """Print the per-phase summary as an indented table"""
+        summary = self.summary()
+        if not summary:
+            return
+        print(f"Frame profile ({self.frame} frames):")
+        print(f"  {'phase':<22}{'mean ms':>9}{'p95 ms':>9}{'gpu ms':>9}{'calls':>8}{'prims':>10}")
+        for name, entry in summary.items():
+            label = '  ' * entry['depth'] + name
+            gpu = f"{entry['gpu_mean']:9.3f}" if 'gpu_mean' in entry else f"{'-':>9}"
+            print(f"  {label:<22}{entry['mean']:9.3f}{entry['p95']:9.3f}{gpu}"
+                  f"{entry['calls']:8.1f}{entry['primitives']:10.0f}")
+
+    def chrome_trace(self):
+        """
+        Convert the recorded events to the Chrome trace event format
+        (open in chrome://tracing or https://ui.perfetto.dev)
+        Returns:
+            dict: Trace with CPU phases on thread 1 and GPU phases on thread 2
+        """
+        events = self.recorded()
+        trace = [
+            {'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': 1, 'args': {'name': 'CPU'}},
+            {'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': 2, 'args': {'name': 'GPU'}},
+        ]
+
+        # Place the GPU clock on the CPU timeline at the first measured phase
+        measured = events[~np.isnan(events['gpu_start'])]
+        gpu_offset = measured['start'][0] - measured['gpu_start'][0] if len(measured) else 0.0
+
+        for event in events:
+            name = self.names[event['name']]
+            args = {'frame': int(event['frame']), 'calls': int(event['calls']),
+                    'primitives': int(event['primitives'])}
+            trace.append({
+                'name': name, 'ph': 'X', 'pid': 1, 'tid': 1,
+                'ts': event['start'] * 1e6, 'dur': event['duration'] * 1e3, 'args': args,
+            })
+            if not np.isnan(event['gpu_start']):
+                trace.append({
+                    'name': name, 'ph': 'X', 'pid': 1, 'tid': 2,
+                    'ts': (event['gpu_start'] + gpu_offset) * 1e6,
+                    'dur': event['gpu_duration'] * 1e3, 'args': args,
+                })
+        return {'traceEvents': trace, 'displayTimeUnit': 'ms'}
+
+    def write_chrome_trace(self, path):
+        """
+        Write the recorded events as Chrome trace JSON
+        Args:
+            path: Output file path
+        """
+        with open(path, 'w') as f:
+            json.dump(self.chrome_trace(), f)
+        print(f"Wrote frame trace to {path}")
+
+    def release(self):
+        """Delete the GL query objects (must be called from the GL thread)"""
+        queries = self.free_queries + [q for _, begin, end in self.pending for q in (begin, end)]
+        if queries:
+            glDeleteQueries(len(queries), np.array(queries, dtype=np.uint32))
+        self.free_queries, self.pending = [], []
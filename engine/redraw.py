@@ -0,0 +1,85 @@
+"""
+Render on demand for 3D city simulation
+Tracks whether anything visible changed since the last frame was drawn, so an
+idle view (paused cars, still camera) is not redrawn every frame
+"""
+
+
+class RedrawTracker:
+    def __init__(self):
+        """Dirty flag plus revision counters of the watched state"""
+        # Disabled: every frame is drawn (--continuous)
+        self.enabled = True
+
+        # The first frame is always drawn
+        self.dirty = True
+
+        # Watched name -> revision seen when the last frame was drawn
+        self.revisions = {}
+
+        # Totals for reporting
+        self.rendered = 0
+        self.skipped = 0
+        self.render_cpu = 0.0
+        self.idle_time = 0.0
+
+    def invalidate(self):
+        """Draw the next frame (something visible changed)"""
+        self.dirty = True
+
+    def watch(self, name, revision):
+        """
+        Compare a revision counter with the one seen at the last check
+        Args:
+            name: What the counter belongs to, e.g. 'camera'
+            revision: Its current value (any change means a redraw)
+        """
+        if self.revisions.get(name) != revision:
+            self.revisions[name] = revision
+            self.dirty = True
+
+    @property
+    def needed(self):
+        """True if the next frame must be drawn"""
+        return self.dirty or not self.enabled
+
+    def drawn(self, cpu_seconds):
+        """
+        Record a drawn frame (clears the dirty flag)
+        Args:
+            cpu_seconds: CPU time the render thread spent on it
+        """
+        self.dirty = False
+        self.rendered += 1
+        self.render_cpu += cpu_seconds
+
+    def idle(self, seconds):
+        """
+        Record a skipped frame
+        Args:
+            seconds: Time slept waiting for events instead
+        """
+        self.skipped += 1
+        self.idle_time += seconds
+
+    def summary(self, fps):
+        """
+        Summarize the frames drawn and skipped
+        Args:
+            fps: Frame rate cap the loop would have drawn at (0 = uncapped)
+        Returns:
+            dict: Frames drawn and skipped, seconds idle, mean render CPU ms
+                  and the CPU seconds redrawing would have cost while idle
+        """
+        mean_cpu = self.render_cpu / self.rendered if self.rendered else 0.0
+
+        # Redrawing an unchanged view keeps the render thread busy for
+        # mean_cpu per frame, at most all of the time
+        busy = min(1.0, mean_cpu * fps) if fps else 1.0
+        return {
+            'rendered': self.rendered,
+            'skipped': self.skipped,
+            'idle_s': self.idle_time,
+            'render_cpu_ms': mean_cpu * 1000.0,
+            'cpu_saved_s': self.idle_time * busy,
+        }
@@ -0,0 +1,228 @@
+"""
+Offscreen render farm for 3D city simulation
+Renders the frames of a camera path on worker processes, each with its own
+offscreen GL context and the same seeded city, and writes them in order
+"""
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from engine.capture import FrameWriter
+
+
+# Frames per task; idle workers take the next task, so tasks reach every
+# worker in increasing frame order
+FARM_CHUNK = 8
+
+# Tasks in flight per worker (bounds the rendered frames waiting to be written)
+FARM_QUEUE = 2
+
+
+class CameraPath:
+    def __init__(self, keyframes):
+        """
+        Camera flythrough interpolated linearly between keyframes
+        Args:
+            keyframes: Dicts with 'frame', 'yaw', 'pitch', 'zoom' and 'target'
+                       ([x, y, z]), the Camera attributes at that frame
+        """
+        if not keyframes:
+            raise ValueError("camera path has no keyframes")
+        keyframes = sorted(keyframes, key=lambda keyframe: keyframe['frame'])
+        self.frames = np.array([keyframe['frame'] for keyframe in keyframes], dtype=np.float64)
+        self.poses = np.array([
+            (keyframe['yaw'], keyframe['pitch'], keyframe['zoom'], *keyframe['target'])
+            for keyframe in keyframes
+        ], dtype=np.float64)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a camera path saved by save()
+        Args:
+            path: JSON file with a 'keyframes' list
+        Returns:
+            CameraPath: The path
+        """
+        with open(path) as f:
+            return cls(json.load(f)['keyframes'])
+
+    def save(self, path):
+        """
+        Save the keyframes as JSON
+        Args:
+            path: Output file path
+        """
+        keyframes = [
+            {'frame': int(frame), 'yaw': yaw, 'pitch': pitch, 'zoom': zoom, 'target': target}
+            for frame, (yaw, pitch, zoom, *target) in zip(self.frames, self.poses.tolist())
+        ]
+        with open(path, 'w') as f:
+            json.dump({'keyframes': keyframes}, f, indent=2)
+
+    @staticmethod
+    def keyframe(frame, camera):
+        """
+        Record a camera's current pose as a keyframe
+        Args:
+            frame: Frame number of the keyframe
+            camera: Camera to record
+        Returns:
+            dict: Keyframe for CameraPath()
+        """
+        return {'frame': frame, 'yaw': float(camera.yaw), 'pitch': float(camera.pitch),
+                'zoom': float(camera.zoom), 'target': [float(v) for v in camera.target]}
+
+    @property
+    def frame_count(self):
+        """Frames from 0 to the last keyframe"""
+        return int(self.frames[-1]) + 1
+
+    def pose(self, frame):
+        """
+        Interpolated pose at a frame (held before the first and after the last keyframe)
+        Returns:
+            np.ndarray: (yaw, pitch, zoom, target x, target y, target z)
+        """
+        return np.array([np.interp(frame, self.frames, column) for column in self.poses.T])
+
+    def apply(self, camera, frame):
+        """
+        Move a camera to its pose at a frame
+        Args:
+            camera: Camera to set
+            frame: Frame number
+        """
+        yaw, pitch, zoom, x, y, z = self.pose(frame)
+        camera.yaw, camera.pitch, camera.zoom = yaw, pitch, zoom
+        camera.target[:] = (x, y, z)
+        camera.revision += 1
+
+
+def shard_frames(count, chunk=FARM_CHUNK):
+    """
+    Split a frame range into tasks
+    Args:
+        count: Number of frames
+        chunk: Frames per task
+    Returns:
+        list: (start, end) frame ranges in order
+    """
+    return [(start, min(start + chunk, count)) for start in range(0, count, chunk)]
+
+
+# State of a farm worker process (set by init_worker)
+_worker = {}
+
+
+def init_worker(factory, path, steps_per_frame):
+    """
+    Set up a farm worker (the simulation is created on the first task)
+    Args:
+        factory: Picklable callable returning a headless CitySimulation
+        path: CameraPath to render
+        steps_per_frame: Simulation steps between two frames
+    """
+    _worker.update(factory=factory, path=path, steps_per_frame=steps_per_frame,
+                   simulation=None, steps=0)
+
+
+def start_simulation():
+    """Create the worker's simulation at step 0"""
+    simulation = _worker['factory']()
+
+    # A frame must not depend on the frames this worker rendered before it:
+    # no LOD hysteresis, and cars drawn at the latest step (the clock never
+    # advances, steps are taken directly)
+    for selector in (simulation.building_mesh.lod, simulation.tree_renderer.lod):
+        selector.hysteresis = 0.0
+    simulation.sim_clock.accumulator = simulation.sim_clock.step
+    _worker['simulation'] = simulation
+    _worker['steps'] = 0
+
+
+def render_frames(start, end):
+    """
+    Render a range of frames (on a worker)
+    Args:
+        start, end: Frame range
+    Returns:
+        np.ndarray: (end - start, height, width, 4) uint8 frames as read from GL
+    """
+    steps_per_frame = _worker['steps_per_frame']
+    if _worker['simulation'] is None or _worker['steps'] > start * steps_per_frame:
+        # Cars only move forward: rebuild the city to go back in time
+        start_simulation()
+    simulation = _worker['simulation']
+
+    frames = []
+    for frame in range(start, end):
+        # Frame n shows the simulation after n * steps_per_frame steps
+        while _worker['steps'] < frame * steps_per_frame:
+            simulation.step_simulation()
+            _worker['steps'] += 1
+        _worker['path'].apply(simulation.camera, frame)
+        simulation.render()
+        frames.append(simulation.renderer.read_pixels())
+    return np.stack(frames)
+
+
+def render_path(factory, path, output, width, height, workers=None, steps_per_frame=1,
+                chunk=FARM_CHUNK, writer_workers=2):
+    """
+    Render every frame of a camera path and write the frames in order
+    (the output is identical for any number of workers)
+    Args:
+        factory: Picklable callable returning a headless CitySimulation of
+                 width x height; every call must build the same city
+        path: CameraPath
+        output: PNG directory, raw frame file or video file (see FrameWriter)
+        width, height: Frame size
+        workers: Rendering processes (all cores if None; 1 renders in this process)
+        steps_per_frame: Simulation steps between two frames
+        chunk: Frames per task
+        writer_workers: PNG encoding threads
+    Returns:
+        dict: Frames, workers, seconds, frames per second and bytes written
+    """
+    workers = workers or os.cpu_count() or 1
+    tasks = shard_frames(path.frame_count, chunk)
+    writer = FrameWriter(output, width, height, workers=writer_workers)
+    start_time = time.perf_counter()
+
+    def write(start, frames):
+        for number, frame in enumerate(frames, start):
+            buffer = writer.acquire()
+            buffer[:] = frame
+            writer.submit(number, buffer)
+
+    if workers <= 1:
+        init_worker(factory, path, steps_per_frame)
+        for start, end in tasks:
+            write(start, render_frames(start, end))
+        _worker['simulation'].scene.release()
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                 initargs=(factory, path, steps_per_frame)) as pool:
+            # Results are written in task order as they come in
+            pending = deque()
+            for task in tasks:
+                pending.append((task[0], pool.submit(render_frames, *task)))
+                if len(pending) >= workers * FARM_QUEUE:
+                    write(pending[0][0], pending.popleft()[1].result())
+            while pending:
+                write(pending[0][0], pending.popleft()[1].result())
+    writer.close()
+
+    seconds = time.perf_counter() - start_time
+    return {
+        'frames': path.frame_count,
+        'workers': workers,
+        'seconds': seconds,
+        'fps': path.frame_count / seconds if seconds > 0 else 0.0,
+        'bytes': writer.bytes_written,
+    }
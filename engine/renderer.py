@@ -3,10 +3,50 @@ OpenGL Renderer for 3D city simulation
 Handles rendering setup and scene drawing
 """
 from OpenGL.GL import *
-from OpenGL.GLU import *
+import numpy as np
 import pygame
 
 
+class ScaledFramebuffer:
+    def __init__(self):
+        """Framebuffer object frames are drawn into below full resolution
+        (storage is allocated on the GL thread by resize)"""
+        self.framebuffer = None
+        self.renderbuffers = []
+        self.width = 0
+        self.height = 0
+    
+    def resize(self, width, height):
+        """
+        Make sure the color and depth storage has a given size
+        Args:
+            width, height: Framebuffer size in pixels
+        """
+        if self.framebuffer is not None and (width, height) == (self.width, self.height):
+            return
+        if self.framebuffer is None:
+            self.framebuffer = glGenFramebuffers(1)
+            self.renderbuffers = list(glGenRenderbuffers(2))
+        glBindFramebuffer(GL_FRAMEBUFFER, self.framebuffer)
+        color, depth = self.renderbuffers
+        glBindRenderbuffer(GL_RENDERBUFFER, color)
+        glRenderbufferStorage(GL_RENDERBUFFER, GL_RGBA8, width, height)
+        glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_RENDERBUFFER, color)
+        glBindRenderbuffer(GL_RENDERBUFFER, depth)
+        glRenderbufferStorage(GL_RENDERBUFFER, GL_DEPTH_COMPONENT24, width, height)
+        glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_DEPTH_ATTACHMENT, GL_RENDERBUFFER, depth)
+        glBindRenderbuffer(GL_RENDERBUFFER, 0)
+        self.width, self.height = width, height
+    
+    def release(self):
+        """Free the framebuffer (must be called from the GL thread)"""
+        if self.framebuffer is not None:
+            glDeleteRenderbuffers(len(self.renderbuffers), self.renderbuffers)
+            glDeleteFramebuffers(1, [self.framebuffer])
+            self.framebuffer = None
+            self.renderbuffers = []
+
+
 class Renderer:
     def __init__(self, width=800, height=600):
         """
@@ -19,17 +59,56 @@ class Renderer:
         self.height = height
         self.display = None
         
-    def init_pygame(self):
-        """Initialize pygame and OpenGL context"""
+        # Perspective parameters (vertical FOV in degrees, clip planes)
+        self.fov = 45.0
+        self.near = 0.1
+        self.far = 500.0
+        
+        # Offscreen context when running headless (no window)
+        self.offscreen = None
+        
+        # FrameCapture reading every presented frame back (None = off)
+        self.capture = None
+        
+        # Dynamic resolution: below 1, frames are drawn into a smaller
+        # framebuffer and stretched to the window when presented
+        self.render_scale = 1.0
+        self.scaled = ScaledFramebuffer()
+        
+    def init_pygame(self, hidden=False):
+        """
+        Initialize pygame and OpenGL context
+        Args:
+            hidden: Create the window hidden (used by benchmarks)
+        """
         pygame.init()
         
         # Create OpenGL-enabled pygame window
-        self.display = pygame.display.set_mode(
-            (self.width, self.height),
-            pygame.DOUBLEBUF | pygame.OPENGL
-        )
+        flags = pygame.DOUBLEBUF | pygame.OPENGL
+        if hidden:
+            flags |= pygame.HIDDEN
+        self.display = pygame.display.set_mode((self.width, self.height), flags)
         pygame.display.set_caption("3D City Simulation")
         
+        self.setup_gl_state()
+        
+    def init_offscreen(self, backend='egl'):
+        """
+        Initialize a headless OpenGL context (no window, no display needed)
+        Args:
+            backend: 'egl' or 'osmesa' (see engine.offscreen)
+        """
+        from engine.offscreen import OffscreenContext
+        self.offscreen = OffscreenContext(self.width, self.height, backend)
+        self.setup_gl_state()
+        
+    @property
+    def headless(self):
+        """True when rendering offscreen"""
+        return self.offscreen is not None
+        
+    def setup_gl_state(self):
+        """Configure the GL state shared by windowed and offscreen rendering"""
         # Setup OpenGL viewport and perspective
         self.setup_perspective()
         
@@ -43,18 +122,92 @@ class Renderer:
         """Configure OpenGL perspective projection"""
         glViewport(0, 0, self.width, self.height)
         glMatrixMode(GL_PROJECTION)
-        glLoadIdentity()
         
-        # Set perspective: FOV=45, aspect ratio, near=0.1, far=500.0
-        gluPerspective(45, self.width / self.height, 0.1, 500.0)
+        # Set perspective: FOV=45, aspect ratio, near=0.1, far=500.0 (the
+        # gluPerspective matrix, loaded directly so GLU is never imported)
+        glLoadMatrixd(np.ascontiguousarray(self.projection_matrix().T))
         
         glMatrixMode(GL_MODELVIEW)
         glLoadIdentity()
     
+    def projection_matrix(self, far=None):
+        """
+        Get the projection matrix set by setup_perspective (same as gluPerspective would build)
+        Args:
+            far: Far plane distance instead of self.far (e.g. a shorter
+                 draw distance for culling)
+        Returns:
+            np.ndarray: 4x4 matrix for column vectors (clip = P @ eye)
+        """
+        f = 1.0 / np.tan(np.radians(self.fov) / 2)
+        aspect = self.width / self.height
+        near, far = self.near, self.far if far is None else far
+        return np.array([
+            [f / aspect, 0.0, 0.0, 0.0],
+            [0.0, f, 0.0, 0.0],
+            [0.0, 0.0, (far + near) / (near - far), 2 * far * near / (near - far)],
+            [0.0, 0.0, -1.0, 0.0],
+        ])
+    
+    def read_pixels(self):
+        """
+        Read the rendered frame back (synchronously)
+        Returns:
+            np.ndarray: (height, width, 4) uint8 RGBA rows, bottom row first
+        """
+        glPixelStorei(GL_PACK_ALIGNMENT, 4)
+        pixels = glReadPixels(0, 0, self.width, self.height, GL_RGBA, GL_UNSIGNED_BYTE)
+        return np.frombuffer(pixels, dtype=np.uint8).reshape(self.height, self.width, 4)
+    
+    @property
+    def output_framebuffer(self):
+        """Framebuffer presented frames end up in (the window's is 0)"""
+        return self.offscreen.framebuffer if self.headless else 0
+    
+    def render_size(self):
+        """
+        Get the size frames are drawn at
+        Returns:
+            tuple: (width, height) in pixels after render_scale
+        """
+        if self.render_scale >= 1.0:
+            return self.width, self.height
+        return (max(1, round(self.width * self.render_scale)),
+                max(1, round(self.height * self.render_scale)))
+    
+    def begin_frame(self):
+        """Bind the framebuffer this frame is drawn into (scaled or not)"""
+        if self.render_scale < 1.0:
+            width, height = self.render_size()
+            self.scaled.resize(width, height)
+            glBindFramebuffer(GL_FRAMEBUFFER, self.scaled.framebuffer)
+            glViewport(0, 0, width, height)
+        else:
+            glBindFramebuffer(GL_FRAMEBUFFER, self.output_framebuffer)
+            glViewport(0, 0, self.width, self.height)
+    
+    def upscale(self):
+        """Stretch the scaled frame over the output framebuffer and bind it"""
+        output = self.output_framebuffer
+        glBindFramebuffer(GL_READ_FRAMEBUFFER, self.scaled.framebuffer)
+        glBindFramebuffer(GL_DRAW_FRAMEBUFFER, output)
+        glBlitFramebuffer(0, 0, self.scaled.width, self.scaled.height, 0, 0, self.width, self.height,
+                          GL_COLOR_BUFFER_BIT, GL_LINEAR)
+        glBindFramebuffer(GL_FRAMEBUFFER, output)
+        glViewport(0, 0, self.width, self.height)
+    
     def clear_screen(self):
         """Clear screen and depth buffer before rendering"""
         glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
     
     def swap_buffers(self):
         """Display the rendered frame"""
-        pygame.display.flip()
+        if self.render_scale < 1.0:
+            self.upscale()
+        if self.capture is not None:
+            self.capture.capture()
+        if self.headless:
+            # Nothing to present; wait so frame timings include GPU work
+            glFinish()
+        else:
+            pygame.display.flip()
@@ -0,0 +1,184 @@
+"""
+Scene management for 3D city simulation
+Holds everything drawn for one city so a new city can be built on a worker
+thread and swapped in whole, and queues commands from other threads (the
+control GUI) for the main loop
+"""
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from engine.mesh import CityMesh
+from objects.car import CarFleet
+
+
+class Scene:
+    def __init__(self, buildings=(), trees=(), cars=None, building_mesh=None, tree_instances=None):
+        """
+        One city: its objects and their baked meshes
+        Args:
+            buildings, trees: Building and Tree sequences
+            cars: CarFleet driving in the city
+            building_mesh: CityMesh baked from the buildings
+            tree_instances: TreeRenderer.bake result for the trees
+        """
+        self.buildings = buildings
+        self.trees = trees
+        self.cars = cars if cars is not None else CarFleet()
+        self.building_mesh = building_mesh if building_mesh is not None else CityMesh()
+        self.tree_instances = tree_instances
+
+    def upload(self):
+        """Upload the baked building meshes now rather than on first draw
+        (must be called from the GL thread)"""
+        for mesh in (self.building_mesh, self.building_mesh.far_mesh):
+            if mesh.needs_upload:
+                mesh.upload()
+
+    def release(self):
+        """Free the scene's GPU buffers (must be called from the GL thread)"""
+        self.building_mesh.release()
+
+
+def bake_scene(buildings, trees, cars, tree_renderer):
+    """
+    Bake the meshes of a city into a Scene (no GL calls: safe on any thread,
+    buffers are uploaded when the scene is first drawn)
+    Args:
+        buildings, trees: Building and Tree sequences
+        cars: CarFleet driving in the city
+        tree_renderer: TreeRenderer that will draw the trees
+    Returns:
+        Scene: The baked scene
+    """
+    building_mesh = CityMesh()
+    building_mesh.build(buildings)
+    return Scene(buildings, trees, cars, building_mesh, tree_renderer.bake(trees))
+
+
+class SceneBuilder:
+    def __init__(self, notify=None):
+        """
+        Build scenes one at a time on a background thread
+        Args:
+            notify: Called on the worker thread when a build finishes (e.g.
+                    to wake a main loop sleeping on events)
+        """
+        self.notify = notify
+        self.executor = None
+        self.future = None
+
+        # Request made while a build was running (the latest one wins)
+        self.queued = None
+
+        # Seconds the last finished build took
+        self.duration = 0.0
+
+    @property
+    def busy(self):
+        """True while a build is running"""
+        return self.future is not None
+
+    def submit(self, build, *args):
+        """
+        Start building a scene; while another build runs, the request waits
+        for it (replacing any request already waiting)
+        Args:
+            build: Function returning a Scene, called on the worker thread
+            args: Arguments for build
+        Returns:
+            bool: True if the build started now
+        """
+        if self.future is not None:
+            self.queued = (build, args)
+            return False
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='scene-builder')
+        self.future = self.executor.submit(self.timed, build, args)
+        if self.notify is not None:
+            # Once done, so poll() sees the result when the notified loop wakes
+            self.future.add_done_callback(lambda future: self.notify())
+        return True
+
+    @staticmethod
+    def timed(build, args):
+        """Run a build and measure it (on the worker thread)"""
+        start = time.perf_counter()
+        scene = build(*args)
+        return scene, time.perf_counter() - start
+
+    def poll(self):
+        """
+        Collect a finished build without waiting (call once per frame)
+        Returns:
+            Scene: The new scene, or None if nothing has finished
+        """
+        if self.future is None or not self.future.done():
+            return None
+        future, self.future = self.future, None
+        if self.queued is not None:
+            build, args = self.queued
+            self.queued = None
+            self.submit(build, *args)
+        try:
+            scene, self.duration = future.result()
+        except Exception as e:
+            print(f"City generation failed: {e}")
+            return None
+        return scene
+
+    def wait(self):
+        """
+        Block until the running build finishes
+        Returns:
+            Scene: The new scene, or None if nothing was running (or it failed)
+        """
+        if self.future is None:
+            return None
+        self.future.exception()
+        return self.poll()
+
+    def shutdown(self):
+        """Drop any waiting request and stop the worker thread"""
+        self.queued = None
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+
+class CommandQueue:
+    def __init__(self, notify=None):
+        """
+        Commands posted from any thread, run by the main loop
+        Args:
+            notify: Called after each post (e.g. to wake a main loop sleeping
+                    on events)
+        """
+        self.queue = queue.SimpleQueue()
+        self.notify = notify
+
+    def post(self, command, *args):
+        """
+        Queue a call for the main loop (thread-safe)
+        Args:
+            command: Callable to run
+            args: Arguments for it
+        """
+        self.queue.put((command, args))
+        if self.notify is not None:
+            self.notify()
+
+    def drain(self):
+        """
+        Run every queued command in posting order (main loop only)
+        Returns:
+            int: Number of commands run
+        """
+        count = 0
+        while True:
+            try:
+                command, args = self.queue.get_nowait()
+            except queue.Empty:
+                return count
+            command(*args)
+            count += 1
@@ -0,0 +1,186 @@
+"""
+GLSL helpers for 3D city simulation
+Compiles shader programs and reports which GL features are available
+"""
+from OpenGL.GL import *
+
+
+# Per-vertex lighting equivalent to the fixed-function GL_LIGHT0 setup in
+# Lighting.setup (color material drives ambient and diffuse)
+FIXED_FUNCTION_LIGHTING = """
+vec4 fixed_function_lighting(vec4 eye_position, vec3 normal, vec4 base_color)
+{
+    vec4 light_position = gl_LightSource[0].position;
+    vec3 light_dir = normalize(light_position.xyz - eye_position.xyz * light_position.w);
+    vec3 half_vector = normalize(light_dir + vec3(0.0, 0.0, 1.0));
+
+    float diffuse = max(dot(normal, light_dir), 0.0);
+    float specular = 0.0;
+    if (diffuse > 0.0) {
+        specular = pow(max(dot(normal, half_vector), 0.0), gl_FrontMaterial.shininess);
+    }
+
+    vec4 color = base_color * (gl_LightModel.ambient + gl_LightSource[0].ambient);
+    color += base_color * gl_LightSource[0].diffuse * diffuse;
+    color += gl_FrontMaterial.specular * gl_LightSource[0].specular * specular;
+    return vec4(color.rgb, 1.0);
+}
+"""
+
+# Shared fragment shader: output the interpolated lit color
+COLOR_FRAGMENT_SHADER = """
+#version 120
+varying vec4 lit_color;
+
+void main()
+{
+    gl_FragColor = lit_color;
+}
+"""
+
+
+# GLSL 3.30 core pipeline (engine.pipeline): matrices and light come from
+# uniforms, each vertex is placed by its instance's offset, scale and yaw
+# and lit per vertex like GL_LIGHT0 with color material
+CORE_VERTEX_SHADER = """
+#version 330 core
+layout(location = 0) in vec3 position;
+layout(location = 1) in vec3 normal;
+layout(location = 2) in vec3 color;
+layout(location = 3) in vec3 instance_offset;
+layout(location = 4) in vec3 instance_scale;
+layout(location = 5) in vec3 instance_color;
+layout(location = 6) in float instance_yaw;
+
+uniform mat4 view;
+uniform mat4 projection;
+uniform vec4 light_position;
+uniform vec4 light_ambient;
+uniform vec4 light_diffuse;
+uniform vec4 light_specular;
+uniform vec4 scene_ambient;
+uniform float shininess;
+
+// Billboards turn about the vertical axis to face the camera
+uniform bool billboard;
+uniform vec3 camera_right;
+
+out vec4 lit_color;
+
+void main()
+{
+    vec3 local;
+    vec3 world_normal;
+    if (billboard) {
+        local = camera_right * position.x * instance_scale.x + vec3(0.0, position.y * instance_scale.y, 0.0);
+        world_normal = vec3(-camera_right.z, 1.0, camera_right.x);
+    } else {
+        float c = cos(instance_yaw);
+        float s = sin(instance_yaw);
+        mat3 yaw = mat3(c, 0.0, -s, 0.0, 1.0, 0.0, s, 0.0, c);
+        local = yaw * (position * instance_scale);
+        world_normal = yaw * (normal / instance_scale);
+    }
+    vec4 world = vec4(instance_offset + local, 1.0);
+    vec4 eye = view * world;
+    vec3 n = normalize(mat3(view) * world_normal);
+
+    vec3 light_dir = normalize(light_position.xyz - eye.xyz * light_position.w);
+    vec3 half_vector = normalize(light_dir + vec3(0.0, 0.0, 1.0));
+    float diffuse = max(dot(n, light_dir), 0.0);
+    float specular = diffuse > 0.0 ? pow(max(dot(n, half_vector), 0.0), shininess) : 0.0;
+
+    vec4 base = vec4(color * instance_color, 1.0);
+    vec4 lit = base * (scene_ambient + light_ambient) + base * light_diffuse * diffuse
+               + light_specular * specular;
+    lit_color = vec4(lit.rgb, 1.0);
+    gl_Position = projection * eye;
+}
+"""
+
+CORE_FRAGMENT_SHADER = """
+#version 330 core
+in vec4 lit_color;
+out vec4 frag_color;
+
+void main()
+{
+    frag_color = lit_color;
+}
+"""
+
+
+def compile_shader(source, shader_type):
+    """
+    Compile a single shader stage
+    Args:
+        source: GLSL source code
+        shader_type: GL_VERTEX_SHADER or GL_FRAGMENT_SHADER
+    Returns:
+        int: Shader object id
+    """
+    shader = glCreateShader(shader_type)
+    glShaderSource(shader, source)
+    glCompileShader(shader)
+    if not glGetShaderiv(shader, GL_COMPILE_STATUS):
+        log = glGetShaderInfoLog(shader)
+        glDeleteShader(shader)
+        raise RuntimeError(f"Shader compile failed: {log}")
+    return shader
+
+
+def create_program(vertex_source, fragment_source, attributes=None):
+    """
+    Compile and link a shader program
+    Args:
+        vertex_source: Vertex shader GLSL source
+        fragment_source: Fragment shader GLSL source
+        attributes: Optional {name: location} bindings applied before linking
+    Returns:
+        int: Program object id
+    """
+    vertex_shader = compile_shader(vertex_source, GL_VERTEX_SHADER)
+    fragment_shader = compile_shader(fragment_source, GL_FRAGMENT_SHADER)
+
+    program = glCreateProgram()
+    glAttachShader(program, vertex_shader)
+    glAttachShader(program, fragment_shader)
+    for name, location in (attributes or {}).items():
+        glBindAttribLocation(program, location, name)
+    glLinkProgram(program)
+
+    # Shaders are owned by the program once linked
+    glDeleteShader(vertex_shader)
+    glDeleteShader(fragment_shader)
+
+    if not glGetProgramiv(program, GL_LINK_STATUS):
+        log = glGetProgramInfoLog(program)
+        glDeleteProgram(program)
+        raise RuntimeError(f"Program link failed: {log}")
+    return program
+
+
+def glsl_version():
+    """
+    Get the highest GLSL version of the current context
+    Returns:
+        tuple: (major, minor), (0, 0) if unknown
+    """
+    try:
+        text = glGetString(GL_SHADING_LANGUAGE_VERSION)
+        major, minor = text.decode().split()[0].split('.')[:2]
+        return int(major), int(minor[:2])
+    except Exception:
+        return 0, 0
+
+
+def instancing_supported():
+    """
+    Check for instanced draws with per-instance vertex attributes
+    Returns:
+        bool: True if glDrawElementsInstanced and glVertexAttribDivisor exist
+    """
+    try:
+        return bool(glDrawElementsInstanced) and bool(glVertexAttribDivisor)
+    except Exception:
+        return False
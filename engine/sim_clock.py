@@ -0,0 +1,70 @@
+"""
+Fixed-timestep simulation clock for 3D city simulation
+Advances the simulation in equal steps, independent of the render rate
+"""
+import time
+
+
+class SimulationClock:
+    def __init__(self, step_rate=60.0, time_scale=1.0, max_frame_time=0.25):
+        """
+        Initialize the clock
+        Args:
+            step_rate: Simulation steps per simulated second
+            time_scale: Simulated seconds per real second (2.0 = double speed)
+            max_frame_time: Longest real frame time accounted for; longer
+                            stalls are dropped instead of simulated in a burst
+        """
+        self.step = 1.0 / step_rate
+        self.time_scale = time_scale
+        self.max_frame_time = max_frame_time
+
+        # Unthrottled: step as often as fits in step_budget seconds per frame
+        self.unthrottled = False
+        self.step_budget = 0.010
+
+        # Simulated time not yet consumed by a step
+        self.accumulator = 0.0
+
+        # Totals for reporting
+        self.sim_time = 0.0
+        self.steps_taken = 0
+
+    @property
+    def alpha(self):
+        """
+        Fraction of a step between the last two simulation states to render at
+        Returns:
+            float: Interpolation factor in [0, 1]
+        """
+        if self.unthrottled:
+            return 1.0
+        return min(max(self.accumulator / self.step, 0.0), 1.0)
+
+    def advance(self, real_dt, step_function):
+        """
+        Run every simulation step that falls due in a frame
+        Args:
+            real_dt: Real seconds since the previous frame
+            step_function: Callable advancing the simulation by one step
+        Returns:
+            int: Number of steps run
+        """
+        if self.unthrottled:
+            steps = 0
+            deadline = time.perf_counter() + self.step_budget
+            while True:
+                step_function()
+                steps += 1
+                if time.perf_counter() >= deadline:
+                    break
+        else:
+            self.accumulator += min(real_dt, self.max_frame_time) * self.time_scale
+            steps = int(self.accumulator / self.step)
+            self.accumulator -= steps * self.step
+            for _ in range(steps):
+                step_function()
+
+        self.sim_time += steps * self.step
+        self.steps_taken += steps
+        return steps
@@ -0,0 +1,532 @@
+"""
+Instanced tree renderer for 3D city simulation
+Tessellates the trunk and foliage once per detail level and draws every tree
+as an instance of the level matching its camera distance
+"""
+import ctypes
+
+import numpy as np
+from OpenGL.GL import *
+
+from engine.culling import BoxHierarchy
+from engine.lod import LODSelector, box_distances
+from engine.mesh import StaticMesh, VERTEX_FLOATS
+from engine.profiler import count_draw
+from engine.shaders import (
+    COLOR_FRAGMENT_SHADER, FIXED_FUNCTION_LIGHTING, create_program, instancing_supported
+)
+from objects.tree import TREE_SPECIES, Tree, species_top
+
+
+# Generic attribute slot for the per-instance offset (clear of the
+# fixed-function aliases some drivers use for slots 0-5)
+OFFSET_LOCATION = 7
+
+# Detail levels: full mesh, low-poly mesh, camera-facing billboard
+TREE_LOD_DISTANCES = (60.0, 140.0)
+LOW_POLY_SLICES = 6
+LOW_POLY_STACKS = 4
+BILLBOARD_LEVEL = 2
+
+INSTANCED_VERTEX_SHADER = """
+#version 120
+attribute vec3 instance_offset;
+varying vec4 lit_color;
+""" + FIXED_FUNCTION_LIGHTING + """
+void main()
+{
+    vec4 world = gl_Vertex + vec4(instance_offset, 0.0);
+    vec4 eye = gl_ModelViewMatrix * world;
+    vec3 normal = normalize(gl_NormalMatrix * gl_Normal);
+    lit_color = fixed_function_lighting(eye, normal, gl_Color);
+    gl_Position = gl_ModelViewProjectionMatrix * world;
+}
+"""
+
+# Billboards turn about the vertical axis to face the camera: local x runs
+# along the camera's right vector and local y stays vertical
+BILLBOARD_VERTEX_SHADER = """
+#version 120
+attribute vec3 instance_offset;
+uniform vec3 camera_right;
+varying vec4 lit_color;
+""" + FIXED_FUNCTION_LIGHTING + """
+void main()
+{
+    vec3 local = camera_right * gl_Vertex.x + vec3(0.0, gl_Vertex.y, 0.0);
+    vec4 world = vec4(instance_offset + local, 1.0);
+    vec4 eye = gl_ModelViewMatrix * world;
+    vec3 facing = vec3(-camera_right.z, 1.0, camera_right.x);
+    vec3 normal = normalize(gl_NormalMatrix * facing);
+    lit_color = fixed_function_lighting(eye, normal, gl_Color);
+    gl_Position = gl_ModelViewProjectionMatrix * world;
+}
+"""
+
+
+def cylinder_geometry(radius, height, slices, color):
+    """
+    Tessellate an open vertical cylinder standing on y = 0 (like gluCylinder)
+    Args:
+        radius: Cylinder radius
+        height: Cylinder height
+        slices: Subdivisions around the axis
+        color: RGB color tuple
+    Returns:
+        tuple: (vertices (V, VERTEX_FLOATS) float32, indices (I,) uint32)
+    """
+    theta = np.linspace(0.0, 2.0 * np.pi, slices + 1, dtype=np.float32)
+    ring = np.stack([np.sin(theta), np.zeros_like(theta), -np.cos(theta)], axis=1)
+
+    vertices = np.empty((2, slices + 1, VERTEX_FLOATS), dtype=np.float32)
+    vertices[..., 0:3] = ring * radius
+    vertices[1, :, 1] = height
+    vertices[..., 3:6] = ring
+    vertices[..., 6:9] = color
+
+    bottom = np.arange(slices, dtype=np.uint32)
+    top = bottom + slices + 1
+    indices = np.stack([bottom, bottom + 1, top + 1, bottom, top + 1, top], axis=1)
+    return vertices.reshape(-1, VERTEX_FLOATS), indices.reshape(-1)
+
+
+def sphere_geometry(radius, center_y, slices, stacks, color):
+    """
+    Tessellate a UV sphere centered above the origin (like gluSphere)
+    Args:
+        radius: Sphere radius
+        center_y: Height of the sphere center
+        slices: Subdivisions around the vertical axis
+        stacks: Subdivisions from pole to pole
+        color: RGB color tuple
+    Returns:
+        tuple: (vertices (V, VERTEX_FLOATS) float32, indices (I,) uint32)
+    """
+    phi = np.linspace(0.0, np.pi, stacks + 1, dtype=np.float32)[:, None]
+    theta = np.linspace(0.0, 2.0 * np.pi, slices + 1, dtype=np.float32)[None, :]
+
+    # Poles lie on the z axis, as in gluSphere
+    normals = np.empty((stacks + 1, slices + 1, 3), dtype=np.float32)
+    normals[..., 0] = -np.sin(theta) * np.sin(phi)
+    normals[..., 1] = np.cos(theta) * np.sin(phi)
+    normals[..., 2] = np.cos(phi)
+
+    vertices = np.empty((stacks + 1, slices + 1, VERTEX_FLOATS), dtype=np.float32)
+    vertices[..., 0:3] = normals * radius
+    vertices[..., 1] += center_y
+    vertices[..., 3:6] = normals
+    vertices[..., 6:9] = color
+
+    row = (np.arange(stacks, dtype=np.uint32) * (slices + 1))[:, None]
+    col = np.arange(slices, dtype=np.uint32)[None, :]
+    a = row + col
+    b = a + slices + 1
+    indices = np.stack([a, b, b + 1, a, b + 1, a + 1], axis=-1)
+    return vertices.reshape(-1, VERTEX_FLOATS), indices.reshape(-1)
+
+
+def tessellate_tree(tree, slices=16, stacks=16):
+    """
+    Build the combined trunk + foliage mesh for a tree shape
+    Args:
+        tree: Tree whose dimensions and colors define the shape
+        slices, stacks: Tessellation detail (16 matches Tree.draw)
+    Returns:
+        tuple: (vertices, indices) ready for an indexed GL_TRIANGLES draw
+    """
+    trunk_vertices, trunk_indices = cylinder_geometry(
+        tree.trunk_radius, tree.trunk_height, slices, tree.trunk_color
+    )
+    foliage_vertices, foliage_indices = sphere_geometry(
+        tree.foliage_radius, tree.trunk_height + tree.foliage_radius * 0.5,
+        slices, stacks, tree.foliage_color
+    )
+    vertices = np.concatenate([trunk_vertices, foliage_vertices])
+    indices = np.concatenate([trunk_indices, foliage_indices + len(trunk_vertices)])
+    return vertices, indices.astype(np.uint32)
+
+
+def billboard_geometry(tree, segments=8):
+    """
+    Build a flat impostor: a trunk rectangle under a foliage polygon
+    Positions are local (x = camera right, y = up); the vertex shader
+    places them in the world
+    Args:
+        tree: Tree whose dimensions and colors define the shape
+        segments: Sides of the foliage polygon
+    Returns:
+        tuple: (vertices, indices) ready for an indexed GL_TRIANGLES draw
+    """
+    trunk = np.array([
+        (-tree.trunk_radius, 0.0), (tree.trunk_radius, 0.0),
+        (tree.trunk_radius, tree.trunk_height), (-tree.trunk_radius, tree.trunk_height),
+    ], dtype=np.float32)
+
+    # Foliage: center vertex plus a ring, drawn as a triangle fan
+    theta = np.linspace(0.0, 2.0 * np.pi, segments, endpoint=False, dtype=np.float32)
+    center_y = tree.trunk_height + tree.foliage_radius * 0.5
+    foliage = np.concatenate([
+        [(0.0, center_y)],
+        np.stack([np.cos(theta), np.sin(theta) + center_y / tree.foliage_radius], axis=1)
+        * tree.foliage_radius,
+    ]).astype(np.float32)
+
+    vertices = np.zeros((len(trunk) + len(foliage), VERTEX_FLOATS), dtype=np.float32)
+    vertices[:, 0:2] = np.concatenate([trunk, foliage])
+    vertices[:, 5] = 1.0
+    vertices[:len(trunk), 6:9] = tree.trunk_color
+    vertices[len(trunk):, 6:9] = tree.foliage_color
+
+    ring = np.arange(segments, dtype=np.uint32)
+    fan = np.stack([np.zeros(segments, dtype=np.uint32), ring + 1, (ring + 1) % segments + 1], axis=1)
+    indices = np.concatenate([[0, 1, 2, 0, 2, 3], fan.reshape(-1) + len(trunk)])
+    return vertices, indices.astype(np.uint32)
+
+
+class TreeLevel:
+    def __init__(self, vertices, indices, species=0, detail=0):
+        """
+        One detail level of one species: a shared mesh plus the instances
+        drawn with it
+        Args:
+            vertices, indices: Indexed GL_TRIANGLES geometry
+            species: Index into TREE_SPECIES
+            detail: LOD level (0 = full mesh, BILLBOARD_LEVEL = impostor)
+        """
+        self.species = species
+        self.detail = detail
+        self.mesh = StaticMesh()
+        self.mesh.set_data(vertices, [])
+        self.indices = indices
+
+        # Positions (hierarchy order) of the instances in the GPU buffer
+        self.uploaded = None
+        self.instance_count = 0
+
+        self.index_buffer = None
+        self.instance_buffer = None
+
+    def init_gl(self, instancing):
+        """
+        Create the vertex, index and instance buffers
+        Args:
+            instancing: Whether an instance buffer is needed
+        """
+        self.mesh.upload()
+        self.index_buffer = glGenBuffers(1)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.index_buffer)
+        glBufferData(GL_ELEMENT_ARRAY_BUFFER, self.indices.nbytes, self.indices, GL_STATIC_DRAW)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+        if instancing:
+            self.instance_buffer = glGenBuffers(1)
+
+    def set_instances(self, positions, offsets):
+        """
+        Copy instance offsets to the GPU if the set of instances changed
+        Args:
+            positions: Positions of the instances to draw
+            offsets: All instance offsets in hierarchy order
+        """
+        if self.uploaded is not None and np.array_equal(positions, self.uploaded):
+            return
+        self.uploaded = positions
+        self.instance_count = len(positions)
+        if self.instance_buffer is not None and len(positions):
+            data = offsets[positions]
+            glBindBuffer(GL_ARRAY_BUFFER, self.instance_buffer)
+            glBufferData(GL_ARRAY_BUFFER, data.nbytes, data, GL_STREAM_DRAW)
+            glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def release(self):
+        """Free GPU resources (must be called from the GL thread)"""
+        self.mesh.release()
+        buffers = [b for b in (self.index_buffer, self.instance_buffer) if b is not None]
+        if buffers:
+            glDeleteBuffers(len(buffers), buffers)
+        self.index_buffer = None
+        self.instance_buffer = None
+        self.uploaded = None
+
+
+class TreeRenderer:
+    def __init__(self, slices=16, stacks=16):
+        """
+        Initialize the shared tree meshes
+        Args:
+            slices, stacks: Tessellation detail of trunk and foliage up close
+        """
+        # Every detail level of every species, species by species
+        self.levels = []
+        for species in range(len(TREE_SPECIES)):
+            prototype = Tree(0.0, 0.0, species)
+            self.levels += [
+                TreeLevel(*tessellate_tree(prototype, slices, stacks), species, 0),
+                TreeLevel(*tessellate_tree(prototype, LOW_POLY_SLICES, LOW_POLY_STACKS), species, 1),
+                TreeLevel(*billboard_geometry(prototype), species, BILLBOARD_LEVEL),
+            ]
+        self.lod = LODSelector(TREE_LOD_DISTANCES)
+
+        # Bounding box of each species relative to the tree's base
+        top = species_top(np.arange(len(TREE_SPECIES))).astype(np.float64)
+        radius = TREE_SPECIES['foliage_radius'].astype(np.float64)
+        self.box_center = np.stack([np.zeros_like(top), top / 2, np.zeros_like(top)], axis=1)
+        self.box_half = np.stack([radius, top / 2, radius], axis=1)
+
+        # Per-instance offsets (x, 0, z) and species, one row per tree, in
+        # hierarchy order
+        self.offsets = np.zeros((0, 3), dtype=np.float32)
+        self.species = np.zeros(0, dtype=np.uint8)
+        self.hierarchy = BoxHierarchy(np.zeros((0, 3)), np.zeros((0, 3)))
+
+        # Level each tree was drawn at last time (for hysteresis)
+        self.tree_levels = np.zeros(0, dtype=np.int8)
+
+        # GL objects are created lazily on the render thread
+        self.program = None
+        self.billboard_program = None
+        self.use_instancing = None
+
+        # Billboards are expanded on the CPU when instancing is unavailable
+        self.billboard_stream = StaticMesh()
+        self.billboard_stream.usage = GL_STREAM_DRAW
+
+    def build(self, trees):
+        """
+        Set the tree instances (call when the city changes)
+        Args:
+            trees: List of Tree objects, or a RecordList of tree columns
+        """
+        self.use_instances(self.bake(trees))
+
+    def bake(self, trees):
+        """
+        Compute tree instances without touching the renderer's state (safe
+        on a worker thread while the current trees are drawn)
+        Args:
+            trees: List of Tree objects, or a RecordList of tree columns
+        Returns:
+            tuple: (BoxHierarchy, offsets, species), the last two in
+                   hierarchy order, for use_instances
+        """
+        offsets = np.zeros((len(trees), 3), dtype=np.float32)
+        species = np.zeros(len(trees), dtype=np.uint8)
+        columns = getattr(trees, 'columns', None)
+        if columns is not None:
+            offsets[:, 0] = columns['x']
+            offsets[:, 2] = columns['z']
+            species[:] = columns['species']
+        elif trees:
+            offsets[:, [0, 2]] = [(tree.x, tree.z) for tree in trees]
+            species[:] = [tree.species for tree in trees]
+
+        # Group neighbouring trees so whole groups can be culled at once
+        hierarchy = BoxHierarchy(offsets + self.box_center[species], self.box_half[species])
+        return hierarchy, offsets[hierarchy.order], species[hierarchy.order]
+
+    def use_instances(self, instances):
+        """
+        Draw the tree instances made by bake() from the next frame on
+        Args:
+            instances: (BoxHierarchy, offsets, species) tuple
+        """
+        self.hierarchy, self.offsets, self.species = instances
+        self.tree_levels = np.zeros(len(self.offsets), dtype=np.int8)
+        for level in self.levels:
+            level.uploaded = None
+
+    def init_gl(self):
+        """Create buffers and pick hardware instancing if the driver supports it"""
+        self.use_instancing = False
+        if instancing_supported():
+            try:
+                self.program = create_program(
+                    INSTANCED_VERTEX_SHADER, COLOR_FRAGMENT_SHADER,
+                    {'instance_offset': OFFSET_LOCATION}
+                )
+                self.billboard_program = create_program(
+                    BILLBOARD_VERTEX_SHADER, COLOR_FRAGMENT_SHADER,
+                    {'instance_offset': OFFSET_LOCATION}
+                )
+                self.use_instancing = True
+            except RuntimeError as e:
+                print(f"Tree instancing unavailable, using per-instance offsets: {e}")
+
+        # Instance buffers also serve the shader pipeline, which instances
+        # even when the GLSL 1.20 programs are unavailable
+        for level in self.levels:
+            level.init_gl(self.use_instancing or instancing_supported())
+
+    def select_levels(self, visible, camera):
+        """
+        Update the detail level of the visible trees from the camera distance
+        Args:
+            visible: Positions of the trees to draw
+            camera: Camera the frame is rendered from (full detail if None)
+        Returns:
+            np.ndarray: Level per visible tree
+        """
+        if camera is None:
+            return np.zeros(len(visible), dtype=np.int8)
+
+        eye = np.array(camera.get_camera_position())
+        distances = box_distances(eye, self.hierarchy.item_center[visible],
+                                  self.hierarchy.item_half[visible])
+        levels = self.lod.select(distances, self.tree_levels[visible])
+        self.tree_levels[visible] = levels
+        return levels
+
+    def draw(self, frustum=None, stats=None, camera=None, pipeline=None, occlusion=None):
+        """
+        Render all trees, skipping those outside the frustum
+        Args:
+            frustum: Frustum to cull against (draw everything if None)
+            stats: Optional CullingStats to record results in
+            camera: Camera for distance-based detail (full detail if None)
+            pipeline: ShaderPipeline to draw with (fixed function if None)
+            occlusion: OcclusionCuller filled with this frame's occluders
+                       (trees hidden behind them are skipped)
+        """
+        if self.use_instancing is None:
+            self.init_gl()
+
+        if frustum is not None:
+            visible, nodes_tested = self.hierarchy.query(frustum)
+            if stats is not None:
+                stats.record('trees', len(self.offsets), len(visible), nodes_tested)
+        else:
+            visible = np.arange(len(self.offsets))
+        if occlusion is not None:
+            visible = occlusion.cull('trees', visible, self.hierarchy.item_center[visible],
+                                     self.hierarchy.item_half[visible], stats)
+
+        levels = self.select_levels(visible, camera)
+        if stats is not None and camera is not None:
+            stats.record_lod('trees', np.bincount(levels, minlength=self.lod.num_levels))
+
+        species = self.species[visible]
+        for level in self.levels:
+            level.set_instances(visible[(levels == level.detail) & (species == level.species)],
+                                self.offsets)
+            if level.instance_count == 0:
+                continue
+            if pipeline is not None:
+                billboard = camera.view_matrix()[0, :3] if level.detail == BILLBOARD_LEVEL else None
+                self.draw_shaded(pipeline, level, billboard)
+            elif level.detail == BILLBOARD_LEVEL:
+                self.draw_billboards(level, camera.view_matrix()[0, :3])
+            else:
+                self.draw_level(level)
+
+    def draw_shaded(self, pipeline, level, camera_right=None):
+        """
+        Draw the instances of a level with the shader pipeline
+        Args:
+            pipeline: ShaderPipeline (begun for this frame)
+            level: TreeLevel to draw
+            camera_right: Camera right vector for billboards (None for meshes)
+        """
+        pipeline.set_billboard(camera_right)
+        pipeline.draw_instanced(
+            None, level.instance_buffer, level.instance_count, index_count=len(level.indices),
+            attributes=('offset',), vertex_buffer=level.mesh.vbo, index_buffer=level.index_buffer
+        )
+        if camera_right is not None:
+            pipeline.set_billboard(None)
+
+    def draw_level(self, level):
+        """
+        Draw the instances of a mesh level
+        Args:
+            level: TreeLevel to draw
+        """
+        level.mesh.bind()
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, level.index_buffer)
+
+        if self.use_instancing:
+            glUseProgram(self.program)
+            self.draw_instanced(level)
+            glUseProgram(0)
+        else:
+            # Fallback: one translated draw of the cached mesh per tree
+            for x, y, z in self.offsets[level.uploaded]:
+                glPushMatrix()
+                glTranslatef(x, y, z)
+                glDrawElements(GL_TRIANGLES, len(level.indices), GL_UNSIGNED_INT, None)
+                glPopMatrix()
+            count_draw(GL_TRIANGLES, len(level.indices), level.instance_count,
+                       calls=level.instance_count)
+
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+        level.mesh.unbind()
+
+    def draw_billboards(self, level, camera_right):
+        """
+        Draw the far trees as impostors facing the camera
+        Args:
+            level: Billboard TreeLevel
+            camera_right: Horizontal right vector of the camera
+        """
+        if not self.use_instancing:
+            self.draw_billboards_expanded(level, camera_right)
+            return
+
+        level.mesh.bind()
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, level.index_buffer)
+        glUseProgram(self.billboard_program)
+        glUniform3f(glGetUniformLocation(self.billboard_program, 'camera_right'), *camera_right)
+        self.draw_instanced(level)
+        glUseProgram(0)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+        level.mesh.unbind()
+
+    def draw_billboards_expanded(self, level, camera_right):
+        """
+        Build every billboard on the CPU and draw them in one call
+        Args:
+            level: Billboard TreeLevel
+            camera_right: Horizontal right vector of the camera
+        """
+        local = level.mesh.vertices[level.indices]
+        vertices = np.empty((level.instance_count,) + local.shape, dtype=np.float32)
+        vertices[:] = local
+        vertices[..., 0:3] = (self.offsets[level.uploaded][:, None, :] +
+                              local[:, 0:1] * camera_right +
+                              local[:, 1:2] * np.array([0.0, 1.0, 0.0]))
+        facing = np.array([-camera_right[2], 1.0, camera_right[0]])
+        vertices[..., 3:6] = facing / np.linalg.norm(facing)
+
+        vertices = vertices.reshape(-1, VERTEX_FLOATS)
+        self.billboard_stream.set_data(vertices, [(GL_TRIANGLES, 0, len(vertices))])
+        self.billboard_stream.draw()
+
+    def draw_instanced(self, level):
+        """
+        Draw every instance of a level with one instanced call
+        (the level's mesh, index buffer and shader program must be bound)
+        Args:
+            level: TreeLevel to draw
+        """
+        glBindBuffer(GL_ARRAY_BUFFER, level.instance_buffer)
+        glEnableVertexAttribArray(OFFSET_LOCATION)
+        glVertexAttribPointer(OFFSET_LOCATION, 3, GL_FLOAT, GL_FALSE, 12, ctypes.c_void_p(0))
+        glVertexAttribDivisor(OFFSET_LOCATION, 1)
+
+        glDrawElementsInstanced(
+            GL_TRIANGLES, len(level.indices), GL_UNSIGNED_INT, None, level.instance_count
+        )
+        count_draw(GL_TRIANGLES, len(level.indices), level.instance_count)
+
+        glVertexAttribDivisor(OFFSET_LOCATION, 0)
+        glDisableVertexAttribArray(OFFSET_LOCATION)
+
+    def release(self):
+        """Free GPU resources (must be called from the GL thread)"""
+        for level in self.levels:
+            level.release()
+        self.billboard_stream.release()
+        for program in (self.program, self.billboard_program):
+            if program is not None:
+                glDeleteProgram(program)
+        self.program = None
+        self.billboard_program = None
+        self.use_instancing = None
@@ -2,56 +2,210 @@
 3D City Simulation - Main Application
 A simple 3D city simulator with buildings, roads, trees, and animated cars
 """
+import time
+
+# Launch clock for --startup-report (read before the heavier imports below)
+LAUNCH_TIME = time.perf_counter()
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+from functools import partial
+
+# PyOpenGL binds its platform on first import, so a headless run must select
+# the offscreen backend (EGL by default, or OSMesa) before OpenGL is imported;
+# pre-parsed with argparse so every spelling parse_args accepts is seen
+_early_parser = argparse.ArgumentParser(add_help=False)
+_early_parser.add_argument('--headless', action='store_true')
+_early_parser.add_argument('--gl-backend', choices=['egl', 'osmesa'], default='egl')
+_early_args = _early_parser.parse_known_args()[0]
+if _early_args.headless:
+    os.environ.setdefault('PYOPENGL_PLATFORM', _early_args.gl_backend)
+
+import numpy as np
 import pygame
 from pygame.locals import *
 from OpenGL.GL import *
-from OpenGL.GLU import *
-import tkinter as tk
-from tkinter import ttk
-import threading
-import sys
 
-# Import engine components
+# Import engine components (frame capture, chunk streaming, the render farm,
+# snapshots and the Tk control panel are imported when first used)
 from engine.renderer import Renderer
 from engine.camera import Camera
 from engine.lighting import Lighting
+from engine.culling import Frustum, CullingStats
+from engine.governor import FrameGovernor
+from engine.mesh import VERTEX_FLOATS, InstanceBuffer, StaticMesh
+from engine.occlusion import OcclusionCuller
+from engine.pipeline import create_pipeline
+from engine.profiler import FrameProfiler, count_draw
+from engine.redraw import RedrawTracker
+from engine.scene import CommandQueue, Scene, SceneBuilder, bake_scene
+from engine.sim_clock import SimulationClock
+from engine.tree_renderer import TreeRenderer
 
 # Import objects
 from objects.road import Road
-from objects.tree import Tree
-from objects.car import Car
+from objects.car import car_model_vertices
+from objects.traffic import IntelligentDriverModel, TrafficRouter
 
 # Import utilities
 from utils.helpers import generate_random_city, create_cars
+from utils.timing import StartupTimer, summarize_times
+
+# Seconds spent importing the modules above
+IMPORT_SECONDS = time.perf_counter() - LAUNCH_TIME
+
+# Control panel: how often it reads back state changed by the main loop
+GUI_POLL_MS = 200
+
+# Render on demand: posted to wake the idle loop (GUI commands, finished
+# builds), window events that need the frame drawn again, and the longest
+# idle sleep between checks
+WAKE_EVENT = pygame.USEREVENT
+REDRAW_EVENTS = (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED, pygame.WINDOWSHOWN,
+                 pygame.WINDOWRESTORED, pygame.WINDOWSIZECHANGED)
+IDLE_TIMEOUT_MS = 250
 
 
 class CitySimulation:
-    def __init__(self):
-        """Initialize the 3D city simulation"""
+    def __init__(self, width=800, height=600, num_buildings=60, num_trees=40, num_cars=8,
+                 grid_size=3, seed=None, headless=False, gl_backend='egl', infinite=False,
+                 workers=None, city=None, traffic='routed', car_following=True,
+                 pipeline='auto', progressive=False, startup=None):
+        """
+        Initialize the 3D city simulation
+        Args:
+            width, height: Window (or offscreen framebuffer) size
+            num_buildings, num_trees, num_cars: City size
+            grid_size: Number of roads in each direction (3 = default 150 x 150 city)
+            seed: Random seed for a reproducible city (random if None)
+            headless: Render offscreen without a window or GUI
+            gl_backend: Offscreen backend when headless ('egl' or 'osmesa')
+            infinite: Stream an unbounded city in chunks around the camera target
+                      (num_buildings, num_trees and grid_size are then unused)
+            workers: Processes for building generation (automatic if None)
+            city: Snapshot file to load instead of generating the first city
+                  (its road layout replaces grid_size)
+            traffic: 'routed' (cars turn at intersections towards random
+                     destinations) or 'loop' (each car loops along one road)
+            car_following: Cars keep their distance to the car ahead and wait
+                           for room before entering intersections
+            pipeline: 'auto' (GLSL 3.30 shaders when the context supports
+                      them), 'shader' (same, reporting when unavailable) or
+                      'fixed' (fixed-function OpenGL only)
+            progressive: Return before the first city is generated: frames show
+                         the roads while it is built in the background and it
+                         is swapped in once ready (a loaded snapshot or the
+                         infinite city still start complete)
+            startup: StartupTimer recording the launch phases (a new one if None)
+        """
+        self.num_buildings = num_buildings
+        self.num_trees = num_trees
+        self.num_cars = num_cars
+        self.workers = workers
+        self.traffic = traffic
+        self.car_following = car_following
+        if seed is not None:
+            random.seed(seed)
+        
+        # Launch timing (--startup-report prints it once the city is on screen)
+        self.startup = startup if startup is not None else StartupTimer()
+        self.startup_report = False
+        
         # Renderer setup
-        self.renderer = Renderer(800, 600)
-        self.renderer.init_pygame()
+        self.renderer = Renderer(width, height)
+        with self.startup.phase('context'):
+            if headless:
+                self.renderer.init_offscreen(gl_backend)
+            else:
+                self.renderer.init_pygame()
+            
+            # Lighting setup
+            self.lighting = Lighting()
+            self.lighting.setup()
         
         # Camera setup
         self.camera = Camera()
         
-        # Lighting setup
-        self.lighting = Lighting()
-        self.lighting.setup()
-        
         # Scene objects
-        self.road = Road()
-        self.buildings = []
-        self.trees = []
-        self.cars = []
+        self.road = Road(num_horizontal=grid_size, num_vertical=grid_size)
+        self.tree_renderer = TreeRenderer()
+        self.scene = Scene()
+        self.car_mesh = StaticMesh()
+        self.car_mesh.usage = GL_STREAM_DRAW
+        self.car_instances = InstanceBuffer()
+        self.ground_mesh = StaticMesh()
+        self.ground_size = None
+        
+        # Shader pipeline: NumPy matrices, lighting in GLSL and one instanced
+        # draw per object type (G key toggles; None = fixed function only)
+        with self.startup.phase('shaders'):
+            self.pipeline = create_pipeline() if pipeline != 'fixed' else None
+        if pipeline == 'shader' and self.pipeline is None:
+            print("Requested shader pipeline is unavailable")
+        self.shading_enabled = self.pipeline is not None
+        
+        # Chunk streaming for the infinite city (cars keep to the central grid)
+        self.chunks = None
+        if infinite:
+            from engine.chunks import ChunkManager
+            self.chunks = ChunkManager()
+        
+        # Render on demand: frames are only drawn when something visible
+        # changed; otherwise the main loop sleeps on events (--continuous
+        # draws every frame)
+        self.redraw = RedrawTracker()
         
-        # Generate initial city
-        self.generate_city()
+        # Frame governor: lowers render resolution, LOD distances and draw
+        # distance while frames run over budget (off until a budget is set)
+        self.governor = FrameGovernor()
+        self.draw_distance = self.renderer.far
+        
+        # New cities are built on a worker thread and swapped in whole; other
+        # threads (the control GUI) post commands for the main loop to run
+        self.scene_builder = SceneBuilder(notify=self.wake)
+        self.commands = CommandQueue(notify=self.wake)
+        
+        # Generate initial city (or load it from a snapshot); a progressive
+        # start draws the empty scene until the background build is swapped in
+        self.city_pending = False
+        if progressive and city is None and not infinite:
+            self.city_pending = self.scene_builder.submit(self.build_scene)
+        else:
+            with self.startup.phase('generation'):
+                if city is not None and not infinite:
+                    self.load_city(city)
+                else:
+                    self.generate_city()
+            with self.startup.phase('mesh upload'):
+                self.scene.upload()
+        
+        # View-frustum culling (C key toggles)
+        self.culling_enabled = True
+        self.culling_stats = CullingStats()
+        
+        # Distance-based level of detail (L key toggles)
+        self.lod_enabled = True
+        
+        # Software occlusion culling behind the nearest buildings (O key
+        # toggles; the infinite city draws whole chunks and skips it)
+        self.occlusion_enabled = True
+        self.occlusion = OcclusionCuller()
         
         # Animation state
         self.animation_running = True
         self.car_speed = 1.0
         
+        # Simulation runs in fixed steps, independent of the render rate
+        self.sim_clock = SimulationClock()
+        
+        # Frame phase profiler (P key toggles; costs nothing while disabled)
+        self.profiler = FrameProfiler()
+        self.trace_path = None
+        
         # Mouse control state
         self.mouse_down = False
         self.last_mouse_x = 0
@@ -61,16 +215,184 @@ class CitySimulation:
         self.clock = pygame.time.Clock()
         self.fps = 60
         
+    @property
+    def buildings(self):
+        """Buildings of the current scene"""
+        return self.scene.buildings
+    
+    @property
+    def trees(self):
+        """Trees of the current scene"""
+        return self.scene.trees
+    
+    @property
+    def cars(self):
+        """CarFleet of the current scene"""
+        return self.scene.cars
+    
+    @property
+    def building_mesh(self):
+        """Baked building mesh of the current scene"""
+        return self.scene.building_mesh
+    
     def generate_city(self):
-        """Generate or regenerate city layout"""
-        self.buildings, self.trees = generate_random_city(num_buildings=60, num_trees=40)
-        self.cars = create_cars(num_cars=8)
+        """Generate or regenerate city layout (blocks until it is ready)"""
+        if self.chunks is not None:
+            # Chunks are generated lazily from the new seed as they come into view
+            self.chunks.reset(random.randrange(2 ** 32))
+            self.set_scene(bake_scene([], [], self.create_fleet(), self.tree_renderer))
+        else:
+            self.set_scene(self.build_scene())
+    
+    def toggle_animation(self):
+        """Pause or resume the cars (main thread; the GUI posts this rather
+        than a value it read, so quick clicks never cancel each other)"""
+        self.animation_running = not self.animation_running
+    
+    def request_city(self):
+        """Generate a new city in the background; the current one stays on
+        screen until the new one is swapped in by process_commands"""
+        if self.chunks is not None:
+            # Chunks already generate a few at a time, nothing to wait for
+            self.generate_city()
+            return
+        if not self.scene_builder.submit(self.build_scene):
+            print("City generation already running, the new request follows it")
+    
+    def build_scene(self):
+        """
+        Generate a city and bake its meshes (no GL calls: runs on the scene
+        builder thread, or directly from generate_city)
+        Returns:
+            Scene: The new city
+        """
+        # Lazy lists: Building/Tree objects are only created on access
+        buildings, trees = generate_random_city(
+            num_buildings=self.num_buildings, num_trees=self.num_trees, road=self.road,
+            workers=self.workers, lazy=True
+        )
+        return bake_scene(buildings, trees, self.create_fleet(), self.tree_renderer)
     
-    def handle_events(self):
-        """Handle pygame events (keyboard, mouse)"""
-        for event in pygame.event.get():
+    def create_fleet(self):
+        """Create the cars for a new city"""
+        cars = create_cars(num_cars=self.num_cars, as_fleet=True, road=self.road,
+                           routed=self.traffic == 'routed')
+        if self.car_following:
+            cars.driver_model = IntelligentDriverModel()
+        return cars
+    
+    def set_scene(self, scene):
+        """
+        Draw and simulate a new scene from the next frame on (GL thread)
+        Args:
+            scene: Scene to swap in (the old one's buffers are freed)
+        """
+        old, self.scene = self.scene, scene
+        self.tree_renderer.use_instances(scene.tree_instances)
+
+        # Cars of a new city on the same roads keep the routes already cached
+        if scene.cars.router is not None:
+            scene.cars.router.share_routes(old.cars.router)
+        old.release()
+        self.apply_quality()
+    
+    def process_commands(self):
+        """Run commands posted by other threads and swap in a city finished
+        in the background (called by the main loop once per frame)"""
+        if self.commands.drain():
+            self.redraw.invalidate()
+        scene = self.scene_builder.poll()
+        if scene is not None:
+            if self.city_pending:
+                # Startup build: ran while the first frames were drawn
+                self.startup.add('generation', self.scene_builder.duration)
+                self.city_pending = False
+            self.set_scene(scene)
+            with self.startup.phase('mesh upload'):
+                scene.upload()
+            print(f"New city: {len(scene.buildings)} buildings, {len(scene.trees)} trees "
+                  f"(built in {self.scene_builder.duration * 1000:.0f} ms)")
+        elif self.city_pending and not self.scene_builder.busy:
+            # The startup build failed; the empty city stays on screen
+            self.city_pending = False
+
+    def set_frame_budget(self, budget_ms):
+        """
+        Set the frame time the governor holds (safe to post from the GUI)
+        Args:
+            budget_ms: Target frame time in milliseconds (0 = off, full quality)
+        """
+        if self.governor.set_budget(budget_ms):
+            self.apply_quality()
+    
+    def govern(self, frame_ms):
+        """
+        Feed a drawn frame's time to the governor and apply any adjustment
+        Args:
+            frame_ms: Time the frame took in milliseconds
+        """
+        if self.governor.record(frame_ms):
+            self.apply_quality()
+    
+    def apply_quality(self):
+        """Apply the governor's level: render resolution, LOD distances and
+        draw distance (the current scene's CityMesh has its own LOD selector)"""
+        render_scale, lod_scale, draw_scale = self.governor.settings
+        self.renderer.render_scale = render_scale
+        self.building_mesh.lod.distance_scale = lod_scale
+        self.tree_renderer.lod.distance_scale = lod_scale
+        self.draw_distance = self.renderer.far * draw_scale
+        self.redraw.invalidate()
+    
+    def load_city(self, path):
+        """
+        Replace the city with one saved by save_city
+        Args:
+            path: Snapshot file path
+        """
+        from utils.snapshot import load_snapshot
+        start = time.perf_counter()
+        snapshot = load_snapshot(path)
+        snapshot.configure_road(self.road)
+        cars = snapshot.car_fleet()
+        if (cars.edge >= 0).any():
+            # Routed cars resume on the restored road graph
+            cars.router = TrafficRouter(self.road, seed=random.randrange(2 ** 32))
+        if self.car_following:
+            cars.driver_model = IntelligentDriverModel()
+        loaded = time.perf_counter() - start
+        self.set_scene(bake_scene(snapshot.buildings, snapshot.trees, cars, self.tree_renderer))
+        print(f"Loaded {path}: {len(self.buildings)} buildings, {len(self.trees)} trees, "
+              f"{len(self.cars)} cars in {loaded * 1000:.1f} ms "
+              f"(meshes built in {(time.perf_counter() - start - loaded) * 1000:.1f} ms)")
+
+    def save_city(self, path):
+        """
+        Save the city (buildings, trees, road layout and car state) to a snapshot
+        Args:
+            path: Snapshot file path
+        """
+        from utils.snapshot import save_snapshot
+        save_snapshot(path, self.buildings, self.trees, self.road, self.cars)
+        print(f"Saved city to {path}")
+    
+    def handle_events(self, events=None):
+        """
+        Handle pygame events (keyboard, mouse)
+        Args:
+            events: Events already taken from the queue (see wait_for_events)
+                    to handle before the queued ones
+        Returns:
+            bool: False when the application should exit
+        """
+        events = pygame.event.get() if events is None else events + pygame.event.get()
+        for event in events:
             if event.type == pygame.QUIT:
                 return False
+            
+            # Window shown again: draw the frame even though nothing changed
+            elif event.type in REDRAW_EVENTS:
+                self.redraw.invalidate()
                 
             # Mouse button events
             elif event.type == pygame.MOUSEBUTTONDOWN:
@@ -99,14 +421,32 @@ class CitySimulation:
                     self.last_mouse_x = x
                     self.last_mouse_y = y
             
-            # Keyboard events
+            # Keyboard events (toggles change the frame, so any key redraws it)
             elif event.type == pygame.KEYDOWN:
+                self.redraw.invalidate()
                 if event.key == pygame.K_ESCAPE:
                     return False
                 elif event.key == pygame.K_SPACE:
-                    self.animation_running = not self.animation_running
+                    self.toggle_animation()
                 elif event.key == pygame.K_r:
-                    self.generate_city()
+                    self.request_city()
+                elif event.key == pygame.K_c:
+                    self.culling_enabled = not self.culling_enabled
+                elif event.key == pygame.K_l:
+                    self.lod_enabled = not self.lod_enabled
+                elif event.key == pygame.K_v:
+                    if self.renderer.capture is not None:
+                        self.stop_capture()
+                    else:
+                        self.start_capture(time.strftime('capture-%Y%m%d-%H%M%S'))
+                elif event.key == pygame.K_o:
+                    self.occlusion_enabled = not self.occlusion_enabled
+                elif event.key == pygame.K_g:
+                    self.shading_enabled = not self.shading_enabled and self.pipeline is not None
+                elif event.key == pygame.K_p:
+                    self.profiler.enabled = not self.profiler.enabled
+                    if not self.profiler.enabled:
+                        self.print_profile()
                 # Camera zoom with +/-
                 elif event.key == pygame.K_PLUS or event.key == pygame.K_EQUALS:
                     self.camera.zoom_camera(-2.0)
@@ -140,83 +480,375 @@ class CitySimulation:
         
         return True
     
-    def update(self):
-        """Update animation state"""
-        if self.animation_running:
-            for car in self.cars:
-                car.update(self.car_speed)
+    def update(self, real_dt=None):
+        """
+        Update animation state
+        Args:
+            real_dt: Real seconds since the last frame (one step's worth if None)
+        """
+        if not self.animation_running:
+            return
+        if real_dt is None:
+            real_dt = self.sim_clock.step
+        self.sim_clock.advance(real_dt, self.step_simulation)
+    
+    def step_simulation(self):
+        """Advance the simulation by one fixed step"""
+        self.cars.update(self.car_speed)
     
     def render(self):
         """Render the 3D scene"""
-        # Clear screen
-        self.renderer.clear_screen()
+        profile = self.profiler.phase
         
-        # Apply camera transformations
-        self.camera.apply_view()
+        # Clear screen (drawn below full resolution when the governor says so)
+        self.renderer.begin_frame()
+        self.renderer.clear_screen()
         
-        # Update lighting
-        self.lighting.update_position()
+        # Apply camera transformations (the infinite city is drawn relative to
+        # the camera target so positions stay precise far from the origin)
+        origin = self.camera.target.copy() if self.chunks is not None else None
+        pipeline = self.pipeline if self.shading_enabled else None
+        if pipeline is not None:
+            pipeline.begin(self.camera.view_matrix(origin), self.renderer.projection_matrix(),
+                           self.lighting)
+        else:
+            self.camera.apply_view(origin)
+            
+            # Update lighting
+            self.lighting.update_position()
         
         # Draw ground plane
-        self.draw_ground()
-        
-        # Draw road network
-        self.road.draw()
+        with profile('ground'):
+            self.draw_ground(pipeline)
         
-        # Draw buildings
-        for building in self.buildings:
-            building.draw()
+        # Frustum for this frame (objects outside it are skipped before any GL calls)
+        self.culling_stats.reset()
+        frustum = None
+        if self.culling_enabled:
+            frustum = Frustum.from_camera(self.camera, self.renderer, self.draw_distance)
+        occlusion = None
+        if self.occlusion_enabled and self.chunks is None:
+            occlusion = self.occlusion
+            occlusion.begin(self.camera, self.renderer)
+            
+            # The ground hides everything above it from a camera below it
+            # (the preset views look up from under the ground)
+            size = self.ground_extent()
+            occlusion.add_occluders([(0.0, 0.0, 0.0)], [(size, 0.0, size)])
         
-        # Draw trees
-        for tree in self.trees:
-            tree.draw()
+        if self.chunks is not None:
+            # Draw streamed chunks (roads, buildings and trees baked per chunk)
+            with profile('chunks'):
+                self.chunks.update(self.camera.target)
+                self.chunks.draw(origin, frustum, self.culling_stats, pipeline)
+            if pipeline is None:
+                glPushMatrix()
+                glTranslated(*-origin)
+        else:
+            # Draw road network
+            with profile('road'):
+                self.road.draw(pipeline)
+            
+            # Detail drops with camera distance (L key toggles)
+            lod_camera = self.camera if self.lod_enabled else None
+            
+            # Draw buildings (baked into a single vertex buffer)
+            with profile('buildings'):
+                self.building_mesh.draw(frustum, self.culling_stats, lod_camera, pipeline, occlusion)
+            
+            # Draw trees (shared mesh per detail level, one instance per tree)
+            with profile('trees'):
+                self.tree_renderer.draw(frustum, self.culling_stats, lod_camera, pipeline, occlusion)
         
-        # Draw cars
-        for car in self.cars:
-            car.draw()
+        # Draw cars (visible part of the fleet streamed into one draw call),
+        # interpolated between the last two simulation steps
+        with profile('cars'):
+            alpha = self.sim_clock.alpha
+            visible_cars = None
+            if frustum is not None or occlusion is not None:
+                centers, half_sizes = self.cars.bounds(alpha)
+                visible_cars = np.arange(len(self.cars))
+                if frustum is not None:
+                    visible_cars = np.flatnonzero(frustum.visible(centers, half_sizes))
+                    self.culling_stats.record('cars', len(self.cars), len(visible_cars))
+                if occlusion is not None:
+                    visible_cars = occlusion.cull('cars', visible_cars, centers[visible_cars],
+                                                  half_sizes[visible_cars], self.culling_stats)
+            if pipeline is not None:
+                self.draw_car_instances(pipeline, visible_cars, alpha, origin)
+            else:
+                car_vertices = self.cars.build_vertices(visible_cars, alpha)
+                self.car_mesh.set_data(car_vertices, [(GL_QUADS, 0, len(car_vertices))])
+                self.car_mesh.draw()
+        if pipeline is not None:
+            pipeline.end()
+        elif self.chunks is not None:
+            glPopMatrix()
         
         # Swap buffers
-        self.renderer.swap_buffers()
+        with profile('swap'):
+            self.renderer.swap_buffers()
+    
+    def draw_car_instances(self, pipeline, visible_cars, alpha, origin):
+        """
+        Draw the cars with one instanced call of the shared car model
+        Args:
+            pipeline: ShaderPipeline (begun for this frame)
+            visible_cars: Indices of the cars to draw (all if None)
+            alpha: Interpolation factor between the last two steps
+            origin: World point the view is centered on (None for the world origin)
+        """
+        rows = self.cars.instances(visible_cars, alpha)
+        if origin is not None:
+            rows[:, 0:3] -= origin
+        # Cars move every frame: skip the comparison with the last upload
+        self.car_instances.update(rows, compare=False)
+        model = pipeline.model('car', car_model_vertices())
+        pipeline.draw_instanced(model, self.car_instances.buffer, len(rows))
     
-    def draw_ground(self):
-        """Draw simple ground plane"""
+    def ground_extent(self):
+        """Half size of the ground plane"""
+        if self.chunks is not None:
+            return self.renderer.far  # Centered on the camera target
+        return max(200, self.road.road_length / 2 + 50)  # Expanded for larger city
+    
+    def draw_ground(self, pipeline=None):
+        """
+        Draw simple ground plane
+        Args:
+            pipeline: ShaderPipeline to draw with (fixed function if None)
+        """
+        size = self.ground_extent()
+        if pipeline is not None:
+            if size != self.ground_size:
+                vertices = np.zeros((4, VERTEX_FLOATS), dtype=np.float32)
+                vertices[:, [0, 2]] = [(-size, -size), (size, -size), (size, size), (-size, size)]
+                vertices[:, 3:9] = (0, 1, 0, 0.2, 0.5, 0.2)
+                self.ground_mesh.set_data(vertices, [(GL_QUADS, 0, 4)])
+                self.ground_size = size
+            pipeline.draw_mesh(self.ground_mesh)
+            return
+        
         glPushMatrix()
         glColor3f(0.2, 0.5, 0.2)  # Green grass
         
         glBegin(GL_QUADS)
         glNormal3f(0, 1, 0)
-        size = 200  # Expanded for larger city
         glVertex3f(-size, 0, -size)
         glVertex3f(size, 0, -size)
         glVertex3f(size, 0, size)
         glVertex3f(-size, 0, size)
         glEnd()
+        count_draw(GL_QUADS, 4)
         
         glPopMatrix()
     
-    def run(self):
-        """Main application loop"""
+    def run(self, after_first_frame=None):
+        """
+        Main application loop
+        Args:
+            after_first_frame: Called once the first frame is on screen (for
+                               subsystems that need not delay it, e.g. the
+                               control panel)
+        """
         running = True
+        frame_time = 0.0
+        events = None
+        
+        profile = self.profiler.phase
         
         while running:
-            # Handle events
-            running = self.handle_events()
-            
-            # Update simulation
-            self.update()
-            
-            # Render scene
-            self.render()
+            frame_start = time.perf_counter()
+            with profile('frame'):
+                # Handle events and commands from the control GUI
+                with profile('events'):
+                    running = self.handle_events(events)
+                    self.process_commands()
+                
+                # Update simulation (catches up on the real time since the last frame)
+                with profile('update'):
+                    self.update(frame_time)
+                
+                # Render scene (only if it changed since the last frame drawn)
+                drawn = self.needs_redraw()
+                if drawn:
+                    with profile('render'):
+                        cpu_start = time.thread_time()
+                        if self.startup.finished:
+                            self.render()
+                        else:
+                            self.render_startup_frame()
+                        self.redraw.drawn(time.thread_time() - cpu_start)
+            self.profiler.end_frame()
+            if drawn:
+                self.govern((time.perf_counter() - frame_start) * 1000.0)
+            if after_first_frame is not None:
+                after_first_frame()
+                after_first_frame = None
             
-            # Control frame rate
-            self.clock.tick(self.fps)
+            if drawn:
+                # Control frame rate (0 = uncapped)
+                frame_time = self.clock.tick(self.fps) / 1000.0
+                events = None
+            else:
+                # Nothing to draw: sleep until something happens
+                with profile('idle'):
+                    events = self.wait_for_events()
+                frame_time = self.clock.tick() / 1000.0
         
         # Cleanup
+        self.stop_capture()
+        self.scene_builder.shutdown()
+        self.report_profile()
         pygame.quit()
+    
+    def needs_redraw(self):
+        """
+        Check whether the next frame would differ from the last one drawn
+        Returns:
+            bool: True if it must be drawn
+        """
+        redraw = self.redraw
+        redraw.watch('camera', self.camera.revision)
+        redraw.watch('lighting', self.lighting.revision)
+        
+        # Moving cars, chunks still streaming in and recordings need every frame
+        if self.animation_running and len(self.cars):
+            redraw.invalidate()
+        if self.chunks is not None and not self.chunks.complete:
+            redraw.invalidate()
+        if self.renderer.capture is not None:
+            redraw.invalidate()
+        return redraw.needed
+    
+    def wait_for_events(self):
+        """
+        Sleep until an input event, a GUI command or a finished build arrives
+        (or IDLE_TIMEOUT_MS passes)
+        Returns:
+            list: Events taken from the queue, for the next handle_events
+        """
+        start = time.perf_counter()
+        event = pygame.event.wait(IDLE_TIMEOUT_MS)
+        self.redraw.idle(time.perf_counter() - start)
+        return [] if event.type == pygame.NOEVENT else [event]
+    
+    def wake(self):
+        """Interrupt wait_for_events (safe from any thread)"""
+        if pygame.display.get_init():
+            pygame.event.post(pygame.event.Event(WAKE_EVENT))
+    
+    def run_benchmark(self, frames=300, warmup=10, fly_speed=0.0):
+        """
+        Render a fixed number of frames without pacing and time each one
+        (each frame stands for one simulation step of real time, so runs are
+        reproducible; --time-scale and --unthrottled still apply)
+        Args:
+            frames: Number of timed frames
+            warmup: Untimed frames rendered first (buffer uploads, shader compiles)
+            fly_speed: Distance the camera target moves along +x per frame
+        Returns:
+            list: Frame times in milliseconds (update + render)
+        """
+        times = []
+        profile = self.profiler.phase
+        profiling = self.profiler.enabled
+        for frame in range(warmup + frames):
+            # Warmup frames stay out of the profile
+            self.profiler.enabled = profiling and frame >= warmup
+            start = time.perf_counter()
+            with profile('frame'):
+                self.camera.move_target(fly_speed, 0.0)
+                self.process_commands()
+                with profile('update'):
+                    self.update()
+                with profile('render'):
+                    if self.startup.finished:
+                        self.render()
+                    else:
+                        self.render_startup_frame()
+            self.profiler.end_frame()
+            frame_ms = (time.perf_counter() - start) * 1000.0
+            self.govern(frame_ms)
+            if frame >= warmup:
+                times.append(frame_ms)
+        return times
+    
+    def render_startup_frame(self):
+        """Render a frame while the launch is timed: the first one is the
+        'first frame' phase, the first one showing the city ends the timing"""
+        startup = self.startup
+        start = time.perf_counter()
+        self.render()
+        if 'first frame' not in startup.phases:
+            startup.add('first frame', time.perf_counter() - start)
+            startup.mark('first frame')
+        if not self.city_pending:
+            startup.mark('city on screen')
+            startup.finished = True
+            if self.startup_report:
+                startup.print_report()
+    
+    def start_capture(self, path, workers=2):
+        """
+        Record every presented frame (read back asynchronously, written by a
+        thread pool)
+        Args:
+            path: PNG directory, raw RGBA file (.rgba/.raw) or video file
+                  (.mp4/.mkv/.mov/.webm, encoded by ffmpeg)
+            workers: PNG encoding threads
+        """
+        from engine.capture import FrameCapture, FrameWriter
+        try:
+            writer = FrameWriter(path, self.renderer.width, self.renderer.height,
+                                 workers=workers, fps=self.fps or 60)
+        except (OSError, RuntimeError) as e:
+            print(f"Cannot capture to {path}: {e}")
+            return
+        self.renderer.capture = FrameCapture(writer)
+        print(f"Capturing frames to {path} ({writer.format})")
+    
+    def stop_capture(self):
+        """
+        Finish the running capture (waits for the queued frames to be written)
+        Returns:
+            dict: FrameCapture.summary(), or None if nothing was captured
+        """
+        capture = self.renderer.capture
+        if capture is None:
+            return None
+        self.renderer.capture = None
+        capture.close()
+        summary = capture.summary()
+        cost = summary['capture_ms']
+        print(f"Captured {summary['written']}/{summary['frames']} frames to {summary['path']} "
+              f"({summary['bytes'] / 1e6:.1f} MB); render thread "
+              f"{cost.get('mean', 0.0):.2f} ms/frame mean, {cost.get('p99', 0.0):.2f} ms p99; "
+              f"waited {summary['writer_wait_s'] * 1000:.0f} ms for writers")
+        return summary
+    
+    def print_profile(self):
+        """Print the frame profile and the frames render on demand skipped"""
+        self.profiler.print_summary()
+        redraw = self.redraw.summary(self.fps)
+        if redraw['skipped']:
+            print(f"Render on demand: {redraw['rendered']} frames drawn, {redraw['skipped']} skipped, "
+                  f"idle {redraw['idle_s']:.1f} s; about {redraw['cpu_saved_s']:.1f} s CPU saved "
+                  f"({redraw['render_cpu_ms']:.2f} ms CPU per drawn frame)")
+    
+    def report_profile(self):
+        """Print the frame profile and write the trace file, if anything was recorded"""
+        if self.profiler.written == 0:
+            return
+        self.print_profile()
+        if self.trace_path:
+            self.profiler.write_chrome_trace(self.trace_path)
 
 
 class ControlGUI:
-    """Tkinter GUI for controlling the simulation"""
+    """Tkinter GUI for controlling the simulation (created and run on its own
+    thread, see start_control_gui, and only posts commands, which the
+    simulation's main loop runs)"""
     
     def __init__(self, simulation):
         """
@@ -224,12 +856,13 @@ class ControlGUI:
         Args:
             simulation: CitySimulation instance to control
         """
+        import tkinter as tk
         self.simulation = simulation
         
         # Create Tkinter window
         self.root = tk.Tk()
         self.root.title("3D City Simulation Controls")
-        self.root.geometry("300x350")
+        self.root.geometry("300x440")
         self.root.resizable(False, False)
         
         # Create GUI elements
@@ -237,6 +870,9 @@ class ControlGUI:
         
     def create_widgets(self):
         """Create GUI control widgets"""
+        import tkinter as tk
+        from tkinter import ttk
+        
         # Title
         title = tk.Label(self.root, text="3D City Simulation", font=("Arial", 16, "bold"))
         title.pack(pady=10)
@@ -268,6 +904,8 @@ class ControlGUI:
             font=("Arial", 10, "bold")
         )
         self.anim_button.pack(pady=5)
+        self.shown_running = True
+        self.show_animation_state()
         
         # Speed control
         speed_label = tk.Label(anim_frame, text="Car Speed:")
@@ -285,6 +923,26 @@ class ControlGUI:
         self.speed_slider.set(1.0)
         self.speed_slider.pack(pady=5)
         
+        # Frame governor budget (0 = off)
+        budget_frame = tk.LabelFrame(self.root, text="Frame Budget (ms, 0 = off)", padx=10, pady=5)
+        budget_frame.pack(padx=10, pady=5, fill='x')
+        
+        # The range reaches a larger --frame-budget; Tk may still round the
+        # value it shows, so only positions the user moves to are applied
+        budget = self.simulation.governor.budget_ms
+        self.budget_slider = tk.Scale(
+            budget_frame,
+            from_=0.0,
+            to=max(50.0, budget),
+            resolution=0.5,
+            orient=tk.HORIZONTAL,
+            command=self.update_frame_budget,
+            length=200
+        )
+        self.budget_slider.set(budget)
+        self.budget_shown = float(self.budget_slider.get())
+        self.budget_slider.pack()
+        
         # View presets
         view_frame = tk.LabelFrame(self.root, text="Camera Views", padx=10, pady=10)
         view_frame.pack(padx=10, pady=5, fill='x')
@@ -325,33 +983,322 @@ class ControlGUI:
         ).pack()
         
     def toggle_animation(self):
-        """Toggle animation on/off"""
-        self.simulation.animation_running = not self.simulation.animation_running
-        
-        if self.simulation.animation_running:
-            self.anim_button.config(text="Stop Animation", bg="#ff6b6b")
-        else:
-            self.anim_button.config(text="Start Animation", bg="#51cf66")
+        """Toggle animation on/off (the main loop flips it; the button
+        follows in show_animation_state)"""
+        self.simulation.commands.post(self.simulation.toggle_animation)
+    
+    def show_animation_state(self):
+        """Keep the Start/Stop button in step with the simulation, whether
+        the button or the Space key toggled it (polled on the Tk thread)"""
+        running = self.simulation.animation_running
+        if running != self.shown_running:
+            self.shown_running = running
+            if running:
+                self.anim_button.config(text="Stop Animation", bg="#ff6b6b")
+            else:
+                self.anim_button.config(text="Start Animation", bg="#51cf66")
+        self.root.after(GUI_POLL_MS, self.show_animation_state)
     
     def update_speed(self, value):
         """Update car speed from slider"""
-        self.simulation.car_speed = float(value)
+        self.simulation.commands.post(setattr, self.simulation, 'car_speed', float(value))
+    
+    def update_frame_budget(self, value):
+        """Update the frame governor's budget from slider"""
+        # Tk also calls this (possibly later, when idle) for the initial set()
+        # of the budget given on the command line: that position is skipped
+        budget = float(value)
+        if budget != self.budget_shown:
+            self.budget_shown = budget
+            self.simulation.commands.post(self.simulation.set_frame_budget, budget)
     
     def set_view(self, view_type):
         """Set camera to preset view"""
-        self.simulation.camera.set_preset_view(view_type)
+        self.simulation.commands.post(self.simulation.camera.set_preset_view, view_type)
     
     def regenerate_city(self):
-        """Regenerate random city layout"""
-        self.simulation.generate_city()
+        """Regenerate random city layout (in the background)"""
+        self.simulation.commands.post(self.simulation.request_city)
     
     def run(self):
         """Run the GUI main loop"""
         self.root.mainloop()
 
 
+def start_control_gui(simulation):
+    """
+    Open the control panel on a daemon thread (tkinter is imported there, so
+    neither the import nor the window delays the simulation's first frame)
+    Args:
+        simulation: CitySimulation to control
+    """
+    def run_gui():
+        try:
+            ControlGUI(simulation).run()
+        except Exception as e:
+            print(f"Control panel unavailable: {e}")
+    
+    threading.Thread(target=run_gui, name='control-gui', daemon=True).start()
+
+
+def parse_args(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="3D City Simulation")
+    parser.add_argument('--width', type=int, default=800, help="window width")
+    parser.add_argument('--height', type=int, default=600, help="window height")
+    parser.add_argument('--buildings', type=int, default=60, help="number of buildings")
+    parser.add_argument('--cars', type=int, default=8, help="number of cars")
+    parser.add_argument('--grid', type=int, default=3, help="roads in each direction (city size)")
+    parser.add_argument('--seed', type=int, default=None, help="random seed for the city layout")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="processes for city generation (default: all cores for large cities)")
+    parser.add_argument('--traffic', choices=['routed', 'loop'], default='routed',
+                        help="route cars through intersections or loop them along one road")
+    parser.add_argument('--no-following', action='store_true',
+                        help="cars ignore each other (no car following or waiting at intersections)")
+    parser.add_argument('--city', default=None, help="load the city from a snapshot file")
+    parser.add_argument('--save-city', default=None, metavar='PATH',
+                        help="save the starting city to a snapshot file")
+    parser.add_argument('--infinite', action='store_true',
+                        help="stream an unbounded city in chunks around the camera")
+    parser.add_argument('--pipeline', choices=['auto', 'shader', 'fixed'], default='auto',
+                        help="GLSL 3.30 shader pipeline or fixed-function OpenGL (default: "
+                             "shaders when supported; G key toggles)")
+    parser.add_argument('--continuous', action='store_true',
+                        help="draw every frame, even when nothing on screen changed")
+    parser.add_argument('--startup-report', action='store_true',
+                        help="print how long each launch phase took (imports, context creation, "
+                             "generation, mesh upload, first frame)")
+
+    timing = parser.add_argument_group('simulation timing')
+    timing.add_argument('--fps', type=int, default=60, help="render frame rate cap (0 = uncapped)")
+    timing.add_argument('--sim-rate', type=float, default=60.0,
+                        help="simulation steps per simulated second")
+    timing.add_argument('--time-scale', type=float, default=1.0,
+                        help="simulated seconds per real second (e.g. 4 = four times real time)")
+    timing.add_argument('--unthrottled', action='store_true',
+                        help="simulate as many steps as fit in each frame")
+    timing.add_argument('--frame-budget', type=float, default=0.0, metavar='MS',
+                        help="frame time to hold by lowering render resolution, LOD and draw "
+                             "distance when frames run over it (0 = off; also in the control panel)")
+
+    profiling = parser.add_argument_group('profiling')
+    profiling.add_argument('--profile', action='store_true',
+                           help="time every frame phase and print a summary on exit (P key toggles)")
+    profiling.add_argument('--profile-gpu', action='store_true',
+                           help="also measure GPU time per phase with GL timer queries")
+    profiling.add_argument('--trace', default=None, metavar='PATH',
+                           help="write the profile as Chrome trace JSON on exit (implies --profile)")
+    capture = parser.add_argument_group('frame capture')
+    capture.add_argument('--capture', default=None, metavar='PATH',
+                         help="record frames: a directory (PNG sequence), .rgba/.raw file "
+                              "(raw frames) or .mp4/.mkv file (video via ffmpeg); V key toggles")
+    capture.add_argument('--capture-workers', type=int, default=2,
+                         help="threads encoding PNG frames")
+    headless = parser.add_argument_group('headless benchmark')
+    headless.add_argument('--headless', action='store_true',
+                          help="render offscreen for a fixed number of frames, no window or GUI")
+    headless.add_argument('--gl-backend', choices=['egl', 'osmesa'], default='egl',
+                          help="offscreen GL backend (default: egl)")
+    headless.add_argument('--frames', type=int, default=300, help="timed frames")
+    headless.add_argument('--warmup', type=int, default=10, help="untimed warmup frames")
+    headless.add_argument('--view', choices=['top', 'street', '45'], default=None,
+                          help="camera preset for the benchmark")
+    headless.add_argument('--output', default=None, help="write frame timings as JSON")
+    headless.add_argument('--fly', type=float, default=0.0,
+                          help="move the camera target this far along x every frame")
+    headless.add_argument('--no-culling', action='store_true', help="disable view-frustum culling")
+    headless.add_argument('--no-lod', action='store_true', help="draw everything at full detail")
+    headless.add_argument('--no-occlusion', action='store_true', help="disable occlusion culling")
+
+    farm = parser.add_argument_group('render farm')
+    farm.add_argument('--camera-path', default=None, metavar='PATH',
+                      help="with --headless and --capture: render every frame of a camera path "
+                           "(JSON keyframes) instead of the benchmark")
+    farm.add_argument('--render-workers', type=int, default=None,
+                      help="processes rendering the camera path (default: all cores)")
+    args = parser.parse_args(argv)
+    if args.camera_path and not (args.headless and args.capture):
+        parser.error("--camera-path renders offscreen: add --headless and --capture PATH")
+    if args.camera_path and args.frame_budget:
+        parser.error("--camera-path renders every frame at full quality (drop --frame-budget)")
+    if args.camera_path and args.infinite:
+        parser.error("--camera-path needs a fixed city (chunks stream in depending on the frames before)")
+    return args
+
+
+def configure_timing(simulation, args):
+    """Apply the simulation timing options to a CitySimulation"""
+    simulation.fps = args.fps
+    simulation.sim_clock = SimulationClock(step_rate=args.sim_rate, time_scale=args.time_scale)
+    simulation.sim_clock.unthrottled = args.unthrottled
+
+
+def configure_profiler(simulation, args):
+    """Apply the profiling options to a CitySimulation"""
+    profiler = simulation.profiler
+    profiler.enabled = args.profile or args.profile_gpu or args.trace is not None
+    if args.profile_gpu:
+        if bool(glQueryCounter):
+            profiler.gpu = True
+        else:
+            print("GL timer queries are not supported; profiling CPU time only")
+    simulation.trace_path = args.trace
+
+
+def launch_timer():
+    """
+    Start timing the launch from the top of this module
+    Returns:
+        StartupTimer: Timer with the module imports already recorded
+    """
+    startup = StartupTimer(LAUNCH_TIME)
+    startup.add('imports', IMPORT_SECONDS)
+    return startup
+
+
+def create_headless_simulation(args, workers=None):
+    """
+    Create the seeded offscreen simulation described by the command line
+    Args:
+        args: Parsed command line arguments
+        workers: Processes for city generation (args.workers if None)
+    Returns:
+        CitySimulation: The configured simulation
+    """
+    simulation = CitySimulation(
+        width=args.width, height=args.height, num_buildings=args.buildings,
+        num_cars=args.cars, grid_size=args.grid, seed=0 if args.seed is None else args.seed,
+        headless=True, gl_backend=args.gl_backend, infinite=args.infinite,
+        workers=args.workers if workers is None else workers, city=args.city,
+        traffic=args.traffic, car_following=not args.no_following, pipeline=args.pipeline,
+        startup=launch_timer()
+    )
+    if args.view:
+        simulation.camera.set_preset_view(args.view)
+    simulation.culling_enabled = not args.no_culling
+    simulation.lod_enabled = not args.no_lod
+    simulation.occlusion_enabled = not args.no_occlusion
+    configure_timing(simulation, args)
+    return simulation
+
+
+def run_render_farm(args):
+    """Render a camera path on worker processes and write its frames in order"""
+    from engine.render_farm import CameraPath, render_path
+    path = CameraPath.load(args.camera_path)
+
+    # Simulated time per frame follows the frame rate and time scale
+    steps = max(1, round(args.sim_rate * args.time_scale / (args.fps or 60)))
+
+    # Each worker builds the city itself (one generation process each)
+    factory = partial(create_headless_simulation, args, workers=1)
+    result = render_path(factory, path, args.capture, args.width, args.height,
+                         workers=args.render_workers, steps_per_frame=steps,
+                         writer_workers=args.capture_workers)
+    print(f"Rendered {result['frames']} frames of {args.camera_path} to {args.capture} "
+          f"(workers: {result['workers']}) in {result['seconds']:.2f} s "
+          f"({result['fps']:.1f} frames/s, {steps} simulation steps per frame)")
+
+    if args.output:
+        report = {
+            'config': {
+                'width': args.width, 'height': args.height, 'buildings': args.buildings,
+                'cars': args.cars, 'grid': args.grid, 'seed': 0 if args.seed is None else args.seed,
+                'camera_path': args.camera_path, 'capture': args.capture,
+                'steps_per_frame': steps, 'pipeline': args.pipeline,
+            },
+            'farm': result,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"  wrote {args.output}")
+
+
+def run_headless(args):
+    """Run the seeded headless benchmark and report frame timings"""
+    if args.camera_path:
+        run_render_farm(args)
+        return
+    seed = 0 if args.seed is None else args.seed
+    simulation = create_headless_simulation(args)
+    simulation.startup_report = args.startup_report
+    if args.frame_budget:
+        simulation.set_frame_budget(args.frame_budget)
+    if args.save_city:
+        simulation.save_city(args.save_city)
+    configure_profiler(simulation, args)
+    if args.capture:
+        simulation.start_capture(args.capture, args.capture_workers)
+
+    times = simulation.run_benchmark(frames=args.frames, warmup=args.warmup, fly_speed=args.fly)
+    summary = summarize_times(times)
+    capture = simulation.stop_capture()
+
+    print(f"Headless benchmark: {len(simulation.buildings)} buildings, "
+          f"{len(simulation.trees)} trees, {len(simulation.cars)} cars, "
+          f"{args.width}x{args.height}, {args.frames} frames, "
+          f"{'shader' if simulation.pipeline is not None else 'fixed-function'} pipeline")
+    print(f"  mean {summary['mean']:.2f} ms  p50 {summary['p50']:.2f} ms  "
+          f"p95 {summary['p95']:.2f} ms  p99 {summary['p99']:.2f} ms")
+    culling = simulation.culling_stats.as_dict()
+    for category in ('buildings', 'trees', 'cars'):
+        if category in culling:
+            entry = culling[category]
+            print(f"  culled {entry['culled']}/{entry['total']} {category} (last frame)")
+    for category, entry in culling.get('occluded', {}).items():
+        print(f"  occluded {entry['occluded']}/{entry['tested']} {category} (last frame)")
+    for category, counts in culling.get('lod', {}).items():
+        print(f"  {category} per detail level: {counts} (last frame)")
+    clock = simulation.sim_clock
+    print(f"  simulated {clock.sim_time:.2f} s in {clock.steps_taken} steps")
+    chunks = simulation.chunks.stats() if simulation.chunks is not None else None
+    if chunks:
+        print(f"  chunks: {chunks['resident']} resident ({chunks['vertex_bytes'] / 1e6:.1f} MB), "
+              f"{chunks['generated']} generated, {chunks['evicted']} evicted")
+    governor = simulation.governor.summary() if simulation.governor.enabled else None
+    if governor:
+        print(f"  governor: {len(governor['adjustments'])} adjustments, ending at quality "
+              f"{governor['level']} (resolution {governor['render_scale']:.0%}, "
+              f"LOD distance {governor['lod_scale']:.0%}, draw distance {governor['draw_scale']:.0%})")
+    simulation.report_profile()
+
+    if args.output:
+        report = {
+            'config': {
+                'width': args.width, 'height': args.height, 'buildings': args.buildings,
+                'cars': args.cars, 'grid': args.grid, 'seed': seed, 'frames': args.frames,
+                'warmup': args.warmup, 'view': args.view, 'culling': not args.no_culling,
+                'lod': not args.no_lod, 'occlusion': not args.no_occlusion, 'sim_rate': args.sim_rate,
+                'time_scale': args.time_scale, 'unthrottled': args.unthrottled,
+                'infinite': args.infinite, 'fly': args.fly, 'city': args.city,
+                'traffic': args.traffic, 'car_following': not args.no_following,
+                'pipeline': 'shader' if simulation.pipeline is not None else 'fixed',
+                'frame_budget': args.frame_budget,
+            },
+            'gl': simulation.renderer.offscreen.renderer_info(),
+            'summary': summary,
+            'culling': culling,
+            'simulation': {'steps': clock.steps_taken, 'sim_time': clock.sim_time},
+            'chunks': chunks,
+            'governor': governor,
+            'capture': capture,
+            'startup': simulation.startup.report(),
+            'profile': simulation.profiler.summary(),
+            'frame_times_ms': times,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"  wrote {args.output}")
+
+
 def main():
     """Main entry point"""
+    args = parse_args()
+    if args.headless:
+        run_headless(args)
+        return
+    
     print("=" * 50)
     print("3D City Simulation")
     print("=" * 50)
@@ -362,6 +1309,12 @@ def main():
     print("  WASD: Move view position")
     print("  Space: Pause/Resume animation")
     print("  R: Regenerate city")
+    print("  C: Toggle view-frustum culling")
+    print("  L: Toggle level of detail")
+    print("  O: Toggle occlusion culling")
+    print("  V: Start/stop recording frames (PNG sequence)")
+    print("  G: Toggle shader / fixed-function pipeline")
+    print("  P: Toggle frame profiler (prints a summary when turned off)")
     print("  1: Top view")
     print("  2: Street view")
     print("  3: 45° view")
@@ -370,17 +1323,29 @@ def main():
     print("\nStarting simulation...")
     print("=" * 50)
     
-    # Create simulation
-    simulation = CitySimulation()
-    
-    # Create and run GUI in separate thread
-    gui = ControlGUI(simulation)
-    gui_thread = threading.Thread(target=gui.run, daemon=True)
-    gui_thread.start()
+    # Create simulation (the first frames show the roads while the city is
+    # generated in the background)
+    simulation = CitySimulation(
+        width=args.width, height=args.height, num_buildings=args.buildings,
+        num_cars=args.cars, grid_size=args.grid, seed=args.seed, infinite=args.infinite,
+        workers=args.workers, city=args.city, traffic=args.traffic,
+        car_following=not args.no_following, pipeline=args.pipeline,
+        progressive=not args.save_city, startup=launch_timer()
+    )
+    simulation.startup_report = args.startup_report
+    simulation.redraw.enabled = not args.continuous
+    if args.frame_budget:
+        simulation.set_frame_budget(args.frame_budget)
+    if args.save_city:
+        simulation.save_city(args.save_city)
+    configure_timing(simulation, args)
+    configure_profiler(simulation, args)
+    if args.capture:
+        simulation.start_capture(args.capture, args.capture_workers)
     
-    # Run simulation
+    # Run simulation (the control panel opens once the first frame is shown)
     try:
-        simulation.run()
+        simulation.run(after_first_frame=partial(start_control_gui, simulation))
     except Exception as e:
         print(f"Error: {e}")
         import traceback
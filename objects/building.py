@@ -5,8 +5,12 @@ Generates and renders random buildings (cubes and cuboids)
 from OpenGL.GL import *
 import random
 
+from objects.palette import gray_color, intern_color
+
 
 class Building:
+    __slots__ = ('x', 'z', 'width', 'height', 'depth', 'color')
+    
     def __init__(self, x, z, width=None, height=None, depth=None, color=None):
         """
         Create a building at position (x, z)
@@ -26,12 +30,20 @@ class Building:
         self.height = height if height else random.uniform(5, 20)
         self.depth = depth if depth else random.uniform(2, 5)
         
-        # Random color if not provided (grayish building colors)
+        # Random color if not provided (grayish building colors); every
+        # building of a color shares one tuple
         if color:
-            self.color = color
+            self.color = intern_color(color)
         else:
-            gray = random.uniform(0.5, 0.8)
-            self.color = (gray, gray, gray)
+            self.color = gray_color(random.uniform(0.5, 0.8))
+    
+    @property
+    def bounds(self):
+        """Bounding box ((min x, y, z), (max x, y, z)) for culling"""
+        return (
+            (self.x - self.width / 2, 0.0, self.z - self.depth / 2),
+            (self.x + self.width / 2, self.height, self.z + self.depth / 2),
+        )
     
     def draw(self):
         """Render the building as a cuboid"""
@@ -2,68 +2,383 @@
 Car class for 3D city simulation
 Renders and animates cars moving along roads
 """
+import random
+
+import numpy as np
 from OpenGL.GL import *
-import math
+
+from engine.mesh import build_box_vertices, instance_rows
+from objects.palette import intern_color
+
+
+# Path types stored in CarFleet.path_type
+PATH_TYPES = ('horizontal', 'vertical')
+PATH_HORIZONTAL = 0
+PATH_VERTICAL = 1
+
+# Random bright car colors
+CAR_COLORS = (
+    (1.0, 0.0, 0.0),  # Red
+    (0.0, 0.0, 1.0),  # Blue
+    (1.0, 1.0, 0.0),  # Yellow
+    (0.0, 1.0, 0.0),  # Green
+    (1.0, 0.5, 0.0),  # Orange
+)
+
+# Car dimensions (shared by every car)
+CAR_WIDTH = 1.0
+CAR_HEIGHT = 0.8
+CAR_LENGTH = 2.0
+
+# Road surface height the cars drive on
+ROAD_HEIGHT = 0.35
+
+# Per-car arrays that make up the fleet state (saved in city snapshots)
+FLEET_COLUMNS = (
+    'position', 'speed', 'previous_position', 'path_start', 'path_end',
+    'path_type', 'road_position', 'lane_offset', 'color',
+    'direction', 'edge', 'destination', 'velocity',
+)
+
+
+class CarFleet:
+    def __init__(self, count=0):
+        """
+        Create a fleet of cars stored as NumPy arrays (one entry per car)
+        Args:
+            count: Number of cars
+        """
+        # Movement properties
+        self.position = np.zeros(count, dtype=np.float64)
+        self.speed = np.full(count, 0.05, dtype=np.float64)  # Units per simulation step
+
+        # Position before the last step, for interpolating between steps
+        self.previous_position = np.zeros(count, dtype=np.float64)
+
+        # Path parameters - expanded for larger city
+        self.path_start = np.full(count, -75.0, dtype=np.float32)
+        self.path_end = np.full(count, 75.0, dtype=np.float32)
+
+        # Road assignment: path type index into PATH_TYPES, road center
+        # (Z for horizontal, X for vertical) and offset from the center
+        self.path_type = np.zeros(count, dtype=np.uint8)
+        self.road_position = np.zeros(count, dtype=np.float32)
+        self.lane_offset = np.ones(count, dtype=np.float32)
+
+        self.color = np.zeros((count, 3), dtype=np.float32)
+
+        # Driving direction along the path (+1 or -1)
+        self.direction = np.ones(count, dtype=np.float32)
+
+        # Routed traffic: current road graph edge and destination intersection
+        # (-1 for cars looping along a single road); the router sends cars
+        # that reach the end of their edge on to the next one
+        self.edge = np.full(count, -1, dtype=np.int32)
+        self.destination = np.full(count, -1, dtype=np.int32)
+        self.router = None
+
+        # Car following: with a driver model, cars drive at their current
+        # velocity (units per step) and speed is the speed they aim for
+        self.velocity = self.speed.copy()
+        self.driver_model = None
+
+        # Scratch buffers reused by update() to avoid per-step allocations
+        self._step = np.zeros(count, dtype=np.float64)
+        self._wrapped = np.zeros(count, dtype=bool)
+
+    @classmethod
+    def from_columns(cls, columns):
+        """
+        Create a fleet that uses existing arrays as its state (no copies)
+        Args:
+            columns: Mapping with an array for the names in FLEET_COLUMNS
+                     (missing ones get their defaults); the arrays must be
+                     writable (e.g. copy-on-write memory maps)
+        Returns:
+            CarFleet: Fleet backed by the given arrays
+        """
+        count = len(columns['position'])
+        fleet = cls(count)
+        for name in FLEET_COLUMNS:
+            if name in columns:
+                setattr(fleet, name, columns[name])
+        return fleet
+
+    def __len__(self):
+        return len(self.position)
+
+    def __getitem__(self, index):
+        """Return a Car view of one fleet entry"""
+        if not -len(self) <= index < len(self):
+            raise IndexError("car index out of range")
+        return Car(fleet=self, index=index % len(self))
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield Car(fleet=self, index=index)
+
+    def update(self, speed_multiplier=1.0):
+        """
+        Advance every car
+        Args:
+            speed_multiplier: Multiplier for car speed
+        """
+        np.copyto(self.previous_position, self.position)
+        if self.driver_model is not None:
+            # Accelerate towards the desired speed, brake for the car ahead
+            self.driver_model.step(self, speed_multiplier, out=self._step)
+        else:
+            np.multiply(self.speed, speed_multiplier, out=self._step)
+        self._step *= self.direction
+        self.position += self._step
+
+        # Distance driven past the end of the path
+        np.subtract(self.position, self.path_end, out=self._step)
+        self._step *= self.direction
+        np.greater(self._step, 0.0, out=self._wrapped)
+
+        if self.router is not None:
+            # Routed cars turn onto the next edge of their route
+            self.router.advance(self, self._wrapped, self._step)
+            return
+
+        # Loop back when reaching end (no interpolation across the jump)
+        np.copyto(self.position, self.path_start, where=self._wrapped)
+        np.copyto(self.previous_position, self.path_start, where=self._wrapped)
+
+    def interpolated_positions(self, alpha=1.0):
+        """
+        Get positions along the path between the last two steps
+        Args:
+            alpha: 0 for the previous step, 1 for the latest one
+        Returns:
+            np.ndarray: Position of every car
+        """
+        if alpha >= 1.0:
+            return self.position
+        return self.previous_position + (self.position - self.previous_position) * alpha
+
+    def world_positions(self, alpha=1.0):
+        """
+        Get car centers on the road surface
+        Args:
+            alpha: Interpolation factor between the last two steps
+        Returns:
+            tuple: (x, z) arrays of car centers
+        """
+        position = self.interpolated_positions(alpha)
+        across = self.road_position + self.lane_offset
+        horizontal = self.path_type == PATH_HORIZONTAL
+        x = np.where(horizontal, position, across)
+        z = np.where(horizontal, across, position)
+        return x, z
+
+    def bounds(self, alpha=1.0):
+        """
+        Get bounding boxes of every car (body and cab, either heading)
+        Args:
+            alpha: Interpolation factor between the last two steps
+        Returns:
+            tuple: (centers, half_sizes) as (N, 3) arrays
+        """
+        x, z = self.world_positions(alpha)
+        top = CAR_HEIGHT / 2 * 2.8  # Cab roof above the road
+        centers = np.empty((len(self), 3))
+        centers[:, 0] = x
+        centers[:, 1] = ROAD_HEIGHT + top / 2
+        centers[:, 2] = z
+        half_sizes = np.broadcast_to((CAR_LENGTH / 2, top / 2, CAR_LENGTH / 2), centers.shape)
+        return centers, half_sizes
+
+    def build_vertices(self, indices=None, alpha=1.0):
+        """
+        Build body and cab boxes for every car (same shapes as Car.draw)
+        Args:
+            indices: Only build these cars (all if None)
+            alpha: Interpolation factor between the last two steps
+        Returns:
+            np.ndarray: Interleaved quad vertices
+        """
+        x, z = self.world_positions(alpha)
+        path_type, color, direction = self.path_type, self.color, self.direction
+        if indices is not None:
+            x, z, path_type, color = x[indices], z[indices], path_type[indices], color[indices]
+            direction = direction[indices]
+        count = len(x)
+        horizontal = (path_type == PATH_HORIZONTAL)[:, None]
+        w, h, l = CAR_WIDTH / 2, CAR_HEIGHT / 2, CAR_LENGTH / 2
+
+        # Horizontal cars are rotated 90 degrees, so length runs along x;
+        # the cab sits towards the back of the driving direction
+        body_half = np.where(horizontal, (l, h, w), (w, h, l))
+        cab_half = np.where(horizontal, (l * 0.5, h * 0.6, w * 0.9), (w * 0.9, h * 0.6, l * 0.5))
+        cab_shift = np.where(horizontal, (-l * 0.3, 0.0, 0.0), (0.0, 0.0, -l * 0.3))
+        cab_shift = cab_shift * direction[:, None]
+
+        body_center = np.empty((count, 3), dtype=np.float32)
+        body_center[:, 0] = x
+        body_center[:, 1] = ROAD_HEIGHT + h
+        body_center[:, 2] = z
+        cab_center = body_center + cab_shift
+        cab_center[:, 1] += h * 1.2
+
+        return np.concatenate([
+            build_box_vertices(body_center, body_half, color),
+            build_box_vertices(cab_center, cab_half, color * 0.7),
+        ])
+
+    def instances(self, indices=None, alpha=1.0):
+        """
+        Get instance rows placing car_model_vertices() at every car
+        (for the shader pipeline: one instanced draw for the whole fleet)
+        Args:
+            indices: Only these cars (all if None)
+            alpha: Interpolation factor between the last two steps
+        Returns:
+            np.ndarray: Instance rows (see engine.mesh.instance_rows)
+        """
+        x, z = self.world_positions(alpha)
+        path_type, color, direction = self.path_type, self.color, self.direction
+        if indices is not None:
+            x, z, path_type, color = x[indices], z[indices], path_type[indices], color[indices]
+            direction = direction[indices]
+        offsets = np.empty((len(x), 3), dtype=np.float32)
+        offsets[:, 0] = x
+        offsets[:, 1] = ROAD_HEIGHT + CAR_HEIGHT / 2
+        offsets[:, 2] = z
+
+        # The model drives along +z: horizontal cars turn a quarter, cars
+        # driving backwards half a turn
+        yaw = np.where(path_type == PATH_HORIZONTAL, np.pi / 2, 0.0) + np.where(direction < 0, np.pi, 0.0)
+        return instance_rows(offsets, colors=color, yaws=yaw)
+
+
+def car_model_vertices():
+    """
+    Build the car shape of CarFleet.build_vertices once, driving along +z
+    (body white and cab darker, both tinted by each car's color)
+    Returns:
+        np.ndarray: Interleaved quad vertices around the body center
+    """
+    w, h, l = CAR_WIDTH / 2, CAR_HEIGHT / 2, CAR_LENGTH / 2
+    return build_box_vertices(
+        [(0.0, 0.0, 0.0), (0.0, h * 1.2, -l * 0.3)],
+        [(w, h, l), (w * 0.9, h * 0.6, l * 0.5)],
+        [(1.0, 1.0, 1.0), (0.7, 0.7, 0.7)],
+    )
+
+
+def fleet_field(name, *linked):
+    """
+    Property reading/writing one column of the backing CarFleet
+    Args:
+        name: Column read and written
+        linked: Further columns set to the same value on write
+    """
+    def getter(self):
+        return float(getattr(self.fleet, name)[self.index])
+
+    def setter(self, value):
+        for column in (name,) + linked:
+            getattr(self.fleet, column)[self.index] = value
+
+    return property(getter, setter)
 
 
 class Car:
-    def __init__(self, path_type='horizontal', color=None):
+    # A car is only a view of its fleet entry
+    __slots__ = ('fleet', 'index')
+    
+    # Car dimensions
+    width = CAR_WIDTH
+    height = CAR_HEIGHT
+    length = CAR_LENGTH
+
+    def __init__(self, path_type='horizontal', color=None, fleet=None, index=0):
         """
         Create a car that moves along a path
         Args:
             path_type: 'horizontal' or 'vertical' path
             color: Car color tuple (random if None)
+            fleet: CarFleet holding this car's state (a new one-car fleet if None)
+            index: Index of this car in the fleet
         """
+        self.fleet = fleet
+        self.index = index
+        if fleet is not None:
+            return
+
+        # Standalone car: back it with its own one-car fleet
+        self.fleet = CarFleet(1)
         self.path_type = path_type
-        
-        # Car dimensions
-        self.width = 1.0
-        self.height = 0.8
-        self.length = 2.0
-        
+
         # Car color
-        if color:
-            self.color = color
-        else:
-            # Random bright car colors
-            import random
-            colors = [
-                (1.0, 0.0, 0.0),  # Red
-                (0.0, 0.0, 1.0),  # Blue
-                (1.0, 1.0, 0.0),  # Yellow
-                (0.0, 1.0, 0.0),  # Green
-                (1.0, 0.5, 0.0),  # Orange
-            ]
-            self.color = random.choice(colors)
-        
-        # Movement properties
-        self.position = 0.0
-        self.speed = 0.05  # Units per frame
-        
-        # Path parameters - expanded for larger city
-        self.path_start = -75.0
-        self.path_end = 75.0
-        
+        self.color = color if color else random.choice(CAR_COLORS)
+
         # Lane offset for driving on a specific road
         # This will be set by create_cars() to assign cars to different roads
-        if path_type == 'horizontal':
-            self.lane_offset = 1.0  # Offset from road center (drive on right side)
-            self.road_position = 0.0  # Z position of the road (can be -50, 0, or 50)
-        else:  # vertical
-            self.lane_offset = 1.0
-            self.road_position = 0.0  # X position of the road (can be -50, 0, or 50)
+        # road_position is the Z (horizontal) or X (vertical) position of the road
+        self.lane_offset = 1.0  # Offset from road center (drive on right side)
+        self.road_position = 0.0
+
+    # Setting the position places the car there without interpolation
+    position = fleet_field('position', 'previous_position')
+    speed = fleet_field('speed')
+    path_start = fleet_field('path_start')
+    path_end = fleet_field('path_end')
+    road_position = fleet_field('road_position')
+    lane_offset = fleet_field('lane_offset')
+
+    @property
+    def path_type(self):
+        return PATH_TYPES[self.fleet.path_type[self.index]]
+
+    @path_type.setter
+    def path_type(self, value):
+        self.fleet.path_type[self.index] = PATH_TYPES.index(value)
+
+    @property
+    def color(self):
+        return intern_color(self.fleet.color[self.index].tolist())
+
+    @color.setter
+    def color(self, value):
+        self.fleet.color[self.index] = value
     
+    @property
+    def bounds(self):
+        """Bounding box of the car as ((min x, y, z), (max x, y, z))"""
+        across = self.road_position + self.lane_offset
+        x, z = (self.position, across) if self.path_type == 'horizontal' else (across, self.position)
+        half, top = self.length / 2, self.height / 2 * 2.8
+        return (x - half, ROAD_HEIGHT, z - half), (x + half, ROAD_HEIGHT + top, z + half)
+
     def update(self, speed_multiplier=1.0):
         """
         Update car position
         Args:
             speed_multiplier: Multiplier for car speed
         """
-        self.position += self.speed * speed_multiplier
-        
+        fleet, index = self.fleet, self.index
+        direction = float(fleet.direction[index])
+        position = self.position + self.speed * speed_multiplier * direction
+
+        # Distance driven past the end of the path (cars may drive backwards)
+        past_end = (position - self.path_end) * direction
+        if past_end > 0 and fleet.router is not None and fleet.edge[index] >= 0:
+            # Routed cars turn onto the next edge of their route
+            arrived = np.zeros(len(fleet), dtype=bool)
+            arrived[index] = True
+            overshoot = np.zeros(len(fleet))
+            overshoot[index] = past_end
+            fleet.position[index] = position
+            fleet.router.advance(fleet, arrived, overshoot)
+            return
+
         # Loop back when reaching end
-        if self.position > self.path_end:
-            self.position = self.path_start
+        if past_end > 0:
+            position = self.path_start
+        self.position = position
     
     def draw(self):
         """Render the car"""
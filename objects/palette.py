@@ -0,0 +1,56 @@
+"""
+Shared colors for 3D city simulation
+Scene objects hold references to one shared tuple per distinct color instead
+of a tuple (and three floats) of their own
+"""
+import numpy as np
+
+
+# Steps per color channel (an 8-bit framebuffer shows no finer ones)
+COLOR_LEVELS = 255
+
+# Distinct colors kept; colors past this are returned as they are
+MAX_INTERNED_COLORS = 4096
+
+# Interned color tuples by value
+_colors = {}
+
+
+def intern_color(color):
+    """
+    Get the shared tuple equal to a color
+    Args:
+        color: RGB sequence
+    Returns:
+        tuple: The same tuple object for every equal color
+    """
+    color = tuple(float(channel) for channel in color)
+    shared = _colors.get(color)
+    if shared is None:
+        if len(_colors) >= MAX_INTERNED_COLORS:
+            return color
+        _colors[color] = shared = color
+    return shared
+
+
+def quantize_channel(value):
+    """
+    Round a color channel to the nearest of COLOR_LEVELS steps
+    Args:
+        value: Channel value(s) in [0, 1]
+    Returns:
+        np.ndarray: Rounded values
+    """
+    return np.round(np.asarray(value) * COLOR_LEVELS) / COLOR_LEVELS
+
+
+def gray_color(value):
+    """
+    Shared gray color tuple
+    Args:
+        value: Gray level in [0, 1] (quantized to COLOR_LEVELS steps)
+    Returns:
+        tuple: Interned (gray, gray, gray)
+    """
+    gray = float(quantize_channel(value))
+    return intern_color((gray, gray, gray))
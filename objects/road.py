@@ -2,107 +2,205 @@
 Road class for 3D city simulation
 Renders roads as planes with lines
 """
+import numpy as np
 from OpenGL.GL import *
 
+from engine.mesh import StaticMesh, VERTEX_FLOATS
+from objects.palette import intern_color
+
+
+# Road colors: medium gray asphalt (lighter for better visibility when
+# zoomed out), yellow lane markers and white edge markers
+ROAD_COLOR = intern_color((0.3, 0.3, 0.3))
+ROAD_LINE_COLOR = intern_color((0.9, 0.9, 0.0))
+ROAD_EDGE_COLOR = intern_color((0.9, 0.9, 0.9))
+
+# Heights of the road layers (above the ground plane to prevent z-fighting)
+ROAD_SURFACE_HEIGHT = 0.35
+ROAD_CENTER_LINE_HEIGHT = 0.36
+ROAD_EDGE_LINE_HEIGHT = 0.37
+
+
+def road_offsets(count, spacing):
+    """
+    Centered offsets of parallel roads
+    Args:
+        count: Number of parallel roads
+        spacing: Distance between neighbouring roads
+    Returns:
+        list: Road center offsets, e.g. [-50.0, 0.0, 50.0] for 3 roads
+    """
+    return [(i - (count - 1) / 2) * spacing for i in range(count)]
+
+
+def pack_vertices(points, color):
+    """
+    Interleave points with an up normal and a flat color
+    Args:
+        points: (N, 3) positions
+        color: RGB color tuple
+    Returns:
+        np.ndarray: (N, VERTEX_FLOATS) float32 vertex array
+    """
+    vertices = np.empty((len(points), VERTEX_FLOATS), dtype=np.float32)
+    vertices[:, 0:3] = points
+    vertices[:, 3:6] = (0.0, 1.0, 0.0)
+    vertices[:, 6:9] = color
+    return vertices
+
 
 class Road:
-    def __init__(self):
-        """Initialize road parameters"""
-        # Road color (medium gray asphalt - lighter for better visibility when zoomed out)
-        self.color = (0.3, 0.3, 0.3)
-        self.line_color = (0.9, 0.9, 0.0)  # Yellow lane markers
-        self.edge_color = (0.9, 0.9, 0.9)  # White edge markers
-        
+    __slots__ = (
+        'color', 'line_color', 'edge_color', 'road_width', 'road_length', 'grid_spacing',
+        'num_horizontal', 'num_vertical', 'mesh', 'mesh_key',
+    )
+
+    def __init__(self, num_horizontal=3, num_vertical=3):
+        """
+        Initialize road parameters
+        Args:
+            num_horizontal: Number of east-west roads
+            num_vertical: Number of north-south roads
+        """
+        # Road colors (shared palette tuples)
+        self.color = ROAD_COLOR
+        self.line_color = ROAD_LINE_COLOR
+        self.edge_color = ROAD_EDGE_COLOR
+
         # Road dimensions - expanded for larger city
         self.road_width = 8.0  # Width of each road
-        self.road_length = 150.0  # Length of each road (expanded from 60)
         self.grid_spacing = 50.0  # Spacing between parallel roads
-        
-    def draw(self):
-        """Render the road network - expanded grid layout"""
-        # Draw horizontal roads (east-west)
-        for offset in [-self.grid_spacing, 0, self.grid_spacing]:
-            self.draw_road_segment(-self.road_length/2, offset, self.road_width, self.road_length, 'horizontal')
-        
-        # Draw vertical roads (north-south)
-        for offset in [-self.grid_spacing, 0, self.grid_spacing]:
-            self.draw_road_segment(offset, -self.road_length/2, self.road_width, self.road_length, 'vertical')
-        
-    def draw_road_segment(self, x, z, width, length, orientation):
+
+        # Length of each road: half a spacing past the outermost crossing
+        # road on every side (150 on the default 3x3 grid)
+        self.road_length = max(num_horizontal, num_vertical) * self.grid_spacing
+
+        # Grid size (N x M roads)
+        self.num_horizontal = num_horizontal
+        self.num_vertical = num_vertical
+
+        # Cached network mesh, rebuilt only when the parameters above change
+        self.mesh = StaticMesh()
+        self.mesh.line_width = 3.0
+        self.mesh_key = None
+
+    @property
+    def horizontal_positions(self):
+        """Z positions of the east-west roads"""
+        return road_offsets(self.num_horizontal, self.grid_spacing)
+
+    @property
+    def vertical_positions(self):
+        """X positions of the north-south roads"""
+        return road_offsets(self.num_vertical, self.grid_spacing)
+
+    def parameters(self):
+        """
+        Parameters the cached mesh depends on
+        Returns:
+            tuple: Hashable snapshot of the road layout and colors
         """
-        Draw a single road segment
+        return (
+            self.road_width, self.road_length, self.grid_spacing,
+            self.num_horizontal, self.num_vertical,
+            tuple(self.color), tuple(self.line_color), tuple(self.edge_color),
+        )
+
+    def draw(self, pipeline=None):
+        """
+        Render the road network - expanded grid layout
+        Args:
+            pipeline: ShaderPipeline to draw with (fixed function if None)
+        """
+        key = self.parameters()
+        if key != self.mesh_key:
+            self.build_mesh()
+            self.mesh_key = key
+        if pipeline is not None:
+            pipeline.draw_mesh(self.mesh)
+        else:
+            self.mesh.draw()
+
+    def build_mesh(self):
+        """Generate surfaces, edge lines and dashes of every road as one mesh"""
+        surfaces, lines = [], []
+
+        # Horizontal roads (east-west)
+        for offset in self.horizontal_positions:
+            surface, edges, dashes = self.segment_geometry(
+                -self.road_length/2, offset, self.road_width, self.road_length, 'horizontal'
+            )
+            surfaces.append(surface)
+            lines.extend([edges, dashes])
+
+        # Vertical roads (north-south)
+        for offset in self.vertical_positions:
+            surface, edges, dashes = self.segment_geometry(
+                offset, -self.road_length/2, self.road_width, self.road_length, 'vertical'
+            )
+            surfaces.append(surface)
+            lines.extend([edges, dashes])
+
+        surface_vertices = np.concatenate(surfaces) if surfaces else np.zeros((0, VERTEX_FLOATS), np.float32)
+        line_vertices = np.concatenate(lines) if lines else np.zeros((0, VERTEX_FLOATS), np.float32)
+        self.mesh.set_data(
+            np.concatenate([surface_vertices, line_vertices]),
+            [
+                (GL_QUADS, 0, len(surface_vertices)),
+                (GL_LINES, len(surface_vertices), len(line_vertices)),
+            ]
+        )
+
+    def segment_geometry(self, x, z, width, length, orientation):
+        """
+        Build the vertices of a single road segment
         Args:
             x, z: Position
             width, length: Dimensions
             orientation: 'horizontal' or 'vertical'
+        Returns:
+            tuple: (surface quad vertices, edge line vertices, dash line vertices)
         """
-        glPushMatrix()
-        
-        # Draw road surface
-        glColor3f(*self.color)
-        glBegin(GL_QUADS)
-        glNormal3f(0, 1, 0)
-        
+        # Work in (along, height, across) coordinates, then map to world axes
         if orientation == 'horizontal':
-            glVertex3f(x, 0.35, z - width/2)
-            glVertex3f(x + length, 0.35, z - width/2)
-            glVertex3f(x + length, 0.35, z + width/2)
-            glVertex3f(x, 0.35, z + width/2)
+            start, center = x, z
         else:  # vertical
-            glVertex3f(x - width/2, 0.35, z)
-            glVertex3f(x + width/2, 0.35, z)
-            glVertex3f(x + width/2, 0.35, z + length)
-            glVertex3f(x - width/2, 0.35, z + length)
-        
-        glEnd()
-        
-        # Draw edge lines (white) for better visibility when zoomed out
-        glColor3f(*self.edge_color)
-        glLineWidth(3.0)
-        glBegin(GL_LINES)
-        
-        if orientation == 'horizontal':
-            # Top edge
-            glVertex3f(x, 0.37, z + width/2)
-            glVertex3f(x + length, 0.37, z + width/2)
-            # Bottom edge
-            glVertex3f(x, 0.37, z - width/2)
-            glVertex3f(x + length, 0.37, z - width/2)
-        else:  # vertical
-            # Left edge
-            glVertex3f(x - width/2, 0.37, z)
-            glVertex3f(x - width/2, 0.37, z + length)
-            # Right edge
-            glVertex3f(x + width/2, 0.37, z)
-            glVertex3f(x + width/2, 0.37, z + length)
-        
-        glEnd()
-        
-        # Draw center line (yellow) - increased width for better visibility
-        glColor3f(*self.line_color)
-        glLineWidth(3.0)
-        glBegin(GL_LINES)
-        
-        if orientation == 'horizontal':
-            # Dashed center line
-            num_dashes = int(length / 2)
-            for i in range(num_dashes):
-                start_x = x + i * 2
-                end_x = start_x + 1
-                if end_x <= x + length:
-                    glVertex3f(start_x, 0.36, z)
-                    glVertex3f(end_x, 0.36, z)
-        else:  # vertical
-            # Dashed center line
-            num_dashes = int(length / 2)
-            for i in range(num_dashes):
-                start_z = z + i * 2
-                end_z = start_z + 1
-                if end_z <= z + length:
-                    glVertex3f(x, 0.36, start_z)
-                    glVertex3f(x, 0.36, end_z)
-        
-        glEnd()
-        glLineWidth(1.0)
-        
-        glPopMatrix()
+            start, center = z, x
+
+        # Road surface
+        surface = np.array([
+            (start, ROAD_SURFACE_HEIGHT, center - width/2),
+            (start + length, ROAD_SURFACE_HEIGHT, center - width/2),
+            (start + length, ROAD_SURFACE_HEIGHT, center + width/2),
+            (start, ROAD_SURFACE_HEIGHT, center + width/2),
+        ])
+
+        # Edge lines (white) for better visibility when zoomed out
+        edges = np.array([
+            (start, ROAD_EDGE_LINE_HEIGHT, center + width/2),
+            (start + length, ROAD_EDGE_LINE_HEIGHT, center + width/2),
+            (start, ROAD_EDGE_LINE_HEIGHT, center - width/2),
+            (start + length, ROAD_EDGE_LINE_HEIGHT, center - width/2),
+        ])
+
+        # Dashed center line (yellow): 1 unit dashes every 2 units
+        dash_start = start + 2.0 * np.arange(int(length / 2))
+        dash_start = dash_start[dash_start + 1 <= start + length]
+        dashes = np.empty((len(dash_start) * 2, 3))
+        dashes[0::2, 0] = dash_start
+        dashes[1::2, 0] = dash_start + 1
+        dashes[:, 1] = ROAD_CENTER_LINE_HEIGHT
+        dashes[:, 2] = center
+
+        if orientation == 'vertical':
+            # Swap along/across back to world x/z
+            for points in (surface, edges, dashes):
+                points[:, [0, 2]] = points[:, [2, 0]]
+            # Same corner order as the original vertical quad
+            surface = surface[[0, 3, 2, 1]]
+
+        return (
+            pack_vertices(surface, self.color),
+            pack_vertices(edges, self.edge_color),
+            pack_vertices(dashes, self.line_color),
+        )
@@ -0,0 +1,711 @@
+"""
+Road graph traffic for 3D city simulation
+Turns the road grid into a graph of intersections and directed lane segments
+and routes cars between intersections through a shared shortest-path cache
+"""
+import heapq
+
+import numpy as np
+
+from objects.car import CAR_LENGTH, PATH_HORIZONTAL, PATH_VERTICAL
+
+
+# Distance of a lane's center from the road center (cars keep right)
+LANE_OFFSET = 1.0
+
+# Past this fraction of stale destinations, rebuilding every route at once
+# (vectorized) is cheaper than refreshing them one by one; only done on
+# graphs up to FULL_REBUILD_NODES intersections, as it takes O(nodes^3) time
+# and tables of nodes x nodes
+REBUILD_FRACTION = 0.125
+FULL_REBUILD_NODES = 256
+
+# Cars closer than this to the end of their edge check whether the next edge
+# has room, and stop before the intersection if not
+STOP_LOOKAHEAD = 12.0
+
+# Bits of the lane sort key holding the (quantized) position along the lane;
+# the lane itself takes the 34 bits above (direction kind and lane center)
+POSITION_BITS = 30
+
+
+class RoadGraph:
+    def __init__(self, road):
+        """
+        Build the graph of a road grid
+        Nodes are the intersections; every road segment between two
+        neighbouring intersections gives one edge per driving direction
+        Args:
+            road: Road whose layout to follow
+        """
+        xs = np.array(road.vertical_positions, dtype=np.float64)
+        zs = np.array(road.horizontal_positions, dtype=np.float64)
+
+        # Node (a, b) is where vertical road a crosses horizontal road b
+        a, b = np.meshgrid(np.arange(len(xs)), np.arange(len(zs)), indexing='ij')
+        self.node_x = xs[a.ravel()]
+        self.node_z = zs[b.ravel()]
+        self.num_nodes = len(self.node_x)
+        node = np.arange(self.num_nodes).reshape(len(xs), len(zs))
+
+        # Segments along horizontal roads (between x neighbours) and vertical
+        # roads (between z neighbours), each driven both ways
+        segments = [
+            (node[:-1, :].ravel(), node[1:, :].ravel(), PATH_HORIZONTAL),
+            (node[:, :-1].ravel(), node[:, 1:].ravel(), PATH_VERTICAL),
+        ]
+        start_nodes, end_nodes, path_types = [], [], []
+        for first, second, path_type in segments:
+            start_nodes += [first, second]
+            end_nodes += [second, first]
+            path_types.append(np.full(2 * len(first), path_type, dtype=np.uint8))
+        self.edge_from = np.concatenate(start_nodes).astype(np.int32)
+        self.edge_to = np.concatenate(end_nodes).astype(np.int32)
+        self.path_type = np.concatenate(path_types)
+        self.num_edges = len(self.edge_from)
+
+        # Position along the road axis at both ends, and the road's center
+        # line across it (Z of a horizontal road, X of a vertical one)
+        horizontal = self.path_type == PATH_HORIZONTAL
+        self.start = np.where(horizontal, self.node_x[self.edge_from], self.node_z[self.edge_from])
+        self.end = np.where(horizontal, self.node_x[self.edge_to], self.node_z[self.edge_to])
+        self.road_position = np.where(horizontal, self.node_z[self.edge_from],
+                                      self.node_x[self.edge_from])
+        self.direction = np.sign(self.end - self.start)
+        self.length = np.abs(self.end - self.start)
+
+        # Keep right: +Z of cars heading +X, -X of cars heading +Z
+        self.lane_offset = np.where(horizontal, LANE_OFFSET, -LANE_OFFSET) * self.direction
+
+        # Closed edges are skipped by routing
+        self.open = np.ones(self.num_edges, dtype=bool)
+
+        # Waiting cars stop with their center this far before an intersection
+        # (clear of the crossing road)
+        self.stop_line = road.road_width / 2 + CAR_LENGTH / 2
+
+        # Up to 4 edges leave and enter each node (-1 pads missing ones)
+        self.out_edges = self.edge_table(self.edge_from)
+        self.in_edges = self.edge_table(self.edge_to)
+
+    def edge_table(self, nodes):
+        """
+        Group edges by node
+        Args:
+            nodes: Node of every edge (its start or its end)
+        Returns:
+            np.ndarray: (num_nodes, 4) edge indices, -1 where unused
+        """
+        table = np.full((self.num_nodes, 4), -1, dtype=np.int32)
+        order = np.argsort(nodes, kind='stable')
+        sorted_nodes = nodes[order]
+        slot = np.arange(len(order)) - np.searchsorted(sorted_nodes, sorted_nodes)
+        table[sorted_nodes, slot] = order
+        return table
+
+    def same_layout(self, other):
+        """
+        Check whether another graph has the same intersections, lanes and
+        closed edges (so routes cached on one are valid on the other)
+        Args:
+            other: RoadGraph to compare with
+        Returns:
+            bool: True if they are interchangeable
+        """
+        return (self.num_nodes == other.num_nodes and self.stop_line == other.stop_line and
+                np.array_equal(self.node_x, other.node_x) and
+                np.array_equal(self.node_z, other.node_z) and
+                np.array_equal(self.open, other.open))
+
+    def find_edge(self, from_node, to_node):
+        """
+        Get the edge between two neighbouring intersections
+        Returns:
+            int: Edge index, or -1 if they are not connected
+        """
+        for edge in self.out_edges[from_node]:
+            if edge >= 0 and self.edge_to[edge] == to_node:
+                return int(edge)
+        return -1
+
+
+class RouteCache:
+    def __init__(self, graph):
+        """
+        Shortest routes from every intersection to the destinations in use
+        Stored as next-hop columns: next_edge[node, column[destination]] is
+        the edge to take at node to get to destination fastest (-1 if
+        unreachable); a destination gets its column (filled by refresh) the
+        first time a route to it is looked up
+        Args:
+            graph: RoadGraph to route on
+        """
+        self.graph = graph
+        count = graph.num_nodes
+        self.distance = np.empty((count, 0))
+        self.next_edge = np.empty((count, 0), dtype=np.int32)
+
+        # Column of each destination (-1 if none yet), destination of each
+        # column and the number of columns in use
+        self.column = np.full(count, -1, dtype=np.int32)
+        self.destinations = np.empty(0, dtype=np.int32)
+        self.used = 0
+
+        # Destinations whose column of the tables is up to date
+        self.valid = np.zeros(count, dtype=bool)
+
+        # Counters for benchmarks
+        self.full_rebuilds = 0
+        self.refreshed = 0
+        self.invalidated = 0
+
+    def rebuild(self):
+        """Recompute every route (Floyd-Warshall, one vectorized pass per node)"""
+        graph = self.graph
+        count = graph.num_nodes
+        distance = np.full((count, count), np.inf)
+        next_edge = np.full((count, count), -1, dtype=np.int32)
+        np.fill_diagonal(distance, 0.0)
+
+        # Direct edges (the grid has no parallel edges)
+        edges = np.flatnonzero(graph.open)
+        distance[graph.edge_from[edges], graph.edge_to[edges]] = graph.length[edges]
+        next_edge[graph.edge_from[edges], graph.edge_to[edges]] = edges
+
+        # Allow routes through each node k in turn; a shorter route through k
+        # starts with the first edge towards k
+        better = np.empty(distance.shape, dtype=bool)
+        for k in range(count):
+            through = distance[:, k, None] + distance[None, k, :]
+            np.less(through, distance, out=better)
+            np.copyto(distance, through, where=better)
+            np.copyto(next_edge, np.broadcast_to(next_edge[:, k, None], next_edge.shape),
+                      where=better)
+
+        # Every destination now has the column of its own index
+        self.distance, self.next_edge = distance, next_edge
+        self.column = np.arange(count, dtype=np.int32)
+        self.destinations = np.arange(count, dtype=np.int32)
+        self.used = count
+        self.valid[:] = True
+        self.full_rebuilds += 1
+
+    def add_column(self, destination):
+        """
+        Get the column of a destination, adding one if it has none
+        (the tables grow by doubling)
+        Args:
+            destination: Destination node
+        Returns:
+            int: Column index
+        """
+        column = self.column[destination]
+        if column >= 0:
+            return column
+        column = self.used
+        capacity = self.next_edge.shape[1]
+        if column == capacity:
+            capacity = min(max(2 * capacity, 16), self.graph.num_nodes)
+            distance = np.empty((self.graph.num_nodes, capacity))
+            next_edge = np.empty((self.graph.num_nodes, capacity), dtype=np.int32)
+            distance[:, :column] = self.distance[:, :column]
+            next_edge[:, :column] = self.next_edge[:, :column]
+            self.distance, self.next_edge = distance, next_edge
+            self.destinations = np.resize(self.destinations, capacity)
+        self.column[destination] = column
+        self.destinations[column] = destination
+        self.used += 1
+        return column
+
+    def refresh(self, destination):
+        """
+        Recompute the routes to one destination (Dijkstra on reversed edges)
+        Args:
+            destination: Destination node
+        """
+        graph = self.graph
+        distance = np.full(graph.num_nodes, np.inf)
+        next_edge = np.full(graph.num_nodes, -1, dtype=np.int32)
+        distance[destination] = 0.0
+        queue = [(0.0, destination)]
+        while queue:
+            dist, node = heapq.heappop(queue)
+            if dist > distance[node]:
+                continue
+            for edge in graph.in_edges[node]:
+                if edge < 0 or not graph.open[edge]:
+                    continue
+                source = graph.edge_from[edge]
+                candidate = dist + graph.length[edge]
+                if candidate < distance[source]:
+                    distance[source] = candidate
+                    next_edge[source] = edge
+                    heapq.heappush(queue, (candidate, source))
+
+        column = self.add_column(destination)
+        self.distance[:, column] = distance
+        self.next_edge[:, column] = next_edge
+        self.valid[destination] = True
+        self.refreshed += 1
+
+    def columns(self, destinations):
+        """
+        Bring the routes to some destinations up to date
+        Args:
+            destinations: Destination node of each route
+        Returns:
+            np.ndarray: Table column of each destination
+        """
+        stale = np.unique(destinations[~self.valid[destinations]])
+        if len(stale) > REBUILD_FRACTION * self.graph.num_nodes and \
+                self.graph.num_nodes <= FULL_REBUILD_NODES:
+            self.rebuild()
+        else:
+            for destination in stale:
+                self.refresh(destination)
+        return self.column[destinations]
+
+    def next_edges(self, nodes, destinations):
+        """
+        Look up the next edge of many routes at once
+        Args:
+            nodes: Current node of each route
+            destinations: Destination node of each route
+        Returns:
+            np.ndarray: Edge to take for each route (-1 if unreachable)
+        """
+        columns = self.columns(destinations)
+        return self.next_edge[nodes, columns]
+
+    def distances(self, nodes, destinations):
+        """
+        Look up the length of many routes at once
+        Args:
+            nodes: Start node of each route
+            destinations: Destination node of each route
+        Returns:
+            np.ndarray: Route length for each route (inf if unreachable)
+        """
+        columns = self.columns(destinations)
+        return self.distance[nodes, columns]
+
+    def set_edge_open(self, edge, is_open):
+        """
+        Open or close an edge and invalidate only the routes it can change
+        Args:
+            edge: Edge index
+            is_open: New state
+        """
+        graph = self.graph
+        if graph.open[edge] == is_open:
+            return
+        start, end = graph.edge_from[edge], graph.edge_to[edge]
+        if is_open:
+            # Opening helps the destinations some node gets strictly closer
+            # to through the edge
+            if not self.valid[start]:
+                self.refresh(start)
+            used = self.used
+            to_start = self.distance[:, self.column[start], None]
+            via = to_start + graph.length[edge] + self.distance[None, end, :used]
+            affected = (via < self.distance[:, :used] - 1e-9).any(axis=0)
+        else:
+            # The routes to a destination form a tree of next hops; closing
+            # only changes the destinations whose tree contains the edge
+            affected = self.next_edge[start, :self.used] == edge
+        destinations = self.destinations[:self.used][affected]
+        destinations = destinations[self.valid[destinations]]
+
+        graph.open[edge] = is_open
+        self.valid[destinations] = False
+        self.invalidated += len(destinations)
+
+    def stats(self):
+        """
+        Get cache counters
+        Returns:
+            dict: Full rebuilds, single-destination refreshes, invalidations
+        """
+        return {
+            'full_rebuilds': self.full_rebuilds,
+            'refreshed': self.refreshed,
+            'invalidated': self.invalidated,
+        }
+
+
+class TrafficRouter:
+    def __init__(self, road, seed=None):
+        """
+        Route cars along the road graph to random destinations
+        Args:
+            road: Road whose grid the cars drive on
+            seed: Seed for spawn points and destinations
+        """
+        self.graph = RoadGraph(road)
+        self.routes = RouteCache(self.graph)
+        self.rng = np.random.default_rng(seed)
+
+    def share_routes(self, previous):
+        """
+        Take over the graph and cached routes of another router on the same
+        road layout (a regenerated city keeps the routes already computed)
+        Args:
+            previous: TrafficRouter of the city being replaced
+        Returns:
+            bool: True if its graph and route cache are used from now on
+        """
+        if previous is None or not self.graph.same_layout(previous.graph):
+            return False
+        self.graph, self.routes = previous.graph, previous.routes
+        return True
+
+    def spawn(self, fleet):
+        """
+        Put every car of a fleet on a random open edge with a random destination
+        Args:
+            fleet: CarFleet to place (its router is set to this router)
+        """
+        count = len(fleet)
+        cars = np.arange(count)
+
+        # Cut the open edges into slots two cars long and put every car
+        # somewhere in its own slot (shared only when there are too few)
+        open_edges = np.flatnonzero(self.graph.open)
+        spacing = 2.0 * CAR_LENGTH
+        slots = np.maximum(self.graph.length[open_edges] // spacing, 1).astype(np.intp)
+        slot_edges = np.repeat(open_edges, slots)
+        slot_index = np.arange(len(slot_edges)) - np.repeat(np.cumsum(slots) - slots, slots)
+        chosen = self.rng.choice(len(slot_edges), size=count, replace=count > len(slot_edges))
+        edges = slot_edges[chosen]
+        offsets = slot_index[chosen] * spacing + CAR_LENGTH / 2 + \
+            self.rng.uniform(0.0, spacing - CAR_LENGTH, count)
+        self.place(fleet, cars, edges, offsets)
+        fleet.destination[:] = self.random_destinations(self.graph.edge_to[edges])
+
+        # Some drivers are faster than others
+        fleet.speed *= self.rng.uniform(0.7, 1.3, count)
+        fleet.velocity[:] = fleet.speed
+        fleet.router = self
+
+    def random_destinations(self, nodes):
+        """
+        Pick destinations different from the given nodes
+        Args:
+            nodes: Current node of each car
+        Returns:
+            np.ndarray: Destination node of each car
+        """
+        count = self.graph.num_nodes
+        if count < 2:
+            return nodes.copy()
+        return (nodes + self.rng.integers(1, count, size=len(nodes))) % count
+
+    def random_open_edges(self, nodes):
+        """
+        Pick a random open edge leaving each node (for cars without a route)
+        Args:
+            nodes: Node of each car
+        Returns:
+            np.ndarray: Edge index per car, -1 where every edge is closed
+        """
+        candidates = self.graph.out_edges[nodes]
+        usable = (candidates >= 0) & self.graph.open[candidates]
+        score = np.where(usable, self.rng.random(candidates.shape), -1.0)
+        choice = candidates[np.arange(len(nodes)), score.argmax(axis=1)]
+        return np.where(usable.any(axis=1), choice, -1)
+
+    def place(self, fleet, cars, edges, offsets):
+        """
+        Put cars on edges
+        Args:
+            fleet: CarFleet holding the cars
+            cars: Car indices
+            edges: Edge of each car
+            offsets: Distance already driven along the edge
+        """
+        graph = self.graph
+        fleet.edge[cars] = edges
+        fleet.path_type[cars] = graph.path_type[edges]
+        fleet.road_position[cars] = graph.road_position[edges]
+        fleet.lane_offset[cars] = graph.lane_offset[edges]
+        fleet.direction[cars] = graph.direction[edges]
+        fleet.path_start[cars] = graph.start[edges]
+        fleet.path_end[cars] = graph.end[edges]
+
+        # Cars changing roads are not interpolated across the turn
+        position = graph.start[edges] + graph.direction[edges] * np.minimum(offsets, graph.length[edges])
+        fleet.position[cars] = position
+        fleet.previous_position[cars] = position
+
+    def advance(self, fleet, arrived, overshoot):
+        """
+        Send cars that reached the end of their edge on to the next one
+        Args:
+            fleet: CarFleet being updated
+            arrived: Boolean mask of cars past the end of their edge
+            overshoot: Distance each car drove past the end
+        """
+        cars = np.flatnonzero(arrived)
+        if len(cars) == 0:
+            return
+        nodes = self.graph.edge_to[fleet.edge[cars]]
+
+        # Cars at their destination pick a new one
+        destinations = fleet.destination[cars]
+        reached = destinations == nodes
+        destinations[reached] = self.random_destinations(nodes[reached])
+        fleet.destination[cars] = destinations
+
+        # Follow the cached route; cars cut off from their destination wander
+        edges = self.routes.next_edges(nodes, destinations)
+        lost = edges < 0
+        if lost.any():
+            edges[lost] = self.random_open_edges(nodes[lost])
+
+        # Cars with every way out closed wait at the intersection
+        moving = edges >= 0
+        self.place(fleet, cars[moving], edges[moving], overshoot[cars[moving]])
+
+        # Cars starting the last edge of their route pick their next
+        # destination now, so the way on from its end is known in advance
+        entered, ends = cars[moving], self.graph.edge_to[edges[moving]]
+        final = fleet.destination[entered] == ends
+        fleet.destination[entered[final]] = self.random_destinations(ends[final])
+
+        waiting = cars[~moving]
+        fleet.position[waiting] = fleet.path_end[waiting]
+        fleet.previous_position[waiting] = fleet.path_end[waiting]
+        fleet.velocity[waiting] = 0.0
+
+    def stop_gaps(self, fleet, along):
+        """
+        Find cars that must stop before the next intersection because their
+        next edge has no room (used by the driver model as a standing obstacle)
+        Cars past their stop line are committed: they always enter their next
+        edge, which no other car may enter before them
+        Args:
+            fleet: CarFleet with a driver model
+            along: Position of each car in its driving direction
+        Returns:
+            tuple: (car indices, gap from each car's front bumper to its stop line)
+        """
+        graph = self.graph
+        to_end = fleet.path_end * fleet.direction - along
+        routed = fleet.edge >= 0
+        committed = np.flatnonzero((to_end <= graph.stop_line) & routed)
+        reserved = self.routes.next_edges(graph.edge_to[fleet.edge[committed]],
+                                          fleet.destination[committed])
+
+        near = np.flatnonzero((to_end < STOP_LOOKAHEAD) & (to_end > graph.stop_line) & routed)
+        nodes = graph.edge_to[fleet.edge[near]]
+        edges = self.routes.next_edges(nodes, fleet.destination[near])
+
+        # Cars without a known next edge are sorted out when they arrive
+        known = edges >= 0
+        near, edges = near[known], edges[known]
+        across = graph.road_position[edges].astype(np.float32) + \
+            graph.lane_offset[edges].astype(np.float32)
+        clear = fleet.driver_model.entry_clear(
+            fleet, near, graph.path_type[edges], graph.direction[edges], across,
+            graph.start[edges] * graph.direction[edges]
+        )
+        clear &= ~np.isin(edges, reserved)
+
+        # Of the cars free to go, only the one nearest its stop line may head
+        # for each edge, so two cars never commit to it in the same step
+        going = np.flatnonzero(clear)
+        going = going[np.argsort(to_end[near[going]], kind='stable')]
+        first = np.unique(edges[going], return_index=True)[1]
+        clear[going] = False
+        clear[going[first]] = True
+        blocked = near[~clear]
+        return blocked, to_end[blocked] - graph.stop_line - CAR_LENGTH / 2
+
+    def close_edge(self, edge):
+        """Close a lane segment (cars already on it drive on to its end)"""
+        self.routes.set_edge_open(edge, False)
+
+    def open_edge(self, edge):
+        """Reopen a closed lane segment"""
+        self.routes.set_edge_open(edge, True)
+
+
+class IntelligentDriverModel:
+    def __init__(self, max_acceleration=0.002, comfortable_deceleration=0.004,
+                 time_headway=30.0, minimum_gap=1.0, exponent=4.0):
+        """
+        Car following (Intelligent Driver Model) for a whole CarFleet
+        Units are road units and simulation steps; each car's desired speed
+        is its CarFleet.speed
+        Args:
+            max_acceleration: Acceleration on a free road (units/step^2)
+            comfortable_deceleration: Braking the model aims to stay below
+            time_headway: Steps of driving kept as distance to the car ahead
+            minimum_gap: Bumper-to-bumper distance kept when stopped
+            exponent: How sharply acceleration drops near the desired speed
+        """
+        self.max_acceleration = max_acceleration
+        self.comfortable_deceleration = comfortable_deceleration
+        self.time_headway = time_headway
+        self.minimum_gap = minimum_gap
+        self.exponent = exponent
+
+        # Car order by lane and position from the previous step; cars barely
+        # move between steps, so re-sorting it is close to linear (timsort)
+        self.order = np.zeros(0, dtype=np.intp)
+
+        # Sorted keys and position quantization of the last step (for
+        # entry_clear)
+        self.sorted_keys = np.zeros(0, dtype=np.uint64)
+        self.low, self.scale = 0.0, 1.0
+
+    @staticmethod
+    def lane_codes(path_type, direction, across):
+        """
+        Identify lanes by an integer
+        Args:
+            path_type: Road axis (PATH_HORIZONTAL / PATH_VERTICAL)
+            direction: Driving direction (+1 or -1)
+            across: Lane center across the road (road_position + lane_offset)
+        Returns:
+            np.ndarray: uint64 lane codes below 2**34
+        """
+        # The raw bits of the float32 lane center identify it exactly
+        # (adding 0.0 turns -0.0 into 0.0)
+        kind = (np.asarray(path_type).astype(np.uint64) << np.uint64(1)) | (np.asarray(direction) > 0)
+        across = (np.asarray(across, dtype=np.float32) + np.float32(0.0)).view(np.uint32)
+        return (kind << np.uint64(32)) | across.astype(np.uint64)
+
+    def position_codes(self, along):
+        """Quantize positions with the last step's scale (clipped to the key range)"""
+        position = np.clip((along - self.low) * self.scale, 0, (1 << POSITION_BITS) - 1)
+        return position.astype(np.uint64)
+
+    def lane_keys(self, fleet, along):
+        """
+        Build one sort key per car: lane in the high bits, position in the low
+        Args:
+            fleet: CarFleet
+            along: Position in the driving direction
+        Returns:
+            np.ndarray: uint64 keys (equal high bits = same lane)
+        """
+        lane = self.lane_codes(fleet.path_type, fleet.direction,
+                               fleet.road_position + fleet.lane_offset)
+        self.low = along.min() if len(along) else 0.0
+        span = max(along.max() - self.low, 1e-9) if len(along) else 1.0
+        self.scale = ((1 << POSITION_BITS) - 1) / span
+        return (lane << np.uint64(POSITION_BITS)) | self.position_codes(along)
+
+    def leaders(self, fleet, along):
+        """
+        Find the car directly ahead of every car in its lane
+        Args:
+            fleet: CarFleet
+            along: Position in the driving direction
+        Returns:
+            np.ndarray: Index of the leader of each car (-1 if the lane ahead is empty)
+        """
+        count = len(fleet)
+        if len(self.order) != count:
+            self.order = np.arange(count)
+        keys = self.lane_keys(fleet, along)
+        self.order = self.order[np.argsort(keys[self.order], kind='stable')]
+        self.sorted_keys = keys[self.order]
+
+        # Neighbours in sorted order follow each other if they share a lane
+        lanes = self.sorted_keys >> np.uint64(POSITION_BITS)
+        same_lane = lanes[1:] == lanes[:-1]
+        leader = np.full(count, -1, dtype=np.intp)
+        leader[self.order[:-1][same_lane]] = self.order[1:][same_lane]
+        return leader
+
+    def step(self, fleet, dt=1.0, out=None):
+        """
+        Accelerate every car and get how far it moves
+        Args:
+            fleet: CarFleet whose velocity is updated
+            dt: Steps of time to advance (the speed multiplier)
+            out: Optional array for the result
+        Returns:
+            np.ndarray: Distance each car moves along its direction
+        """
+        velocity = fleet.velocity
+        along = fleet.position * fleet.direction
+        leader = self.leaders(fleet, along)
+        has_leader = leader >= 0
+
+        # Bumper-to-bumper gap and closing speed (an empty lane is a free road)
+        gap = np.full(len(fleet), np.inf)
+        closing = np.zeros(len(fleet))
+        ahead = leader[has_leader]
+        gap[has_leader] = along[ahead] - along[has_leader] - CAR_LENGTH
+        closing[has_leader] = velocity[has_leader] - velocity[ahead]
+
+        # Routed cars also stop before intersections they cannot enter yet
+        if fleet.router is not None:
+            stopping, stop_gap = fleet.router.stop_gaps(fleet, along)
+            nearer = stop_gap < gap[stopping]
+            stopping, stop_gap = stopping[nearer], stop_gap[nearer]
+            gap[stopping] = stop_gap
+            closing[stopping] = velocity[stopping]
+
+        a, b = self.max_acceleration, self.comfortable_deceleration
+        desired_gap = self.minimum_gap + np.maximum(
+            velocity * self.time_headway + velocity * closing / (2.0 * np.sqrt(a * b)), 0.0
+        )
+        desired_speed = np.maximum(fleet.speed, 1e-9)
+        acceleration = a * (1.0 - (velocity / desired_speed) ** self.exponent
+                            - (desired_gap / np.maximum(gap, 1e-3)) ** 2)
+
+        # Ballistic update; never drive into the car ahead (and parked cars,
+        # with no desired speed, stay put)
+        new_velocity = np.clip(velocity + acceleration * dt, 0.0, fleet.speed)
+        distance = np.multiply(velocity + new_velocity, 0.5 * dt, out=out)
+        np.minimum(distance, np.maximum(gap, 0.0), out=distance)
+        velocity[:] = new_velocity
+        return distance
+
+    def entry_clear(self, fleet, cars, path_type, direction, across, along):
+        """
+        Check whether cars can join lanes at given points without hitting
+        the cars nearest ahead and behind (lanes sorted by the last step)
+        Args:
+            fleet: CarFleet stepped by this model
+            cars: The cars entering (never in their own way)
+            path_type, direction, across: Lane of each entry (see lane_codes)
+            along: Entry position in the driving direction
+        Returns:
+            np.ndarray: True where there is room
+        """
+        count = len(self.sorted_keys)
+        clear = np.ones(len(along), dtype=bool)
+        if count == 0 or len(along) == 0:
+            return clear
+        lane = self.lane_codes(path_type, direction, across)
+        keys = (lane << np.uint64(POSITION_BITS)) | self.position_codes(along)
+
+        # Searching in key order walks the sorted array once (several times
+        # faster than scattered lookups)
+        by_key = np.argsort(keys)
+        index = np.empty(len(keys), dtype=np.intp)
+        index[by_key] = np.searchsorted(self.sorted_keys, keys[by_key])
+        room = CAR_LENGTH + self.minimum_gap
+
+        # Nearest cars at or after the entry, then before it (skipping the
+        # entering car itself, which is still in the lane when going straight)
+        for step in (1, -1):
+            neighbour = index if step > 0 else index - 1
+            for _ in range(2):
+                valid = (neighbour >= 0) & (neighbour < count)
+                slot = np.clip(neighbour, 0, count - 1)
+                valid &= (self.sorted_keys[slot] >> np.uint64(POSITION_BITS)) == lane
+                other = self.order[slot]
+                itself = valid & (other == cars)
+                distance = (fleet.position[other] * fleet.direction[other] - along) * step
+                clear &= ~(valid & ~itself) | (distance >= room)
+                if not itself.any():
+                    break
+                # Look one car further where the neighbour was the car itself
+                neighbour = np.where(itself, neighbour + step, count + 1)
+        return clear
@@ -3,29 +3,84 @@ Tree class for 3D city simulation
 Renders simple trees using cylinders (trunk) and spheres (foliage)
 """
 from OpenGL.GL import *
-from OpenGL.GLU import *
-import math
+import numpy as np
+
+from objects.palette import intern_color
+
+
+# Shape and colors shared by every tree of a species (trees themselves only
+# store a position and a species index); share is the fraction planted
+TREE_SPECIES_DTYPE = np.dtype([
+    ('name', 'U16'), ('share', np.float32),
+    ('trunk_height', np.float32), ('trunk_radius', np.float32), ('foliage_radius', np.float32),
+    ('trunk_color', np.float32, 3), ('foliage_color', np.float32, 3),
+])
+TREE_SPECIES = np.array([
+    ('broadleaf', 0.7, 2.0, 0.2, 1.0, (0.4, 0.25, 0.1), (0.1, 0.6, 0.1)),
+    ('slender', 0.3, 2.6, 0.15, 0.8, (0.35, 0.22, 0.1), (0.15, 0.45, 0.12)),
+], dtype=TREE_SPECIES_DTYPE)
+
+# Shared color tuples of each species
+TRUNK_COLORS = tuple(intern_color(color) for color in TREE_SPECIES['trunk_color'].tolist())
+FOLIAGE_COLORS = tuple(intern_color(color) for color in TREE_SPECIES['foliage_color'].tolist())
+
+
+def species_top(species):
+    """
+    Height of the top of a species' foliage
+    Args:
+        species: Species index (or array of indices)
+    Returns:
+        float: Top height (array for an array of indices)
+    """
+    record = TREE_SPECIES[species]
+    return record['trunk_height'] + record['foliage_radius'] * 1.5
 
 
 class Tree:
-    def __init__(self, x, z):
+    __slots__ = ('x', 'z', 'species')
+    
+    def __init__(self, x, z, species=0):
         """
-        Create a tree at position (x, z)
+        Create a tree at position (x, z); a lightweight view whose shape and
+        colors come from the shared TREE_SPECIES table
         Args:
             x: X position
             z: Z position
+            species: Index into TREE_SPECIES
         """
         self.x = x
         self.z = z
-        
-        # Tree properties
-        self.trunk_height = 2.0
-        self.trunk_radius = 0.2
-        self.foliage_radius = 1.0
-        
-        # Colors
-        self.trunk_color = (0.4, 0.25, 0.1)  # Brown
-        self.foliage_color = (0.1, 0.6, 0.1)  # Green
+        self.species = species
+    
+    @property
+    def trunk_height(self):
+        return float(TREE_SPECIES['trunk_height'][self.species])
+    
+    @property
+    def trunk_radius(self):
+        return float(TREE_SPECIES['trunk_radius'][self.species])
+    
+    @property
+    def foliage_radius(self):
+        return float(TREE_SPECIES['foliage_radius'][self.species])
+    
+    @property
+    def trunk_color(self):
+        return TRUNK_COLORS[self.species]
+    
+    @property
+    def foliage_color(self):
+        return FOLIAGE_COLORS[self.species]
+    
+    @property
+    def bounds(self):
+        """Bounding box ((min x, y, z), (max x, y, z)) for culling"""
+        radius = self.foliage_radius
+        return (
+            (self.x - radius, 0.0, self.z - radius),
+            (self.x + radius, float(species_top(self.species)), self.z + radius),
+        )
         
     def draw(self):
         """Render the tree"""
@@ -48,7 +103,9 @@ class Tree:
         # Rotate to make cylinder vertical
         glRotatef(-90, 1, 0, 0)
         
-        # Create quadric object for cylinder
+        # Create quadric object for cylinder (GLU is only loaded by this
+        # legacy per-tree path)
+        from OpenGL.GLU import gluCylinder, gluDeleteQuadric, gluNewQuadric
         quad = gluNewQuadric()
         gluCylinder(quad, self.trunk_radius, self.trunk_radius, self.trunk_height, 16, 1)
         gluDeleteQuadric(quad)
@@ -64,6 +121,7 @@ class Tree:
         glTranslatef(0, self.trunk_height + self.foliage_radius * 0.5, 0)
         
         # Create quadric object for sphere
+        from OpenGL.GLU import gluDeleteQuadric, gluNewQuadric, gluSphere
         quad = gluNewQuadric()
         gluSphere(quad, self.foliage_radius, 16, 16)
         gluDeleteQuadric(quad)
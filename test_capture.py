@@ -0,0 +1,103 @@
+"""
+Test script to validate frame capture output
+Checks the PNG encoder by decoding its output and the background writer
+(raw and PNG formats, frames copied from a source address, bounded buffers)
+"""
+import os
+import struct
+import sys
+import tempfile
+import threading
+import zlib
+
+import numpy as np
+
+from engine.capture import FrameWriter, capture_format, encode_png
+
+
+def decode_png(data):
+    """
+    Decode an RGB PNG written by encode_png (filter type 0 rows only)
+    Returns:
+        np.ndarray: (height, width, 3) uint8 pixels, top row first
+    """
+    assert data[:8] == b'\x89PNG\r\n\x1a\n'
+    position, chunks = 8, {}
+    while position < len(data):
+        length, = struct.unpack('>I', data[position:position + 4])
+        kind = data[position + 4:position + 8]
+        body = data[position + 8:position + 8 + length]
+        crc, = struct.unpack('>I', data[position + 8 + length:position + 12 + length])
+        assert crc == zlib.crc32(kind + body)
+        chunks[kind] = chunks.get(kind, b'') + body
+        position += 12 + length
+    width, height, depth, color = struct.unpack('>IIBB', chunks[b'IHDR'][:10])
+    assert depth == 8 and color == 2
+    rows = np.frombuffer(zlib.decompress(chunks[b'IDAT']), dtype=np.uint8).reshape(height, width * 3 + 1)
+    assert (rows[:, 0] == 0).all()
+    return rows[:, 1:].reshape(height, width, 3)
+
+
+def test_capture():
+    """Test format selection, PNG encoding and the frame writer"""
+    print("Testing frame capture...")
+    print("=" * 50)
+
+    assert capture_format('out.MP4') == 'video'
+    assert capture_format('frames.rgba') == 'raw'
+    assert capture_format('capture-20240101') == 'png'
+    print("✓ Capture format from the output path")
+
+    # GL rows are bottom-up; PNG rows top-down without alpha
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 256, (37, 53, 4), dtype=np.uint8)
+    assert np.array_equal(decode_png(encode_png(frame)), frame[::-1, :, :3])
+    print("✓ PNG encoding round-trips (rows flipped, alpha dropped)")
+
+    frames = rng.integers(0, 256, (12, 24, 32, 4), dtype=np.uint8)
+    with tempfile.TemporaryDirectory() as directory:
+        # Raw frames stay in order even with more frames than buffers
+        path = os.path.join(directory, 'frames.rgba')
+        writer = FrameWriter(path, 32, 24, max_pending=3)
+        for number, source in enumerate(frames):
+            buffer = writer.acquire()
+            buffer[:] = source
+            writer.submit(number, buffer)
+        writer.close()
+        written = np.fromfile(path, dtype=np.uint8).reshape(frames.shape)
+        assert np.array_equal(written, frames) and writer.frames_written == len(frames)
+        assert writer.bytes_written == frames.nbytes
+        print(f"✓ {len(frames)} raw frames written in order through 3 buffers")
+
+        # PNG frames copied by the writer threads from a source address
+        # (as from a mapped pixel buffer), which is released once copied
+        path = os.path.join(directory, 'png')
+        writer = FrameWriter(path, 32, 24, workers=3, max_pending=4)
+        events = []
+        for number, source in enumerate(frames):
+            copied = threading.Event()
+            writer.submit(number, writer.acquire(), source.ctypes.data, copied)
+            events.append(copied)
+        writer.close()
+        assert all(copied.is_set() for copied in events)
+        names = sorted(os.listdir(path))
+        assert names == [f"frame_{number:06d}.png" for number in range(len(frames))]
+        for number, name in enumerate(names):
+            with open(os.path.join(path, name), 'rb') as f:
+                assert np.array_equal(decode_png(f.read()), frames[number, ::-1, :, :3])
+        print(f"✓ {len(frames)} PNG frames copied and encoded by 3 writer threads")
+
+    # A missing video encoder is reported up front
+    try:
+        FrameWriter('out.mp4', 32, 24, encoder=('no-such-encoder-binary',))
+        assert False, "missing encoder not reported"
+    except RuntimeError:
+        pass
+    print("✓ Missing video encoder raises RuntimeError")
+
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    test_capture()
+    sys.exit(0)
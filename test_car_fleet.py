@@ -0,0 +1,88 @@
+"""
+Test script to validate the vectorized car fleet
+Checks that CarFleet steps cars exactly like the per-object Car.update
+"""
+import random
+import sys
+
+import numpy as np
+
+from objects.car import Car, CarFleet
+from objects.road import Road
+from utils.helpers import create_car_fleet, create_cars
+
+
+def test_fleet_matches_car_update():
+    """Test vectorized stepping, wrap-around and the Car view API"""
+    print("Testing vectorized car fleet...")
+    print("=" * 50)
+
+    random.seed(0)
+    fleet = create_cars(num_cars=8, as_fleet=True)
+    cars = [Car(car.path_type, car.color) for car in fleet]
+    for car, view in zip(cars, fleet):
+        car.position = view.position
+        car.road_position = view.road_position
+
+    # Step both versions past the wrap-around at path_end
+    for _ in range(4000):
+        fleet.update(1.5)
+        for car in cars:
+            car.update(1.5)
+    assert np.allclose(fleet.position, [car.position for car in cars])
+    assert fleet.position.max() <= fleet.path_end.max()
+    print("✓ Fleet positions match Car.update after wrapping")
+
+    # Views read and write the backing arrays
+    view = fleet[3]
+    assert view.path_type == 'vertical' and view.road_position == 0.0
+    view.lane_offset = -1.0
+    assert fleet.lane_offset[3] == -1.0
+    print("✓ Car views share state with the fleet")
+
+    # Views drive in their fleet's direction and wrap at the end they head for
+    car = Car()
+    car.fleet.direction[0] = -1.0
+    car.path_start, car.path_end, car.position = 75.0, -75.0, 0.0
+    car.update(2.0)
+    assert car.position == -2.0 * car.speed
+    car.position = -74.99
+    car.update(1.0)
+    assert car.position == 75.0
+    print("✓ Car views step and wrap backwards")
+
+    # Routed views turn onto their next edge instead of jumping back
+    random.seed(1)
+    routed = create_car_fleet(40, Road(num_horizontal=4, num_vertical=4), routed=True)
+    index = int(np.flatnonzero(routed.direction < 0)[0])
+    view = routed[index]
+    edge, start, end = routed.edge[index], view.path_start, view.path_end
+    view.position = (start + end) / 2
+    view.update(1.0)
+    assert routed.edge[index] == edge
+    assert abs(view.position - ((start + end) / 2 - view.speed)) < 1e-4
+    view.position = end + 0.01
+    view.update(1.0)
+    assert routed.edge[index] != edge
+    assert routed.router.graph.edge_from[routed.edge[index]] == routed.router.graph.edge_to[edge]
+    low, high = sorted((view.path_start, view.path_end))
+    assert low - 1e-4 <= view.position <= high + 1e-4
+    print("✓ Routed views driving backwards turn at the end of their edge")
+
+    # Legacy list API still returns Car objects
+    cars = create_cars(num_cars=8)
+    assert len(cars) == 8 and all(isinstance(car, Car) for car in cars)
+    assert cars[0].path_type == 'horizontal' and cars[1].path_type == 'vertical'
+    print("✓ create_cars() still returns a list of cars")
+
+    # Two boxes (body + cab) of 24 vertices per car
+    assert len(fleet.build_vertices()) == len(fleet) * 48
+    assert len(CarFleet(0).build_vertices()) == 0
+    print("✓ Fleet vertices cover every car")
+
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    test_fleet_matches_car_update()
+    sys.exit(0)
@@ -0,0 +1,61 @@
+"""
+Test script to validate the streaming chunked city
+Checks deterministic generation and the bounded chunk cache
+"""
+import sys
+
+import numpy as np
+
+from engine.chunks import ChunkManager, chunk_buildings, chunk_rng, chunk_trees, generate_chunk
+from objects.road import Road
+from objects.tree import FOLIAGE_COLORS
+from utils.helpers import compute_city_blocks
+
+
+def test_chunk_streaming():
+    """Test chunk generation and LRU eviction"""
+    print("Testing chunked city streaming...")
+    print("=" * 50)
+
+    # Same seed and coordinates give the same chunk, whatever was generated before
+    road = Road()
+    first = generate_chunk(7, 1200, -35, road)
+    generate_chunk(7, 0, 0, road)
+    again = generate_chunk(7, 1200, -35, road)
+    other = generate_chunk(7, 1201, -35, road)
+    assert np.array_equal(first.mesh.vertices, again.mesh.vertices)
+    assert not np.array_equal(first.mesh.vertices, other.mesh.vertices)
+    print("✓ Chunks are generated deterministically from (seed, x, z)")
+
+    # Chunk trees come in every species, with the road-side layout
+    colors = np.unique(first.mesh.vertices[:, 6:9], axis=0)
+    for color in np.array(FOLIAGE_COLORS, dtype=np.float32):
+        assert (colors == color).all(axis=1).any()
+    assert first.tree_count == len(chunk_trees(road, road.grid_spacing))
+    print(f"✓ {first.tree_count} chunk trees of {len(FOLIAGE_COLORS)} species")
+
+    # Lattice placement never produces overlapping buildings
+    blocks = compute_city_blocks([0.0], [0.0], road.road_width, road.grid_spacing)
+    centers, half_sizes, _ = chunk_buildings(chunk_rng(3, 0, 0), blocks, 1.0)
+    for i in range(len(centers)):
+        gap = np.abs(centers[:, [0, 2]] - centers[i, [0, 2]]) - half_sizes[:, [0, 2]] - half_sizes[i, [0, 2]]
+        gap[i] = np.inf
+        assert (gap.max(axis=1) >= 1.0 - 1e-9).all()
+    print(f"✓ {len(centers)} buildings in a full chunk keep their spacing")
+
+    # Flying far away keeps the number of resident chunks bounded
+    manager = ChunkManager(seed=7, view_distance=100.0, generate_per_frame=50)
+    for step in range(40):
+        manager.update((step * 500.0, 0.0, 0.0))
+    stats = manager.stats()
+    assert stats['resident'] <= manager.max_resident
+    assert stats['evicted'] == stats['generated'] - stats['resident'] > 0
+    assert manager.visible_keys[0] == manager.chunk_of(39 * 500.0, 0.0)
+    print(f"✓ {stats['generated']} chunks generated, {stats['resident']} resident")
+
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    test_chunk_streaming()
+    sys.exit(0)
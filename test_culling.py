@@ -0,0 +1,55 @@
+"""
+Test script to validate view-frustum culling
+Checks the camera frustum and the box hierarchy against brute force
+"""
+import sys
+
+import numpy as np
+
+from engine.camera import Camera
+from engine.culling import BoxHierarchy, Frustum, index_runs
+from engine.renderer import Renderer
+
+
+def test_frustum_culling():
+    """Test frustum planes and hierarchical queries"""
+    print("Testing view-frustum culling...")
+    print("=" * 50)
+
+    renderer = Renderer(800, 600)
+    camera = Camera()
+    camera.set_preset_view('street')
+    frustum = Frustum.from_camera(camera, renderer)
+
+    # The target is visible, the point behind the camera is not
+    eye = np.array(camera.get_camera_position())
+    behind = eye + (eye - camera.target)
+    assert frustum.visible([camera.target], [[0.5, 0.5, 0.5]])[0]
+    assert not frustum.visible([behind], [[0.5, 0.5, 0.5]])[0]
+    print("✓ Street view frustum contains the target and rejects points behind it")
+
+    # Hierarchy query returns exactly the boxes the brute-force test keeps
+    rng = np.random.default_rng(7)
+    centers = np.c_[rng.uniform(-200, 200, 5000), rng.uniform(0, 10, 5000), rng.uniform(-200, 200, 5000)]
+    half_sizes = np.c_[rng.uniform(1, 3, 5000), rng.uniform(1, 10, 5000), rng.uniform(1, 3, 5000)]
+    hierarchy = BoxHierarchy(centers, half_sizes, leaf_size=16)
+    for view in ('street', '45', 'top'):
+        camera.set_preset_view(view)
+        frustum = Frustum.from_camera(camera, renderer)
+        visible, nodes_tested = hierarchy.query(frustum)
+        expected = np.flatnonzero(frustum.visible(centers, half_sizes))
+        assert np.array_equal(np.sort(hierarchy.order[visible]), expected)
+        assert nodes_tested < 2 * len(centers) / 16
+    print("✓ Hierarchy query matches brute force for all presets")
+
+    # Visible positions collapse into contiguous draw ranges
+    starts, lengths = index_runs(np.array([0, 1, 2, 7, 8, 12]))
+    assert starts.tolist() == [0, 7, 12] and lengths.tolist() == [3, 2, 1]
+    print("✓ Visible items merge into contiguous runs")
+
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    test_frustum_culling()
+    sys.exit(0)
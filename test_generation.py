@@ -0,0 +1,56 @@
+"""
+Test script to validate per-block city generation
+Checks that results only depend on the seed, not on the worker count
+"""
+import sys
+
+import numpy as np
+
+from objects.road import Road
+from utils.helpers import compute_city_blocks, generate_building_array, generate_random_city
+
+
+def test_parallel_generation():
+    """Test seeded per-block generation in and out of process"""
+    print("Testing per-block city generation...")
+    print("=" * 50)
+
+    road = Road(num_horizontal=6, num_vertical=6)
+    blocks = compute_city_blocks(road.vertical_positions, road.horizontal_positions,
+                                 road.road_width, road.road_length)
+
+    # Same seed, same buildings, whatever the number of workers
+    serial = generate_building_array(blocks, 500, seed=11, workers=1)
+    parallel = generate_building_array(blocks, 500, seed=11, workers=3)
+    assert len(serial) == 500
+    assert np.array_equal(serial, parallel)
+    assert not np.array_equal(serial, generate_building_array(blocks, 500, seed=12, workers=1))
+    print("✓ 1 and 3 workers produce identical buildings")
+
+    # No two buildings overlap (with the 1 unit buffer)
+    x, z = serial['x'], serial['z']
+    for i in range(len(serial)):
+        overlap = ((np.abs(x - x[i]) < (serial['width'] + serial['width'][i]) / 2 + 1.0) &
+                   (np.abs(z - z[i]) < (serial['depth'] + serial['depth'][i]) / 2 + 1.0))
+        assert overlap.sum() == 1
+    print("✓ Buildings keep their spacing across all blocks")
+
+    # Every building lies inside a block
+    inside = np.zeros(len(serial), dtype=bool)
+    for x_min, z_min, x_max, z_max in blocks:
+        inside |= (x >= x_min) & (x <= x_max) & (z >= z_min) & (z <= z_max)
+    assert inside.all()
+    print("✓ Buildings stay inside their blocks")
+
+    # The full city is reproducible from its seed
+    first, _ = generate_random_city(num_buildings=100, road=road, seed=5)
+    second, _ = generate_random_city(num_buildings=100, road=road, seed=5)
+    assert [(b.x, b.z, b.height) for b in first] == [(b.x, b.z, b.height) for b in second]
+    print("✓ generate_random_city is reproducible for a seed")
+
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    test_parallel_generation()
+    sys.exit(0)
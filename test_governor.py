@@ -0,0 +1,75 @@
+"""
+Test script to validate the frame governor
+Checks quality adjustments with hysteresis, the scaled render size and the
+shorter draw distance used for culling
+"""
+import sys
+
+from engine.camera import Camera
+from engine.culling import Frustum
+from engine.governor import QUALITY_LEVELS, FrameGovernor
+from engine.renderer import Renderer
+
+
+def feed(governor, frame_ms, frames):
+    """Record the same frame time several times; returns the levels changed to"""
+    levels = []
+    for _ in range(frames):
+        if governor.record(frame_ms):
+            levels.append(governor.level)
+    return levels
+
+
+def test_governor():
+    """Test quality steps, hysteresis, budget changes and the render settings"""
+    print("Testing frame governor...")
+    print("=" * 50)
+
+    # Off by default: nothing changes however slow frames are
+    governor = FrameGovernor(window=10, settle=5)
+    assert feed(governor, 100.0, 50) == [] and governor.settings == QUALITY_LEVELS[0]
+    print("✓ No budget, no adjustments")
+
+    # Over budget: one level per window, after the settle frames
+    governor.set_budget(16.0)
+    assert feed(governor, 30.0, 10) == [1]
+    assert feed(governor, 30.0, 14) == []
+    assert feed(governor, 30.0, 1) == [2]
+    assert feed(governor, 30.0, 200) == [3, 4] and governor.level == len(QUALITY_LEVELS) - 1
+    print(f"✓ Steps down one level per window to level {governor.level}")
+
+    # Between headroom and budget nothing moves; raising needs three quiet
+    # windows in a row, a busy window in between starts the count again
+    assert feed(governor, 14.0, 100) == []
+    assert feed(governor, 8.0, 5 + 20) == []
+    assert feed(governor, 14.0, 10) == []
+    assert feed(governor, 8.0, 20) == []
+    assert feed(governor, 8.0, 10) == [3]
+    print("✓ Hysteresis band holds the level; raising needs three quiet windows")
+
+    # Every adjustment is logged; turning the budget off restores full quality
+    assert [(entry['from'], entry['to']) for entry in governor.log] == [(0, 1), (1, 2), (2, 3), (3, 4), (4, 3)]
+    assert governor.log[0]['p90_ms'] == 30.0 and governor.log[-1]['budget_ms'] == 16.0
+    assert governor.set_budget(0.0) and governor.level == 0 and governor.log[-1]['p90_ms'] is None
+    assert not governor.set_budget(0.0)
+    print(f"✓ {len(governor.log)} adjustments logged, budget off returns to full quality")
+
+    # Render size follows the scale; the draw distance only moves the far plane
+    renderer = Renderer(800, 600)
+    assert renderer.render_size() == (800, 600)
+    renderer.render_scale = 0.5
+    assert renderer.render_size() == (400, 300)
+    camera = Camera()
+    camera.yaw, camera.pitch, camera.zoom = 0.0, 0.0, 50.0
+    near_box, far_box = (0.0, 0.0, -100.0), (0.0, 0.0, -300.0)
+    boxes, half_sizes = [near_box, far_box], [(1.0, 1.0, 1.0)] * 2
+    assert Frustum.from_camera(camera, renderer).visible(boxes, half_sizes).tolist() == [True, True]
+    assert Frustum.from_camera(camera, renderer, far=200.0).visible(boxes, half_sizes).tolist() == [True, False]
+    print("✓ Scaled render size and draw distance culling")
+
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    test_governor()
+    sys.exit(0)
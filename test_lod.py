@@ -0,0 +1,61 @@
+"""
+Test script to validate level-of-detail selection
+Checks distance thresholds, hysteresis and the coarse meshes
+"""
+import sys
+
+import numpy as np
+
+from engine.lod import LODSelector, box_distances
+from engine.mesh import CityMesh, BOX_VERTICES, OPEN_BOX_VERTICES
+from engine.tree_renderer import TreeRenderer
+from objects.building import Building
+
+
+def test_level_of_detail():
+    """Test LOD levels, hysteresis and the building/tree level meshes"""
+    print("Testing level of detail...")
+    print("=" * 50)
+
+    # Levels follow the thresholds when there is no previous state
+    selector = LODSelector((50.0, 100.0), hysteresis=0.1)
+    levels = selector.select([10.0, 60.0, 150.0])
+    assert levels.tolist() == [0, 1, 2]
+    print("✓ Levels follow the distance thresholds")
+
+    # Inside the band around a threshold the previous level is kept
+    assert selector.select([52.0, 48.0], [0, 1]).tolist() == [0, 1]
+    assert selector.select([56.0, 44.0], [0, 1]).tolist() == [1, 0]
+    assert selector.select([500.0], [0]).tolist() == [2]
+    print("✓ Hysteresis keeps levels stable near a threshold")
+
+    # Distances are measured to the nearest point of each box
+    distances = box_distances(np.zeros(3), [[0, 0, 0], [10, 0, 0]], [[1, 1, 1], [2, 2, 2]])
+    assert np.allclose(distances, [0.0, 8.0])
+    print("✓ Box distances are zero inside and to the nearest face outside")
+
+    # Buildings: open boxes for every building plus one merged box per block
+    buildings = [Building(x * 10.0, z * 10.0, width=4.0, height=5.0 + x, depth=4.0)
+                 for x in range(8) for z in range(8)]
+    mesh = CityMesh()
+    mesh.build(buildings)
+    blocks = len(mesh.hierarchy.leaves)
+    assert mesh.far_mesh.vertices.shape[0] == (
+        len(buildings) * OPEN_BOX_VERTICES + blocks * BOX_VERTICES)
+    merged = mesh.far_mesh.vertices[len(buildings) * OPEN_BOX_VERTICES:, 0:3]
+    assert merged[:, 1].max() <= max(b.height for b in buildings) + 1e-5
+    assert np.isclose(merged[:, 1].min(), 0.0)
+    print(f"✓ Far mesh holds open boxes and {blocks} merged blocks")
+
+    # Trees: each level is cheaper than the one before
+    renderer = TreeRenderer()
+    triangles = [len(level.indices) // 3 for level in renderer.levels]
+    assert triangles[0] > triangles[1] > triangles[2]
+    print(f"✓ Tree levels use {triangles} triangles")
+
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    test_level_of_detail()
+    sys.exit(0)
@@ -0,0 +1,82 @@
+"""
+Test script to keep scene objects compact
+Checks that buildings, trees, cars and roads have no per-instance __dict__,
+share their color tuples and stay under a per-object byte budget
+"""
+import gc
+import sys
+import tracemalloc
+
+import numpy as np
+
+from objects.building import Building
+from objects.car import Car, CarFleet
+from objects.palette import MAX_INTERNED_COLORS, gray_color, intern_color, quantize_channel
+from objects.road import Road
+from utils.helpers import (
+    BUILDING_DTYPE, TREE_DTYPE, RecordList, buildings_from_array, tree_from_columns,
+)
+
+# Bytes per object (including its list slot) measured with tracemalloc
+BYTES_PER_BUILDING = 260
+BYTES_PER_TREE = 130
+BYTES_PER_CAR = 100
+
+
+def held_bytes(build):
+    """Bytes still allocated by a callable's result when it returns"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return held, result
+
+
+def test_memory():
+    """Test slots, shared colors and bytes per object"""
+    print("Testing scene object memory...")
+    print("=" * 50)
+
+    road = Road()
+    buildings = [Building(0.0, 0.0), Building(5.0, 5.0, 3.0, 10.0, 3.0, (0.5, 0.5, 0.5))]
+    for item in buildings + [road, Car()]:
+        assert not hasattr(item, '__dict__'), type(item).__name__
+    print("✓ Building, Car and Road instances have no __dict__")
+
+    # Equal colors are one tuple; grays snap to 8-bit steps
+    assert intern_color([0.5, 0.5, 0.5]) is buildings[1].color
+    assert gray_color(0.6001) is gray_color(0.5999) and gray_color(0.6)[0] == 153 / 255
+    assert Road().color is road.color
+    assert len(set(map(id, (Building(0.0, 0.0).color for _ in range(500))))) <= 77
+    assert MAX_INTERNED_COLORS >= 256
+    print("✓ Colors are interned and random grays come from a 77 level palette")
+
+    # Byte budgets per object
+    count = 10_000
+    rng = np.random.default_rng(1)
+    records = np.zeros(count, dtype=BUILDING_DTYPE)
+    for name, low, high in (('x', -500, 500), ('z', -500, 500), ('width', 2, 5),
+                            ('height', 5, 20), ('depth', 2, 5)):
+        records[name] = rng.uniform(low, high, count)
+    records['color'] = quantize_channel(rng.uniform(0.5, 0.8, count))[:, None]
+    held, objects = held_bytes(lambda: buildings_from_array(records))
+    assert held / count < BYTES_PER_BUILDING, held / count
+    assert len({id(building.color) for building in objects}) <= 77
+    trees = np.zeros(count, dtype=TREE_DTYPE)
+    trees['x'] = rng.integers(-100, 100, count) * 4.0
+    trees['species'] = rng.integers(0, 2, count)
+    held_trees, _ = held_bytes(lambda: list(RecordList(trees, tree_from_columns)))
+    assert held_trees / count < BYTES_PER_TREE, held_trees / count
+    fleet = CarFleet(count)
+    held_cars, _ = held_bytes(lambda: [Car(fleet=fleet, index=i) for i in range(count)])
+    assert held_cars / count < BYTES_PER_CAR, held_cars / count
+    print(f"✓ {held / count:.0f} B per building, {held_trees / count:.0f} B per tree, "
+          f"{held_cars / count:.0f} B per car")
+
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    test_memory()
+    sys.exit(0)
@@ -0,0 +1,50 @@
+"""
+Test script to validate the baked building mesh
+Checks that CityMesh produces the same geometry as Building.draw
+"""
+import sys
+
+import numpy as np
+
+from engine.mesh import CityMesh, BOX_FACE_CORNERS, VERTEX_FLOATS
+from objects.building import Building
+
+
+def test_city_mesh_matches_buildings():
+    """Test vertex counts, positions and colors of the baked mesh"""
+    print("Testing baked building mesh...")
+    print("=" * 50)
+
+    buildings = [
+        Building(10.0, -5.0, width=4.0, height=12.0, depth=2.0, color=(0.5, 0.5, 0.5)),
+        Building(-20.0, 30.0, width=3.0, height=6.0, depth=5.0, color=(0.7, 0.6, 0.6)),
+    ]
+    mesh = CityMesh()
+    mesh.build(buildings)
+
+    # 6 quads of 4 vertices per building, one draw batch
+    assert mesh.vertices.shape == (len(buildings) * 24, VERTEX_FLOATS)
+    assert len(mesh.batches) == 1 and mesh.batches[0][2] == len(mesh.vertices)
+    assert mesh.building_count == 2
+    print("✓ Vertex count and batches are correct")
+
+    # Positions match the translated corners Building.draw emits
+    for index, building in enumerate(buildings):
+        block = mesh.vertices[index * 24:(index + 1) * 24]
+        half = np.array([building.width, building.height, building.depth]) / 2
+        center = np.array([building.x, building.height / 2, building.z])
+        expected = (BOX_FACE_CORNERS * half + center).reshape(-1, 3)
+        assert np.allclose(block[:, 0:3], expected, atol=1e-5)
+        assert np.allclose(block[:, 6:9], building.color, atol=1e-6)
+    print("✓ Vertex positions and colors match Building.draw")
+
+    # Base of every building sits on the ground
+    assert np.isclose(mesh.vertices[:, 1].min(), 0.0)
+    print("✓ Buildings rest on the ground plane")
+
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    test_city_mesh_matches_buildings()
+    sys.exit(0)
@@ -0,0 +1,110 @@
+"""
+Test script to validate the shader pipeline's CPU side
+Checks the NumPy view/projection matrices and that instance rows, transformed
+as the vertex shader does, reproduce the baked building and car vertices
+"""
+import random
+import sys
+
+import numpy as np
+
+from engine.camera import Camera
+from engine.mesh import (
+    INSTANCE_FLOATS, OPEN_BOX_INDICES, CityMesh, build_box_vertices, quad_indices
+)
+from engine.renderer import Renderer
+from objects.road import Road
+from objects.car import car_model_vertices
+from utils.helpers import create_car_fleet, generate_random_city
+
+
+def place(model, rows):
+    """
+    Transform model vertices by every instance row like CORE_VERTEX_SHADER
+    Args:
+        model: (V, VERTEX_FLOATS) model vertices
+        rows: (N, INSTANCE_FLOATS) instance rows
+    Returns:
+        tuple: (positions (N, V, 3), colors (N, V, 3))
+    """
+    offset, scale, color, yaw = rows[:, None, 0:3], rows[:, None, 3:6], rows[:, None, 6:9], rows[:, 9]
+    local = model[None, :, 0:3] * scale
+    c, s = np.cos(yaw)[:, None], np.sin(yaw)[:, None]
+    positions = np.stack([c * local[..., 0] + s * local[..., 2], local[..., 1],
+                          -s * local[..., 0] + c * local[..., 2]], axis=-1)
+    return positions + offset, model[None, :, 6:9] * color
+
+
+def box_bounds(positions):
+    """Min and max corner of every 24-vertex box"""
+    boxes = positions.reshape(-1, 24, 3)
+    return np.concatenate([boxes.min(axis=1), boxes.max(axis=1)], axis=1)
+
+
+def test_pipeline():
+    """Test matrices, quad splitting and instance rows"""
+    print("Testing shader pipeline...")
+    print("=" * 50)
+
+    # View puts the camera at the origin looking down -z at the target;
+    # projection maps the near and far planes to -1 and 1
+    camera = Camera()
+    camera.yaw, camera.pitch, camera.zoom = 30.0, 40.0, 80.0
+    view = camera.view_matrix()
+    eye = view @ np.append(camera.get_camera_position(), 1.0)
+    target = view @ np.append(camera.target, 1.0)
+    assert np.allclose(eye[:3], 0.0, atol=1e-6) and np.allclose(target[:3], (0, 0, -80.0))
+    origin = np.array([1000.0, 0.0, -500.0])
+    shifted = camera.view_matrix(origin) @ np.append(camera.target - origin, 1.0)
+    assert np.allclose(shifted, target)
+    renderer = Renderer()
+    projection = renderer.projection_matrix()
+    for depth, ndc in ((renderer.near, -1.0), (renderer.far, 1.0)):
+        clip = projection @ np.array([0.0, 0.0, -depth, 1.0])
+        assert np.isclose(clip[2] / clip[3], ndc)
+    print("✓ View and projection matrices match gluLookAt/gluPerspective")
+
+    # Quads split into two triangles each; an open box is the first 5 faces
+    indices = quad_indices(6)
+    assert len(indices) == 36 and indices.max() == 23
+    assert set(indices[:OPEN_BOX_INDICES]) == set(range(20))
+    print("✓ Quad indices and open box index count")
+
+    # Unit box instances rebuild every baked building exactly
+    random.seed(2)
+    road = Road()
+    buildings, _ = generate_random_city(num_buildings=150, num_trees=0, road=road)
+    mesh = CityMesh()
+    mesh.build(buildings)
+    unit = build_box_vertices(np.zeros((1, 3)), np.ones((1, 3)), np.ones((1, 3)))
+    assert mesh.instances.shape == (mesh.building_count + len(mesh.hierarchy.leaves), INSTANCE_FLOATS)
+    positions, colors = place(unit, mesh.instances[:mesh.building_count])
+    baked = mesh.vertices.reshape(mesh.building_count, 24, -1)
+    assert np.allclose(positions, baked[..., 0:3], atol=1e-4)
+    assert np.allclose(colors, baked[..., 6:9])
+    positions, _ = place(unit, mesh.instances[mesh.building_count:])
+    blocks = mesh.far_mesh.vertices[mesh.building_count * 20:].reshape(-1, 24, 9)
+    assert np.allclose(positions, blocks[..., 0:3], atol=1e-4)
+    print(f"✓ {mesh.building_count} buildings and {len(blocks)} blocks match their instance rows")
+
+    # One car model rotated by yaw covers the same boxes as the baked cars
+    # in all four driving directions
+    fleet = create_car_fleet(60, road)
+    fleet.direction[::2] = -1
+    assert set(np.unique(fleet.path_type)) == {0, 1} and set(np.unique(fleet.direction)) == {-1, 1}
+    rows = fleet.instances()
+    positions, colors = place(car_model_vertices(), rows)
+    baked = fleet.build_vertices().reshape(2, len(fleet), 24, 9)
+    expected = np.concatenate([baked[0], baked[1]], axis=1)
+    assert np.allclose(box_bounds(positions), box_bounds(expected[..., 0:3]), atol=1e-4)
+    assert np.allclose(colors.reshape(-1, 2, 24, 3)[:, :, 0], expected.reshape(-1, 2, 24, 9)[:, :, 0, 6:9])
+    visible = np.arange(0, len(fleet), 3)
+    assert np.array_equal(fleet.instances(visible), rows[visible])
+    print(f"✓ {len(fleet)} cars rebuilt from one instanced model")
+
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    test_pipeline()
+    sys.exit(0)
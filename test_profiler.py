@@ -0,0 +1,64 @@
+"""
+Test script to validate the frame profiler
+Checks nested phases, draw counting, the ring buffer and trace export
+"""
+import json
+import sys
+
+from OpenGL.GL import GL_QUADS, GL_TRIANGLE_STRIP, GL_TRIANGLES
+
+from engine.profiler import FrameProfiler, NULL_PHASE, count_draw
+
+
+def test_frame_profiler():
+    """Test phase timing, counters and Chrome trace output"""
+    print("Testing frame profiler...")
+    print("=" * 50)
+
+    # Disabled: nothing is recorded
+    profiler = FrameProfiler(capacity=8)
+    assert profiler.phase('render') is NULL_PHASE
+    with profiler.phase('render'):
+        count_draw(GL_TRIANGLES, 30)
+    profiler.end_frame()
+    assert profiler.written == 0 and profiler.frame == 0
+    print("✓ Disabled profiler records nothing")
+
+    # Nested phases get their own draw counts, parents include children
+    profiler.enabled = True
+    for _ in range(3):
+        with profiler.phase('frame'):
+            with profiler.phase('buildings'):
+                count_draw(GL_QUADS, 24)
+            with profiler.phase('trees'):
+                count_draw(GL_TRIANGLES, 12, instances=10)
+                count_draw(GL_TRIANGLE_STRIP, 5)
+        profiler.end_frame()
+    summary = profiler.summary()
+    assert list(summary) == ['frame', 'buildings', 'trees']
+    assert summary['buildings']['calls'] == 1 and summary['buildings']['primitives'] == 6
+    assert summary['trees']['calls'] == 2 and summary['trees']['primitives'] == 43
+    assert summary['frame']['calls'] == 3 and summary['frame']['depth'] == 0
+    assert summary['trees']['depth'] == 1
+    print("✓ Phases nest and count calls and primitives")
+
+    # The ring buffer keeps only the newest events, in order
+    events = profiler.recorded()
+    assert profiler.written == 9 and len(events) == 8
+    assert list(events['frame']) == [0, 0, 1, 1, 1, 2, 2, 2]
+    print("✓ Ring buffer keeps the last 8 of 9 phases")
+
+    # Chrome trace: one complete event per recorded phase
+    trace = json.loads(json.dumps(profiler.chrome_trace()))
+    complete = [event for event in trace['traceEvents'] if event['ph'] == 'X']
+    assert len(complete) == 8
+    assert {event['name'] for event in complete} == {'frame', 'buildings', 'trees'}
+    assert all(event['dur'] >= 0 for event in complete)
+    print("✓ Chrome trace exported")
+
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    test_frame_profiler()
+    sys.exit(0)
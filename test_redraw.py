@@ -0,0 +1,86 @@
+"""
+Test script to validate render on demand
+Checks the redraw tracker, the revision counters of Camera and Lighting and
+the wake-up notifications of the command queue and scene builder
+"""
+import sys
+import threading
+
+from engine.camera import Camera
+from engine.lighting import Lighting
+from engine.redraw import RedrawTracker
+from engine.scene import CommandQueue, Scene, SceneBuilder
+
+
+def test_redraw():
+    """Test dirty tracking, revisions and notifications"""
+    print("Testing render on demand...")
+    print("=" * 50)
+
+    # First frame is drawn; afterwards only changed revisions redraw
+    redraw = RedrawTracker()
+    redraw.watch('camera', 0)
+    assert redraw.needed
+    redraw.drawn(0.004)
+    redraw.watch('camera', 0)
+    assert not redraw.needed
+    redraw.watch('camera', 1)
+    assert redraw.needed
+    redraw.drawn(0.006)
+    redraw.invalidate()
+    assert redraw.needed
+    redraw.drawn(0.005)
+    redraw.enabled = False
+    assert redraw.needed
+    print("✓ Redraws on the first frame, changed revisions and invalidate()")
+
+    # CPU saved: idle time times the share of it redrawing would have used
+    redraw.idle(2.0)
+    summary = redraw.summary(fps=60)
+    assert summary['rendered'] == 3 and summary['skipped'] == 1
+    assert abs(summary['render_cpu_ms'] - 5.0) < 1e-9
+    assert abs(summary['cpu_saved_s'] - 2.0 * 0.3) < 1e-9
+    assert abs(redraw.summary(fps=0)['cpu_saved_s'] - 2.0) < 1e-9
+    print(f"✓ {summary['cpu_saved_s']:.1f} s CPU saved over 2 s idle at 5 ms per frame, 60 FPS")
+
+    # Camera changes bump the revision; clamped or empty moves do not
+    camera = Camera()
+    revision = camera.revision
+    camera.rotate(5.0, 0.0)
+    camera.zoom_camera(-2.0)
+    camera.move_target(1.0, 0.0)
+    camera.set_preset_view('top')
+    assert camera.revision == revision + 4
+    camera.rotate(0.0, -10.0)
+    camera.zoom_camera(0.0)
+    camera.move_target(0.0, 0.0)
+    camera.zoom = camera.max_zoom
+    camera.zoom_camera(5.0)
+    assert camera.revision == revision + 4
+    print("✓ Camera revision follows rotate, zoom, move_target and presets only when they change the view")
+
+    lighting = Lighting()
+    lighting.set_position(*lighting.position)
+    assert lighting.revision == 0
+    lighting.set_position(0.0, 30.0, 0.0)
+    assert lighting.revision == 1 and lighting.position == [0.0, 30.0, 0.0, 1.0]
+    print("✓ Lighting revision follows set_position")
+
+    # Posting a command and finishing a build wake the idle loop
+    woken = []
+    commands = CommandQueue(notify=lambda: woken.append('command'))
+    commands.post(woken.append, 'ran')
+    assert woken == ['command'] and commands.drain() == 1 and woken[-1] == 'ran'
+    done = threading.Event()
+    builder = SceneBuilder(notify=done.set)
+    builder.submit(Scene)
+    assert done.wait(5.0) and builder.poll() is not None
+    builder.shutdown()
+    print("✓ Command queue and scene builder notify the main loop")
+
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    test_redraw()
+    sys.exit(0)
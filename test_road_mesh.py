@@ -0,0 +1,55 @@
+"""
+Test script to validate the cached road network mesh
+Checks dash layout, grid scaling and cache invalidation
+"""
+import sys
+
+from OpenGL.GL import GL_QUADS, GL_LINES
+
+from objects.road import Road, ROAD_SURFACE_HEIGHT
+
+
+def test_road_mesh():
+    """Test the generated road mesh and its cache key"""
+    print("Testing road network mesh...")
+    print("=" * 50)
+
+    road = Road()
+    road.build_mesh()
+    (surface_type, _, surface_count), (line_type, _, line_count) = road.mesh.batches
+
+    # 6 roads: one quad, two edge lines and 75 dashes each
+    assert surface_type == GL_QUADS and surface_count == 6 * 4
+    assert line_type == GL_LINES and line_count == 6 * (2 + 75) * 2
+    assert abs(road.mesh.vertices[:surface_count, 1] - ROAD_SURFACE_HEIGHT).max() < 1e-6
+    print("✓ Default 3x3 grid has 6 road quads and 75 dashes per road")
+
+    # Arbitrary N x M grids keep the per-road vertex count
+    road = Road(num_horizontal=5, num_vertical=2)
+    road.build_mesh()
+    assert road.mesh.batches[0][2] == 7 * 4
+    assert road.horizontal_positions == [-100.0, -50.0, 0.0, 50.0, 100.0]
+    print("✓ 5x2 grid builds 7 roads at centered offsets")
+
+    # Roads reach past the outermost intersections of any grid
+    for horizontal, vertical in ((5, 2), (2, 6), (8, 8)):
+        road = Road(num_horizontal=horizontal, num_vertical=vertical)
+        road.build_mesh()
+        surfaces = road.mesh.vertices[:road.mesh.batches[0][2]]
+        outermost = max(map(abs, road.horizontal_positions + road.vertical_positions))
+        assert road.road_length == max(horizontal, vertical) * road.grid_spacing
+        assert abs(surfaces[:, [0, 2]]).max() >= outermost + road.road_width / 2
+    print("✓ Road length follows the grid size")
+
+    # Parameter changes invalidate the cache key
+    key = road.parameters()
+    road.road_width = 10.0
+    assert road.parameters() != key
+    print("✓ Changing road_width invalidates the cached mesh")
+
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    test_road_mesh()
+    sys.exit(0)
@@ -0,0 +1,82 @@
+"""
+Test script to validate background scene building
+Checks the command queue, the scene builder and baking scenes off the GL thread
+"""
+import random
+import sys
+import threading
+
+import numpy as np
+
+from engine.mesh import CityMesh
+from engine.scene import CommandQueue, SceneBuilder, bake_scene
+from engine.tree_renderer import TreeRenderer
+from objects.road import Road
+from utils.helpers import create_car_fleet, generate_random_city
+
+
+def test_scene_building():
+    """Test command ordering, build queuing and worker-baked scenes"""
+    print("Testing background scene building...")
+    print("=" * 50)
+
+    # Commands posted from several threads all run, each thread's in order
+    commands = CommandQueue()
+    ran = []
+    threads = [
+        threading.Thread(target=lambda t=t: [commands.post(ran.append, (t, i)) for i in range(100)])
+        for t in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(ran) == 0
+    assert commands.drain() == 400 and commands.drain() == 0
+    for t in range(4):
+        assert [i for owner, i in ran if owner == t] == list(range(100))
+    print("✓ 400 commands from 4 threads drained in order")
+
+    # One build at a time; the latest request made meanwhile runs next
+    builder = SceneBuilder()
+    release = threading.Event()
+    assert builder.poll() is None
+    assert builder.submit(lambda: release.wait() and 'first')
+    assert not builder.submit(lambda: 'second') and not builder.submit(lambda: 'third')
+    assert builder.poll() is None and builder.busy
+    release.set()
+    assert builder.wait() == 'first'
+    assert builder.wait() == 'third' and not builder.busy
+    print("✓ Requests during a build wait for it, latest wins")
+
+    # A failing build reports and leaves the builder usable
+    builder.submit(lambda: 1 / 0)
+    assert builder.wait() is None
+    builder.submit(lambda: 'after')
+    assert builder.wait() == 'after'
+    builder.shutdown()
+    print("✓ Failed build reported, builder still usable")
+
+    # Baking on the worker matches building on the calling thread
+    random.seed(5)
+    road = Road()
+    buildings, trees = generate_random_city(num_buildings=80, num_trees=40, road=road, lazy=True)
+    tree_renderer = TreeRenderer()
+    builder = SceneBuilder()
+    builder.submit(bake_scene, buildings, trees, create_car_fleet(10, road), tree_renderer)
+    scene = builder.wait()
+    builder.shutdown()
+    mesh = CityMesh()
+    mesh.build(buildings)
+    assert np.array_equal(scene.building_mesh.vertices, mesh.vertices)
+    assert scene.building_mesh.needs_upload and scene.building_mesh.vbo is None
+    tree_renderer.build(trees)
+    assert np.array_equal(scene.tree_instances[1], tree_renderer.offsets)
+    print(f"✓ Worker baked {len(buildings)} buildings and {len(trees)} trees (upload deferred)")
+
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    test_scene_building()
+    sys.exit(0)
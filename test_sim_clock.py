@@ -0,0 +1,60 @@
+"""
+Test script to validate the fixed-timestep simulation clock
+Checks step counts, time scaling and interpolation between steps
+"""
+import sys
+
+import numpy as np
+
+from engine.sim_clock import SimulationClock
+from objects.car import CarFleet
+
+
+def test_fixed_timestep():
+    """Test the accumulator and interpolated car positions"""
+    print("Testing fixed-timestep simulation clock...")
+    print("=" * 50)
+
+    steps = []
+    clock = SimulationClock(step_rate=60.0)
+
+    # Slow and fast frames run the same number of steps per real second
+    for real_dt in [1 / 30] * 30 + [1 / 120] * 120:
+        clock.advance(real_dt, lambda: steps.append(1))
+    assert abs(len(steps) - 120) <= 1
+    assert 0.0 <= clock.alpha <= 1.0
+    print(f"✓ 2 s of mixed 30/120 fps frames ran {len(steps)} steps")
+
+    # Time scale runs the simulation faster than real time
+    clock = SimulationClock(step_rate=60.0, time_scale=4.0)
+    count = sum(clock.advance(1 / 60, lambda: None) for _ in range(60))
+    assert count == 240 and np.isclose(clock.sim_time, 4.0)
+    print("✓ Time scale 4 simulates 4 s per real second")
+
+    # A long stall is not simulated in one burst
+    clock = SimulationClock(step_rate=60.0, max_frame_time=0.25)
+    assert clock.advance(5.0, lambda: None) == 15
+    print("✓ Long frames are clamped")
+
+    # Rendering interpolates between the last two steps
+    fleet = CarFleet(2)
+    fleet.path_start[:] = -10.0
+    fleet.path_end[:] = 10.0
+    fleet.position[:] = [0.0, 9.9]
+    fleet.previous_position[:] = fleet.position
+    fleet.speed[:] = 1.0
+    fleet.update()
+    half_way = fleet.interpolated_positions(0.5)
+    assert np.isclose(half_way[0], 0.5)
+    print("✓ Cars are drawn between their last two positions")
+
+    # A car that wrapped around is not drawn sliding back along the road
+    assert fleet.position[1] == -10.0 and half_way[1] == -10.0
+    print("✓ Wrapped cars do not interpolate across the jump")
+
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    test_fixed_timestep()
+    sys.exit(0)
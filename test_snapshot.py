@@ -0,0 +1,83 @@
+"""
+Test script to validate city snapshots
+Checks that a saved city loads back unchanged from its memory-mapped file
+"""
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+from objects.road import Road
+from utils.helpers import RecordList, create_car_fleet, generate_random_city
+from utils.snapshot import load_snapshot, save_snapshot
+
+
+def test_snapshot_round_trip():
+    """Test saving and loading buildings, trees, road layout and cars"""
+    print("Testing city snapshots...")
+    print("=" * 50)
+
+    road = Road(num_horizontal=4, num_vertical=5)
+    buildings, trees = generate_random_city(num_buildings=80, road=road, seed=3, lazy=True)
+    fleet = create_car_fleet(12, road)
+    fleet.update()
+    assert isinstance(buildings, RecordList) and isinstance(trees, RecordList)
+
+    path = os.path.join(tempfile.mkdtemp(), 'city.snap')
+    save_snapshot(path, buildings, trees, road, fleet)
+    snapshot = load_snapshot(path)
+
+    # Columns are memory-mapped and aligned, nothing is copied on load
+    assert all(isinstance(values, np.memmap) for values in snapshot.columns.values())
+    assert all(values.ctypes.data % 64 == 0 for values in snapshot.columns.values())
+    print(f"✓ {len(snapshot.columns)} aligned columns mapped from the file")
+
+    # Buildings and trees come back as lazy lists with the same contents
+    loaded = snapshot.buildings
+    assert len(loaded) == len(buildings) and len(snapshot.trees) == len(trees)
+    assert [(b.x, b.z, b.height, b.color) for b in loaded] == \
+           [(b.x, b.z, b.height, b.color) for b in buildings]
+    assert [(t.x, t.z) for t in snapshot.trees] == [(t.x, t.z) for t in trees]
+    print(f"✓ {len(loaded)} buildings and {len(trees)} trees round-trip")
+
+    # Object lists are saved the same way as record lists
+    save_snapshot(path + '2', list(buildings), list(trees), road, fleet)
+    objects = load_snapshot(path + '2')
+    assert all(np.array_equal(objects.columns[name], snapshot.columns[name])
+               for name in snapshot.columns)
+    print("✓ Building and Tree object lists save identically")
+
+    # Road layout is restored onto a fresh Road
+    restored = Road()
+    snapshot.configure_road(restored)
+    assert restored.parameters() == road.parameters()
+    print("✓ Road layout restored")
+
+    # The fleet resumes from its saved state; stepping it leaves the file alone
+    cars = snapshot.car_fleet()
+    assert np.array_equal(cars.position, fleet.position)
+    assert np.array_equal(cars.color, fleet.color)
+    cars.update()
+    fleet.update()
+    assert np.array_equal(cars.position, fleet.position)
+    assert not np.array_equal(load_snapshot(path).columns['cars/position'], cars.position)
+    print("✓ Car fleet resumes and simulates copy-on-write")
+
+    # Files with another version are rejected
+    with open(path, 'r+b') as f:
+        f.seek(8)
+        f.write((99).to_bytes(4, 'little'))
+    try:
+        load_snapshot(path)
+        assert False, "version 99 should be rejected"
+    except ValueError:
+        pass
+    print("✓ Unknown versions are rejected")
+
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    test_snapshot_round_trip()
+    sys.exit(0)
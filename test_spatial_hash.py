@@ -0,0 +1,48 @@
+"""
+Test script to validate the spatial hash used for building placement
+Checks that grid queries give exactly the same answers as the linear scan
+"""
+import random
+import sys
+
+from objects.building import Building
+from utils.helpers import check_collision
+from utils.spatial_hash import SpatialHashGrid
+
+
+def test_spatial_hash_matches_linear_scan():
+    """Test grid collision queries against check_collision on a list"""
+    print("Testing spatial hash collision checks...")
+    print("=" * 50)
+
+    random.seed(42)
+    buildings = [Building(random.uniform(-60, 60), random.uniform(-60, 60)) for _ in range(150)]
+    grid = SpatialHashGrid(cell_size=4.0)
+    for building in buildings:
+        grid.insert(building.x, building.z, building.width, building.depth)
+    assert len(grid) == len(buildings)
+
+    # Candidates of every size, including ones touching the buffer boundary
+    mismatches = 0
+    for _ in range(5000):
+        x, z = random.uniform(-70, 70), random.uniform(-70, 70)
+        width, depth = random.uniform(1, 8), random.uniform(1, 8)
+        if check_collision(x, z, width, depth, grid) != check_collision(x, z, width, depth, buildings):
+            mismatches += 1
+    assert mismatches == 0
+    print("✓ 5000 grid queries match the linear scan")
+
+    # Exactly at the buffered distance does not collide; just inside does
+    grid = SpatialHashGrid()
+    grid.insert(0.0, 0.0, 2.0, 2.0)
+    assert not grid.collides(3.0, 0.0, 2.0, 2.0)
+    assert grid.collides(2.999, 0.0, 2.0, 2.0)
+    assert not grid.collides(-100.0, 100.0, 2.0, 2.0)
+    print("✓ Buffered AABB boundary behaves like check_collision")
+
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    test_spatial_hash_matches_linear_scan()
+    sys.exit(0)
@@ -0,0 +1,60 @@
+"""
+Test script to validate startup timing and lazy imports
+Checks the StartupTimer bookkeeping, the --startup-report option and that
+importing main leaves the optional subsystems unloaded
+"""
+import subprocess
+import sys
+import time
+
+from utils.timing import StartupTimer
+
+
+# Modules main must not import until they are used
+LAZY_MODULES = ('tkinter', 'OpenGL.GLU', 'engine.capture', 'engine.chunks',
+                'engine.render_farm', 'utils.snapshot')
+
+
+def test_startup():
+    """Test phase accumulation, milestones and lazy subsystem imports"""
+    print("Testing startup timing...")
+    print("=" * 50)
+
+    # Phases accumulate in first-run order; milestones keep their first time
+    start = time.perf_counter()
+    startup = StartupTimer(start - 0.5)
+    startup.add('imports', 0.25)
+    with startup.phase('generation'):
+        time.sleep(0.01)
+    startup.add('generation', 0.1)
+    startup.mark('first frame')
+    first = startup.marks['first frame']
+    startup.mark('first frame')
+    assert list(startup.phases) == ['imports', 'generation']
+    assert startup.phases['generation'] >= 0.11
+    assert startup.marks['first frame'] == first and first >= 0.5
+    print("✓ Phases accumulate and milestones keep their first time")
+
+    # Nothing is recorded once the city is on screen
+    startup.finished = True
+    startup.add('generation', 1.0)
+    startup.mark('later')
+    report = startup.report()
+    assert report['phases']['imports'] == 250.0 and 'later' not in report['marks']
+    assert report['phases']['generation'] < 1000.0
+    print("✓ Report in milliseconds, frozen once finished")
+
+    # Importing main loads neither Tk, GLU nor the optional engine modules
+    code = ("import sys, main; "
+            "args = main.parse_args(['--startup-report']); "
+            f"print(args.startup_report, [m for m in {LAZY_MODULES!r} if m in sys.modules])")
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    assert output.stdout.strip().splitlines()[-1] == "True []", output.stdout
+    print(f"✓ main imports without {', '.join(LAZY_MODULES)}")
+
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    test_startup()
+    sys.exit(0)
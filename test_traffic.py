@@ -0,0 +1,122 @@
+"""
+Test script to validate routed traffic on the road graph
+Checks the grid graph, cached shortest routes and their invalidation
+"""
+import random
+import sys
+
+import numpy as np
+
+from objects.road import Road
+from objects.traffic import FULL_REBUILD_NODES, RoadGraph, RouteCache, TrafficRouter
+from utils.helpers import create_car_fleet
+
+
+def follow_route(graph, routes, node, destination):
+    """Walk the next-hop table and return the route length (None if stuck)"""
+    length = 0.0
+    for _ in range(graph.num_nodes):
+        if node == destination:
+            return length
+        edge = routes.next_edges(np.array([node]), np.array([destination]))[0]
+        if edge < 0:
+            return None
+        length += graph.length[edge]
+        node = graph.edge_to[edge]
+    return None
+
+
+def all_distances(graph, routes):
+    """Route lengths between every pair of intersections (source, destination)"""
+    nodes = np.arange(graph.num_nodes)
+    sources, destinations = np.repeat(nodes, len(nodes)), np.tile(nodes, len(nodes))
+    return routes.distances(sources, destinations).reshape(len(nodes), len(nodes))
+
+
+def test_routed_traffic():
+    """Test graph layout, routing, closures and the routed fleet"""
+    print("Testing road graph traffic...")
+    print("=" * 50)
+
+    # The default 3x3 grid: 9 intersections, 12 segments driven both ways
+    road = Road()
+    graph = RoadGraph(road)
+    assert graph.num_nodes == 9 and graph.num_edges == 24
+    assert np.allclose(graph.length, road.grid_spacing)
+    assert graph.find_edge(0, 1) >= 0 and graph.find_edge(0, 4) == -1
+    print("✓ 9 intersections and 24 lane segments")
+
+    # Cached routes are shortest: corner to corner is 4 segments; routes to
+    # a destination are only computed once it is looked up
+    routes = RouteCache(graph)
+    assert routes.used == 0 and not routes.valid.any()
+    assert follow_route(graph, routes, 0, 8) == 4 * road.grid_spacing
+    distance = all_distances(graph, RouteCache(graph))
+    for source in range(graph.num_nodes):
+        for destination in range(graph.num_nodes):
+            assert follow_route(graph, routes, source, destination) == distance[source, destination]
+    assert routes.full_rebuilds == 0 and routes.refreshed == graph.num_nodes
+    print("✓ Next-hop routes match all-pairs distances")
+
+    # Closing the direct segment forces a detour, reopening restores it
+    edge = graph.find_edge(3, 4)
+    routes.set_edge_open(edge, False)
+    assert 0 < routes.invalidated < graph.num_nodes
+    assert follow_route(graph, routes, 3, 4) == 3 * road.grid_spacing
+    routes.set_edge_open(edge, True)
+    assert follow_route(graph, routes, 3, 4) == road.grid_spacing
+    print(f"✓ Closure invalidated {routes.invalidated} destinations, detour found")
+
+    # Random closures: incremental updates agree with a full rebuild
+    rng = np.random.default_rng(1)
+    big = Road(num_horizontal=5, num_vertical=6)
+    graph = RoadGraph(big)
+    routes = RouteCache(graph)
+    nodes = np.arange(graph.num_nodes)
+    for _ in range(50):
+        edge = rng.integers(graph.num_edges)
+        routes.set_edge_open(edge, not graph.open[edge])
+        for destination in nodes:
+            routes.next_edges(nodes, np.full(graph.num_nodes, destination))
+        assert np.allclose(all_distances(graph, routes), all_distances(graph, RouteCache(graph)))
+    assert routes.full_rebuilds == 0
+    print("✓ Incremental invalidation matches a full rebuild")
+
+    # Large grids never build all-pairs tables: only the destinations looked
+    # up get a column
+    graph = RoadGraph(Road(num_horizontal=20, num_vertical=20))
+    assert graph.num_nodes > FULL_REBUILD_NODES
+    routes = RouteCache(graph)
+    destinations = np.array([0, 57, 399, 57])
+    edges = routes.next_edges(np.full(4, 210), destinations)
+    assert (edges >= 0).all() and routes.used == 3 and routes.full_rebuilds == 0
+    assert routes.distances(np.array([0]), np.array([399]))[0] == 38 * graph.length[0]
+    print(f"✓ {graph.num_nodes} intersections: {routes.used} route columns, no all-pairs build")
+
+    # A regenerated city on the same road keeps the cached routes
+    road = Road(num_horizontal=4, num_vertical=4)
+    first, second = TrafficRouter(road, seed=0), TrafficRouter(road, seed=1)
+    first.routes.next_edges(np.array([0]), np.array([15]))
+    assert second.share_routes(first) and second.routes is first.routes
+    assert not TrafficRouter(Road(num_horizontal=4, num_vertical=5)).share_routes(first)
+    print("✓ Route cache shared across cities on the same road")
+
+    # Routed cars stay in the lanes of their edges while turning
+    random.seed(2)
+    fleet = create_car_fleet(300, Road(num_horizontal=4, num_vertical=4), routed=True)
+    graph = fleet.router.graph
+    for _ in range(3000):
+        fleet.update(10.0)
+    low = np.minimum(fleet.path_start, fleet.path_end) - 1e-4
+    high = np.maximum(fleet.path_start, fleet.path_end) + 1e-4
+    assert ((fleet.position >= low) & (fleet.position <= high)).all()
+    assert np.array_equal(fleet.road_position, graph.road_position[fleet.edge].astype(np.float32))
+    assert np.array_equal(fleet.direction, graph.direction[fleet.edge].astype(np.float32))
+    print("✓ 300 routed cars stay on their lane segments")
+
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    test_routed_traffic()
+    sys.exit(0)
@@ -0,0 +1,84 @@
+"""
+Test script to validate vectorized road-side tree planting
+Checks the planted positions against the original per-tree loops, the
+species assignment and the lightweight Tree view
+"""
+import sys
+
+import numpy as np
+
+from engine.tree_renderer import TreeRenderer
+from objects.road import Road
+from objects.tree import TREE_SPECIES, Tree
+from utils.helpers import TREE_DTYPE, RecordList, plant_road_trees, tree_from_columns
+
+
+def loop_tree_positions(road):
+    """Road-side tree positions computed one tree at a time (the original loops)"""
+    positions = []
+    offset = road.road_width / 2 + 2.0
+    exclusion = road.road_width / 2 + 2.0
+    for road_z in road.horizontal_positions:
+        for i in range(int(road.road_length / 4.0)):
+            x = -road.road_length / 2 + i * 4.0
+            if all(abs(x - road_x) >= exclusion for road_x in road.vertical_positions):
+                positions.append((x, road_z + offset))
+                positions.append((x, road_z - offset))
+    for road_x in road.vertical_positions:
+        for i in range(int(road.road_length / 4.0)):
+            z = -road.road_length / 2 + i * 4.0
+            if all(abs(z - road_z) >= exclusion for road_z in road.horizontal_positions):
+                positions.append((road_x + offset, z))
+                positions.append((road_x - offset, z))
+    return positions
+
+
+def test_tree_planting():
+    """Test planted positions, species and Tree views"""
+    print("Testing road-side tree planting...")
+    print("=" * 50)
+
+    # Same trees in the same order as the loops, on square and uneven grids
+    for horizontal, vertical in ((3, 3), (6, 2), (1, 5), (12, 12)):
+        road = Road(num_horizontal=horizontal, num_vertical=vertical)
+        trees = plant_road_trees(road, seed=1)
+        assert trees.dtype == TREE_DTYPE
+        expected = np.array(loop_tree_positions(road))
+        assert np.array_equal(np.stack([trees['x'], trees['z']], axis=1), expected)
+    print(f"✓ Positions match the per-tree loops ({len(trees)} trees on a 12x12 grid)")
+
+    # Species follow the table's shares and only depend on the seed
+    assert np.array_equal(plant_road_trees(road, seed=1), trees)
+    assert not np.array_equal(plant_road_trees(road, seed=2)['species'], trees['species'])
+    counts = np.bincount(trees['species'], minlength=len(TREE_SPECIES)) / len(trees)
+    assert np.allclose(counts, TREE_SPECIES['share'], atol=0.05)
+    print(f"✓ Species shares {np.round(counts, 2).tolist()} for a seed")
+
+    # Records are compact; Tree objects are views of a record's species
+    assert TREE_DTYPE.itemsize == 9
+    lazy = RecordList(trees, tree_from_columns)
+    tree = lazy[int(np.argmax(trees['species'] == 1))]
+    assert tree.species == 1 and tree.foliage_radius == TREE_SPECIES['foliage_radius'][1]
+    assert not hasattr(tree, '__dict__')
+    low, high = Tree(3.0, 4.0).bounds
+    assert low == (2.0, 0.0, 3.0) and high == (4.0, 3.5, 5.0)
+    print("✓ 9-byte records and lightweight Tree views")
+
+    # Each species is drawn with its own meshes and culled by its own box
+    renderer = TreeRenderer()
+    assert [(level.species, level.detail) for level in renderer.levels] == \
+           [(species, detail) for species in range(len(TREE_SPECIES)) for detail in range(3)]
+    renderer.use_instances(renderer.bake(lazy))
+    assert np.array_equal(np.sort(renderer.species), np.sort(trees['species']))
+    top = renderer.hierarchy.item_center[:, 1] + renderer.hierarchy.item_half[:, 1]
+    order = renderer.hierarchy.order
+    assert np.allclose(top, TREE_SPECIES['trunk_height'][trees['species'][order]] +
+                       1.5 * TREE_SPECIES['foliage_radius'][trees['species'][order]])
+    print(f"✓ Renderer keeps {len(renderer.levels)} levels and per-species boxes")
+
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    test_tree_planting()
+    sys.exit(0)
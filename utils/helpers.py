@@ -1,10 +1,19 @@
 """
 Helper functions for 3D city simulation
 """
+import os
 import random
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
 from objects.building import Building
-from objects.tree import Tree
-from objects.car import Car
+from objects.palette import quantize_channel
+from objects.tree import TREE_SPECIES, Tree
+from objects.car import CarFleet, CAR_COLORS
+from objects.road import Road
+from objects.traffic import TrafficRouter
+from utils.spatial_hash import SpatialHashGrid
 
 
 def check_collision(x, z, width, depth, existing_buildings):
@@ -13,10 +22,14 @@ def check_collision(x, z, width, depth, existing_buildings):
     Args:
         x, z: Position of new building
         width, depth: Dimensions of new building
-        existing_buildings: List of existing Building objects
+        existing_buildings: List of existing Building objects, or a SpatialHashGrid
     Returns:
         bool: True if collision detected, False otherwise
     """
+    # The grid only visits neighbouring cells, with the same overlap test
+    if isinstance(existing_buildings, SpatialHashGrid):
+        return existing_buildings.collides(x, z, width, depth)
+
     # Add some spacing buffer
     buffer = 1.0
     
@@ -33,60 +46,47 @@ def check_collision(x, z, width, depth, existing_buildings):
     return False
 
 
-def generate_random_city(num_buildings=60, num_trees=40):
+def compute_city_blocks(road_positions_x, road_positions_z, road_width, road_length, road_margin=7.0):
     """
-    Generate random city layout - expanded version with more area
+    Compute the building areas between roads
     Args:
-        num_buildings: Number of buildings to generate
-        num_trees: Number of trees to generate (not including road-side trees)
+        road_positions_x: X positions of the north-south roads
+        road_positions_z: Z positions of the east-west roads
+        road_width, road_length: Road dimensions
+        road_margin: Gap kept between road edges and buildings
     Returns:
-        tuple: (buildings_list, trees_list)
+        list: Blocks as (x_min, z_min, x_max, z_max) tuples
     """
-    buildings = []
-    trees = []
-    
-    # Define road dimensions (must match Road class)
-    road_width = 8.0
-    road_length = 150.0
-    grid_spacing = 50.0  # Spacing between parallel roads
-    
-    # Define safe zones for buildings (avoiding roads with margin)
-    road_margin = 7.0
-    
-    # Define city blocks (areas between roads)
-    # With 3 horizontal and 3 vertical roads at -50, 0, 50, we have blocks:
-    # Block boundaries are from road edge + margin to next road edge - margin
+    def spans(road_positions):
+        # Block boundaries are from road edge + margin to next road edge - margin
+        edges = ([-road_length/2] +
+                 [p for road in road_positions
+                  for p in (road - road_width/2 - road_margin, road + road_width/2 + road_margin)] +
+                 [road_length/2])
+        return list(zip(edges[0::2], edges[1::2]))
+
     blocks = []
-    road_positions = [-grid_spacing, 0, grid_spacing]
-    
-    # Generate blocks between roads
-    for i in range(len(road_positions) + 1):
-        for j in range(len(road_positions) + 1):
-            # Calculate block boundaries
-            if i == 0:
-                x_min = -road_length/2
-                x_max = road_positions[0] - road_width/2 - road_margin
-            elif i == len(road_positions):
-                x_min = road_positions[-1] + road_width/2 + road_margin
-                x_max = road_length/2
-            else:
-                x_min = road_positions[i-1] + road_width/2 + road_margin
-                x_max = road_positions[i] - road_width/2 - road_margin
-            
-            if j == 0:
-                z_min = -road_length/2
-                z_max = road_positions[0] - road_width/2 - road_margin
-            elif j == len(road_positions):
-                z_min = road_positions[-1] + road_width/2 + road_margin
-                z_max = road_length/2
-            else:
-                z_min = road_positions[j-1] + road_width/2 + road_margin
-                z_max = road_positions[j] - road_width/2 - road_margin
-            
+    for x_min, x_max in spans(road_positions_x):
+        for z_min, z_max in spans(road_positions_z):
             # Only add valid blocks (where min < max)
             if x_min < x_max and z_min < z_max:
                 blocks.append((x_min, z_min, x_max, z_max))
-    
+    return blocks
+
+
+def place_buildings(blocks, num_buildings, use_index=True):
+    """
+    Randomly place non-overlapping buildings inside city blocks
+    Args:
+        blocks: Blocks as (x_min, z_min, x_max, z_max) tuples
+        num_buildings: Number of buildings to place
+        use_index: Check collisions with a SpatialHashGrid instead of a linear scan
+    Returns:
+        list: List of Building objects
+    """
+    buildings = []
+    placed = SpatialHashGrid() if use_index else buildings
+
     # Generate buildings with collision detection
     attempts = 0
     max_attempts = num_buildings * 30  # Prevent infinite loop
@@ -107,76 +107,331 @@ def generate_random_city(num_buildings=60, num_trees=40):
         temp_building = Building(x, z)
         
         # Check for collisions
-        if not check_collision(x, z, temp_building.width, temp_building.depth, buildings):
+        if not check_collision(x, z, temp_building.width, temp_building.depth, placed):
             buildings.append(temp_building)
+            if use_index:
+                placed.insert(x, z, temp_building.width, temp_building.depth)
+    
+    return buildings
+
+
+# Building records produced by per-block generation
+BUILDING_DTYPE = np.dtype([
+    ('x', np.float64), ('z', np.float64),
+    ('width', np.float64), ('height', np.float64), ('depth', np.float64),
+    ('color', np.float32, 3),
+])
+
+# Tree records: position and an index into TREE_SPECIES, which holds the
+# shape and colors (9 bytes per tree; road-side positions are exact in float32)
+TREE_DTYPE = np.dtype([('x', np.float32), ('z', np.float32), ('species', np.uint8)])
+
+# Road-side trees: spacing along the road and distance from its center line
+# beyond the road's half width (also kept clear around intersections)
+TREE_SPACING = 4.0
+TREE_CLEARANCE = 2.0
+
+# Seed stream of the tree species, apart from the per-block building streams
+TREE_SEED_KEY = 2 ** 32
+
+# Cities below this size are generated in-process (pool startup costs more)
+PARALLEL_MIN_BUILDINGS = 20000
+
+
+def place_block_buildings(task):
+    """
+    Place non-overlapping buildings inside one block (runs in a worker process)
+    Args:
+        task: (block, count, seed, block_index); the block is seeded from the
+              master seed and its index, so the result never depends on which
+              worker runs it
+    Returns:
+        np.ndarray: BUILDING_DTYPE records
+    """
+    (x_min, z_min, x_max, z_max), count, seed, block_index = task
+    rng = np.random.default_rng([seed, block_index])
+    placed = SpatialHashGrid()
+    buildings = np.zeros(count, dtype=BUILDING_DTYPE)
+    total = 0
+
+    # Candidates are drawn in fixed-size batches so the sequence is the same
+    # however many attempts are needed
+    batch = max(count, 16)
+    attempts = 0
+    while total < count and attempts < count * 30:
+        x = rng.uniform(x_min, x_max, batch)
+        z = rng.uniform(z_min, z_max, batch)
+        width = rng.uniform(2, 5, batch)
+        height = rng.uniform(5, 20, batch)
+        depth = rng.uniform(2, 5, batch)
+        gray = quantize_channel(rng.uniform(0.5, 0.8, batch))
+        for i in range(batch):
+            attempts += 1
+            if not placed.collides(x[i], z[i], width[i], depth[i]):
+                placed.insert(x[i], z[i], width[i], depth[i])
+                buildings[total] = (x[i], z[i], width[i], height[i], depth[i], (gray[i],) * 3)
+                total += 1
+                if total == count:
+                    break
+    return buildings[:total]
+
+
+def generate_building_array(blocks, num_buildings, seed, workers=None):
+    """
+    Generate buildings block by block, in parallel for large cities
+    Args:
+        blocks: Blocks as (x_min, z_min, x_max, z_max) tuples
+        num_buildings: Number of buildings to place
+        seed: Master seed; the result is identical for any worker count
+        workers: Worker processes (CPU count for large cities if None, 1 = in-process)
+    Returns:
+        np.ndarray: BUILDING_DTYPE records in block order
+    """
+    if not blocks or num_buildings <= 0:
+        return np.zeros(0, dtype=BUILDING_DTYPE)
+
+    # Blocks never share buildings (roads separate them), so each block only
+    # needs its share of the total, drawn in proportion to its area
+    areas = np.array([(x_max - x_min) * (z_max - z_min) for x_min, z_min, x_max, z_max in blocks])
+    counts = np.random.default_rng([seed]).multinomial(num_buildings, areas / areas.sum())
+    tasks = [(block, int(count), seed, index)
+             for index, (block, count) in enumerate(zip(blocks, counts)) if count]
+
+    if workers is None:
+        workers = os.cpu_count() if num_buildings >= PARALLEL_MIN_BUILDINGS else 1
+    if workers <= 1:
+        results = [place_block_buildings(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunksize = max(1, len(tasks) // (workers * 4))
+            results = list(pool.map(place_block_buildings, tasks, chunksize=chunksize))
+    return np.concatenate(results)
+
+
+def buildings_from_array(records):
+    """
+    Create Building objects from generated records
+    Args:
+        records: BUILDING_DTYPE array
+    Returns:
+        list: List of Building objects
+    """
+    return [
+        Building(x, z, width, height, depth, tuple(color))
+        for x, z, width, height, depth, color in zip(
+            records['x'].tolist(), records['z'].tolist(), records['width'].tolist(),
+            records['height'].tolist(), records['depth'].tolist(), records['color'].tolist())
+    ]
+
+
+class RecordList:
+    def __init__(self, columns, factory):
+        """
+        Read-only sequence of objects backed by column arrays
+        Objects are only created when an item is accessed, so large cities
+        (or memory-mapped snapshots) cost nothing per object until then
+        Args:
+            columns: Structured array or dict of equally long arrays (needs 'x')
+            factory: Callable (columns, index) -> object
+        """
+        self.columns = columns
+        self.factory = factory
+
+    def __len__(self):
+        return len(self.columns['x'])
+
+    def __getitem__(self, index):
+        """Create the object at an index (a list of objects for a slice)"""
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if not -len(self) <= index < len(self):
+            raise IndexError("record index out of range")
+        return self.factory(self.columns, index % len(self))
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.factory(self.columns, index)
+
+
+def building_from_columns(columns, index):
+    """Create the Building stored at one index of building columns"""
+    return Building(
+        float(columns['x'][index]), float(columns['z'][index]),
+        float(columns['width'][index]), float(columns['height'][index]),
+        float(columns['depth'][index]), tuple(columns['color'][index].tolist())
+    )
+
+
+def tree_from_columns(columns, index):
+    """Create the Tree stored at one index of tree columns"""
+    return Tree(float(columns['x'][index]), float(columns['z'][index]), int(columns['species'][index]))
+
+
+def plant_road_trees(road, seed=0, spacing=TREE_SPACING):
+    """
+    Plant trees along both sides of every road, skipping intersections
+    (every road of a direction shares the same positions along it, so one
+    mask per direction covers the whole grid)
+    Args:
+        road: Road whose grid to plant along
+        seed: Master seed; picks each tree's species
+        spacing: Distance between trees along a road
+    Returns:
+        np.ndarray: TREE_DTYPE records; horizontal roads first, then vertical
+                    ones, each road's trees in order with the +/- side pairs
+    """
+    # Trees stand this far from their road's center line, and positions this
+    # close to a crossing road's center line are left out, so the crossing
+    # road gets the same clearance
+    offset = road.road_width / 2 + TREE_CLEARANCE
+    along = -road.road_length / 2 + np.arange(int(road.road_length / spacing)) * spacing
+    sides = np.array([offset, -offset])
+
+    parts = []
+    for roads, crossing, axis in ((road.horizontal_positions, road.vertical_positions, 0),
+                                  (road.vertical_positions, road.horizontal_positions, 1)):
+        roads = np.asarray(roads, dtype=np.float64)
+        crossing = np.asarray(crossing, dtype=np.float64).reshape(1, -1)
+        kept = along[(np.abs(along[:, None] - crossing) >= offset).all(axis=1)]
+
+        # (road, position, side) grid of the coordinate across the road
+        across = np.broadcast_to(roads[:, None, None] + sides, (len(roads), len(kept), 2))
+        positions = np.broadcast_to(kept[None, :, None], across.shape)
+        part = np.empty((across.size, 2))
+        part[:, axis] = positions.ravel()
+        part[:, 1 - axis] = across.ravel()
+        parts.append(part)
+    positions = np.concatenate(parts)
+
+    trees = np.zeros(len(positions), dtype=TREE_DTYPE)
+    trees['x'] = positions[:, 0]
+    trees['z'] = positions[:, 1]
+    trees['species'] = pick_species(np.random.default_rng([seed, TREE_SEED_KEY]), len(trees))
+    return trees
+
+
+def pick_species(rng, count):
+    """
+    Draw tree species in proportion to their planting share
+    Args:
+        rng: np.random.Generator to draw from
+        count: Number of trees
+    Returns:
+        np.ndarray: Index into TREE_SPECIES per tree
+    """
+    shares = TREE_SPECIES['share'].astype(np.float64)
+    return rng.choice(len(TREE_SPECIES), size=count, p=shares / shares.sum())
+
+
+def generate_random_city(num_buildings=60, num_trees=40, road=None, seed=None, workers=None,
+                         lazy=False):
+    """
+    Generate random city layout - expanded version with more area
+    Args:
+        num_buildings: Number of buildings to generate
+        num_trees: Number of trees to generate (not including road-side trees)
+        road: Road whose layout to build around (default 3x3 grid if None)
+        seed: Master seed for building placement and tree species (drawn
+              from random if None)
+        workers: Worker processes for building placement (see generate_building_array)
+        lazy: Return RecordLists over the generated arrays instead of object lists
+    Returns:
+        tuple: (buildings_list, trees_list)
+    """
+    # Define road dimensions (must match Road class)
+    if road is None:
+        road = Road()
+    road_width = road.road_width
+    road_length = road.road_length
+    road_positions_x = road.vertical_positions
+    road_positions_z = road.horizontal_positions
     
-    # Generate trees along both sides of all roads
-    tree_spacing = 4.0  # Space between trees
-    tree_offset = road_width/2 + 2.0  # Distance from road center
+    # Define safe zones for buildings (avoiding roads with margin)
+    road_margin = 7.0
     
-    # Exclusion zone at intersections
-    intersection_exclusion = road_width/2 + 2.0
+    # Define city blocks (areas between roads)
+    blocks = compute_city_blocks(road_positions_x, road_positions_z, road_width, road_length, road_margin)
     
-    # Trees along all horizontal roads
-    for road_z in road_positions:
-        for i in range(int(road_length / tree_spacing)):
-            x = -road_length/2 + i * tree_spacing
-            # Skip trees near intersections with vertical roads
-            skip = False
-            for road_x in road_positions:
-                if abs(x - road_x) < intersection_exclusion:
-                    skip = True
-                    break
-            if not skip:
-                trees.append(Tree(x, road_z + tree_offset))
-                trees.append(Tree(x, road_z - tree_offset))
+    # Generate buildings block by block (each block seeded from the master seed)
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    records = generate_building_array(blocks, num_buildings, seed, workers)
     
-    # Trees along all vertical roads
-    for road_x in road_positions:
-        for i in range(int(road_length / tree_spacing)):
-            z = -road_length/2 + i * tree_spacing
-            # Skip trees near intersections with horizontal roads
-            skip = False
-            for road_z in road_positions:
-                if abs(z - road_z) < intersection_exclusion:
-                    skip = True
-                    break
-            if not skip:
-                trees.append(Tree(road_x + tree_offset, z))
-                trees.append(Tree(road_x - tree_offset, z))
+    # Generate trees along both sides of all roads (vectorized over the grid)
+    trees = plant_road_trees(road, seed)
     
-    return buildings, trees
+    if lazy:
+        return RecordList(records, building_from_columns), RecordList(trees, tree_from_columns)
+    return buildings_from_array(records), [
+        Tree(x, z, species) for x, z, species in
+        zip(trees['x'].tolist(), trees['z'].tolist(), trees['species'].tolist())
+    ]
+
+
+def create_car_fleet(num_cars=8, road=None, routed=False):
+    """
+    Create the car fleet on the expanded road network
+    Args:
+        num_cars: Number of cars to create
+        road: Road whose layout the cars drive on (default 3x3 grid if None)
+        routed: Route cars through the intersections to random destinations
+                (needs at least 2 roads in one direction) instead of looping
+                each car along one road
+    Returns:
+        CarFleet: Fleet with every car's state in NumPy arrays
+    """
+    if road is None:
+        road = Road()
+    fleet = CarFleet(num_cars)
+    index = np.arange(num_cars)
+
+    # Random bright car colors
+    palette = np.array(CAR_COLORS, dtype=np.float32)
+    fleet.color[:] = palette[[random.randrange(len(CAR_COLORS)) for _ in range(num_cars)]]
+
+    if routed:
+        router = TrafficRouter(road, seed=random.randrange(2 ** 32))
+        if router.graph.num_edges > 0:
+            router.spawn(fleet)
+            return fleet
+
+    # Road positions for the grid (-50, 0, 50 by default)
+    horizontal_roads = np.array(road.horizontal_positions, dtype=np.float32)
+    vertical_roads = np.array(road.vertical_positions, dtype=np.float32)
+
+    # Alternate horizontal/vertical cars on different roads in the grid
+    # (Z position of the road for horizontal, X position for vertical)
+    fleet.path_type[:] = index % 2
+    road_index = index // 2
+    fleet.road_position[:] = np.where(
+        index % 2 == 0,
+        horizontal_roads[road_index % len(horizontal_roads)],
+        vertical_roads[road_index % len(vertical_roads)]
+    )
 
+    # Cars drive the full road length
+    fleet.path_start[:] = -road.road_length / 2
+    fleet.path_end[:] = road.road_length / 2
 
-def create_cars(num_cars=8):
+    # Stagger starting positions across the longer road
+    fleet.position[:] = -road.road_length / 2 + index * 20.0
+    fleet.previous_position[:] = fleet.position
+
+    return fleet
+
+
+def create_cars(num_cars=8, as_fleet=False, road=None, routed=False):
     """
     Create cars for animation on the expanded road network
     Args:
         num_cars: Number of cars to create
+        as_fleet: Return the backing CarFleet instead of a list
+        road: Road whose layout the cars drive on (default 3x3 grid if None)
+        routed: Route cars through the intersections (see create_car_fleet)
     Returns:
-        list: List of Car objects
+        list: List of Car objects (views into one CarFleet), or the CarFleet
     """
-    cars = []
-    
-    # Road positions for the grid (-50, 0, 50)
-    road_positions = [-50.0, 0.0, 50.0]
-    
-    # Create cars on different roads in the grid
-    for i in range(num_cars):
-        if i % 2 == 0:
-            car = Car(path_type='horizontal')
-            # Assign to different horizontal roads (Z position of the road)
-            road_index = (i // 2) % len(road_positions)
-            car.road_position = road_positions[road_index]
-            # Stagger starting positions across the longer road
-            car.position = -75.0 + (i * 20)
-        else:
-            car = Car(path_type='vertical')
-            # Assign to different vertical roads (X position of the road)
-            road_index = (i // 2) % len(road_positions)
-            car.road_position = road_positions[road_index]
-            car.position = -75.0 + (i * 20)
-        
-        cars.append(car)
-    
-    return cars
+    fleet = create_car_fleet(num_cars, road, routed)
+    if as_fleet:
+        return fleet
+    return list(fleet)
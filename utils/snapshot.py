@@ -0,0 +1,191 @@
+"""
+City snapshots for 3D city simulation
+Saves buildings, trees, road parameters and car fleet state in a versioned,
+columnar binary file that is memory-mapped on load
+
+File layout (little-endian):
+    magic        8 bytes   b'CITYSNAP'
+    version      uint32
+    header size  uint32
+    header       JSON: road parameters and, for every column, its dtype,
+                 shape and offset from the start of the data section
+    data         one contiguous array per column, each aligned to ALIGNMENT
+"""
+import json
+import struct
+
+import numpy as np
+
+from objects.car import CarFleet, FLEET_COLUMNS
+from utils.helpers import (
+    BUILDING_DTYPE, TREE_DTYPE, RecordList, building_from_columns, tree_from_columns,
+)
+
+
+SNAPSHOT_MAGIC = b'CITYSNAP'
+SNAPSHOT_VERSION = 1
+
+# Magic, version and header size
+PREAMBLE = struct.Struct('<8sII')
+
+# Columns start on cache-line boundaries so mapped arrays are aligned
+ALIGNMENT = 64
+
+# Road attributes stored in the header
+ROAD_FIELDS = (
+    'road_width', 'road_length', 'grid_spacing', 'num_horizontal', 'num_vertical',
+    'color', 'line_color', 'edge_color',
+)
+
+
+def align(offset):
+    """Round an offset up to the next multiple of ALIGNMENT"""
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def record_columns(items, dtype):
+    """
+    Split objects (or a RecordList) into one array per field of a record dtype
+    Args:
+        items: RecordList, or list of objects with an attribute per field
+        dtype: Structured dtype naming the fields
+    Returns:
+        dict: Field name -> array
+    """
+    columns = getattr(items, 'columns', None)
+    result = {}
+    for name in dtype.names:
+        field = dtype.fields[name][0]
+        if columns is not None:
+            values = np.asarray(columns[name], dtype=field.base)
+        else:
+            values = np.array([getattr(item, name) for item in items], dtype=field.base)
+        result[name] = values.reshape((-1,) + field.shape)
+    return result
+
+
+def save_snapshot(path, buildings, trees, road, fleet):
+    """
+    Write a city snapshot
+    Args:
+        path: Output file path
+        buildings: List of Building objects or a RecordList of building columns
+        trees: List of Tree objects or a RecordList of tree columns
+        road: Road whose layout parameters to store
+        fleet: CarFleet whose state to store
+    """
+    columns = {}
+    for prefix, items, dtype in (('buildings', buildings, BUILDING_DTYPE),
+                                 ('trees', trees, TREE_DTYPE)):
+        for name, values in record_columns(items, dtype).items():
+            columns[f'{prefix}/{name}'] = values
+    for name in FLEET_COLUMNS:
+        columns[f'cars/{name}'] = np.asarray(getattr(fleet, name))
+
+    # Lay the columns out back to back, each aligned
+    layout = {}
+    offset = 0
+    for name, values in columns.items():
+        values = np.ascontiguousarray(values, dtype=values.dtype.newbyteorder('<'))
+        columns[name] = values
+        offset = align(offset)
+        layout[name] = {'dtype': values.dtype.str, 'shape': list(values.shape), 'offset': offset}
+        offset += values.nbytes
+
+    road_parameters = {}
+    for name in ROAD_FIELDS:
+        value = getattr(road, name)
+        road_parameters[name] = list(value) if isinstance(value, tuple) else value
+    header = json.dumps({'road': road_parameters, 'columns': layout}).encode('utf-8')
+
+    data_start = align(PREAMBLE.size + len(header))
+    with open(path, 'wb') as f:
+        f.write(PREAMBLE.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(header)))
+        f.write(header)
+        for name, values in columns.items():
+            f.seek(data_start + layout[name]['offset'])
+            f.write(values.tobytes())
+        f.truncate(data_start + align(offset))
+
+
+class CitySnapshot:
+    def __init__(self, path):
+        """
+        Memory-map a city snapshot (only the header is read up front)
+        Args:
+            path: Snapshot file path
+        """
+        self.path = path
+        with open(path, 'rb') as f:
+            magic, version, header_size = PREAMBLE.unpack(f.read(PREAMBLE.size))
+            if magic != SNAPSHOT_MAGIC:
+                raise ValueError(f"{path} is not a city snapshot")
+            if version != SNAPSHOT_VERSION:
+                raise ValueError(f"Unsupported city snapshot version {version} in {path}")
+            self.header = json.loads(f.read(header_size).decode('utf-8'))
+
+        # Copy-on-write: loaded cars can be simulated in place without the
+        # changes reaching the file
+        data = np.memmap(path, dtype=np.uint8, mode='c')
+        data_start = align(PREAMBLE.size + header_size)
+        self.columns = {}
+        for name, spec in self.header['columns'].items():
+            dtype = np.dtype(spec['dtype'])
+            shape = tuple(spec['shape'])
+            start = data_start + spec['offset']
+            size = dtype.itemsize * int(np.prod(shape))
+            self.columns[name] = data[start:start + size].view(dtype).reshape(shape)
+
+    def section(self, prefix):
+        """
+        Get the columns of one part of the city
+        Args:
+            prefix: 'buildings', 'trees' or 'cars'
+        Returns:
+            dict: Column name (without the prefix) -> mapped array
+        """
+        prefix += '/'
+        return {name[len(prefix):]: values for name, values in self.columns.items()
+                if name.startswith(prefix)}
+
+    @property
+    def buildings(self):
+        """Buildings as a RecordList over the mapped columns"""
+        return RecordList(self.section('buildings'), building_from_columns)
+
+    @property
+    def trees(self):
+        """Trees as a RecordList over the mapped columns"""
+        columns = self.section('trees')
+        if 'species' not in columns:
+            # Saved before trees had species: all of the first one
+            columns['species'] = np.zeros(len(columns['x']), dtype=np.uint8)
+        return RecordList(columns, tree_from_columns)
+
+    def car_fleet(self):
+        """
+        Create the car fleet from the mapped state
+        Returns:
+            CarFleet: Fleet backed by copy-on-write views of the file
+        """
+        return CarFleet.from_columns(self.section('cars'))
+
+    def configure_road(self, road):
+        """
+        Apply the stored layout to a Road
+        Args:
+            road: Road to update
+        """
+        for name, value in self.header['road'].items():
+            setattr(road, name, tuple(value) if isinstance(value, list) else value)
+
+
+def load_snapshot(path):
+    """
+    Open a city snapshot
+    Args:
+        path: Snapshot file path
+    Returns:
+        CitySnapshot: Snapshot with memory-mapped columns
+    """
+    return CitySnapshot(path)
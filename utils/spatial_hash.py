@@ -0,0 +1,78 @@
+"""
+Uniform-grid spatial index for 3D city simulation
+Speeds up building placement collision checks
+"""
+import math
+
+
+class SpatialHashGrid:
+    def __init__(self, cell_size=8.0, buffer=1.0):
+        """
+        Create an empty grid
+        Args:
+            cell_size: Side length of a grid cell (about one building plus spacing)
+            buffer: Spacing required between building footprints
+        """
+        self.cell_size = cell_size
+        self.buffer = buffer
+
+        # (cell_x, cell_z) -> list of (x, z, width, depth) footprints
+        self.cells = {}
+        self.count = 0
+
+        # Largest footprint inserted so far bounds the query radius
+        self.max_width = 0.0
+        self.max_depth = 0.0
+
+    def __len__(self):
+        return self.count
+
+    def cell_of(self, x, z):
+        """
+        Get the cell containing a point
+        Args:
+            x, z: World position
+        Returns:
+            tuple: (cell_x, cell_z) key
+        """
+        return (math.floor(x / self.cell_size), math.floor(z / self.cell_size))
+
+    def insert(self, x, z, width, depth):
+        """
+        Add a building footprint (stored in the cell of its center)
+        Args:
+            x, z: Building center
+            width, depth: Building dimensions
+        """
+        self.cells.setdefault(self.cell_of(x, z), []).append((x, z, width, depth))
+        self.count += 1
+        self.max_width = max(self.max_width, width)
+        self.max_depth = max(self.max_depth, depth)
+
+    def collides(self, x, z, width, depth):
+        """
+        Check if a footprint overlaps any inserted one (same test as check_collision)
+        Args:
+            x, z: Position of new building
+            width, depth: Dimensions of new building
+        Returns:
+            bool: True if collision detected, False otherwise
+        """
+        buffer = self.buffer
+
+        # Any overlapping center lies within this reach, so only nearby cells are visited
+        reach_x = (width + self.max_width) / 2 + buffer
+        reach_z = (depth + self.max_depth) / 2 + buffer
+        min_cx, min_cz = self.cell_of(x - reach_x, z - reach_z)
+        max_cx, max_cz = self.cell_of(x + reach_x, z + reach_z)
+
+        cells = self.cells
+        for cx in range(min_cx, max_cx + 1):
+            for cz in range(min_cz, max_cz + 1):
+                for other_x, other_z, other_width, other_depth in cells.get((cx, cz), ()):
+                    # Check if bounding boxes overlap (with buffer)
+                    if (abs(x - other_x) < (width + other_width) / 2 + buffer and
+                            abs(z - other_z) < (depth + other_depth) / 2 + buffer):
+                        return True
+
+        return False
@@ -0,0 +1,101 @@
+"""
+Timing statistics for 3D city simulation benchmarks and launch
+"""
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+
+def summarize_times(times_ms):
+    """
+    Summarize a series of frame (or phase) times
+    Args:
+        times_ms: Sequence of durations in milliseconds
+    Returns:
+        dict: count, mean, p50, p95, p99, min and max in milliseconds
+    """
+    times = np.asarray(times_ms, dtype=np.float64)
+    if len(times) == 0:
+        return {'count': 0}
+    p50, p95, p99 = np.percentile(times, [50, 95, 99])
+    return {
+        'count': int(len(times)),
+        'mean': float(times.mean()),
+        'p50': float(p50),
+        'p95': float(p95),
+        'p99': float(p99),
+        'min': float(times.min()),
+        'max': float(times.max()),
+    }
+
+
+class StartupTimer:
+    def __init__(self, start=None):
+        """
+        Time the phases of a launch, up to the first frame showing the city
+        Args:
+            start: time.perf_counter() value the launch started at (now if None)
+        """
+        self.start = time.perf_counter() if start is None else start
+
+        # Seconds spent in each phase, in the order they first ran
+        self.phases = {}
+
+        # Seconds after the start at which each milestone was reached
+        self.marks = {}
+
+        # Set once the city is on screen; later phases and marks are ignored
+        self.finished = False
+
+    def add(self, name, seconds):
+        """
+        Add time to a phase
+        Args:
+            name: Phase name, e.g. 'generation'
+            seconds: Duration to add
+        """
+        if not self.finished:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Time a block as (part of) a phase
+        Args:
+            name: Phase name
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def mark(self, name):
+        """
+        Record when a milestone was first reached
+        Args:
+            name: Milestone name, e.g. 'first frame'
+        """
+        if not self.finished and name not in self.marks:
+            self.marks[name] = time.perf_counter() - self.start
+
+    def report(self):
+        """
+        Summarize the launch
+        Returns:
+            dict: 'phases' and 'marks' in milliseconds
+        """
+        return {
+            'phases': {name: seconds * 1000.0 for name, seconds in self.phases.items()},
+            'marks': {name: seconds * 1000.0 for name, seconds in self.marks.items()},
+        }
+
+    def print_report(self):
+        """Print the phase breakdown and milestones"""
+        report = self.report()
+        print("Startup:")
+        for name, ms in report['phases'].items():
+            print(f"  {name:<16} {ms:>8.1f} ms")
+        for name, ms in report['marks'].items():
+            print(f"  {name + ' at':<16} {ms:>8.1f} ms after launch")